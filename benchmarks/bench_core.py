@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+计算引擎基准测试（带回归检查）
+
+覆盖基本计算、子网等分、超网合并和包含数统计（Subnet 列表和 CompactNetworks 两种输入），每项记录耗时（多次运行取最小值）
+和 tracemalloc 测得的内存峰值，结果可以保存为 JSON 基准，之后的运行与基准比较：
+任何一项比基准慢超过 --threshold 百分比时退出码为1，适合在CI中使用。
+
+    python benchmarks/bench_core.py                               # 运行并与 benchmarks/baseline.json 比较
+    python benchmarks/bench_core.py --quick --threshold 50        # 跳过百万级的测试项
+    python benchmarks/bench_core.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_core.py --filter collapse --json
+
+基准与机器有关，换机器后应重新保存。测试数据由固定的随机种子生成，生成数据的时间不计入耗时。
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from core import batch, compact, export, ipmath  # noqa: E402
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 比基准慢的绝对值低于此秒数时不算回归（毫秒级的测试项受调度抖动影响较大）
+NOISE_SECONDS = 0.005
+
+# 数据量达到此值的测试项在 --quick 时跳过
+LARGE = 1000000
+
+
+class NullWriter:
+    """丢弃写入内容的文件对象，用于只测量生成导出文本的耗时"""
+
+    def write(self, text):
+        return len(text)
+
+
+def random_networks(count, rng):
+    """count 个随机IPv4网络（/8../30）"""
+    networks = []
+    for _ in range(count):
+        prefix = rng.randint(8, 30)
+        networks.append(ipmath.Subnet(rng.getrandbits(32) & ipmath.prefix_to_netmask(prefix), prefix, 32))
+    return networks
+
+
+def adjacent_networks(count, rng):
+    """count 个相邻的 /24（打乱顺序），合并后只剩少数几个超网"""
+    networks = [ipmath.Subnet((10 << 24) + (i << 8), 24, 32) for i in range(count)]
+    rng.shuffle(networks)
+    return networks
+
+
+def address_lines(count, rng):
+    """count 行 "地址/前缀长度" 文本（基本计算的输入）"""
+    return [f"{ipmath.format_ipv4(rng.getrandbits(32))}/{rng.randint(8, 32)}" for _ in range(count)]
+
+
+def collapse_and_count(networks):
+    """超网计算标签页的完整计算：合并超网并统计每个超网包含的原始网络数"""
+    supernets = ipmath.collapse(networks)
+    ipmath.contained_counts(supernets, networks)
+    return len(supernets)
+
+
+def compact_collapse_and_count(networks):
+    """同上，输入为 CompactNetworks（超网计算标签页和命令行实际使用的路径）"""
+    supernets = compact.collapse(networks)
+    compact.contained_counts(supernets, networks)
+    return len(supernets)
+
+
+class Case:
+    """一个测试项：setup(rng) 生成输入数据，run(data) 为被测量的计算，返回结果数量（用于核对）"""
+
+    def __init__(self, name, size, setup, run):
+        self.name = name
+        self.size = size
+        self.setup = setup
+        self.run = run
+
+
+def build_cases():
+    """全部测试项"""
+    cases = []
+    for count in (10000, 100000):
+        cases.append(Case(f"basic_info_{count // 1000}k", count,
+                          lambda rng, count=count: address_lines(count, rng),
+                          lambda lines: len(batch.calculate_lines(lines))))
+    for prefix, new_prefix in ((16, 30), (8, 24), (8, 30)):
+        count = 1 << (new_prefix - prefix)
+        # 等分本身是惰性的（O(1)），测量的是逐个生成全部子网（导出、保存前缀集时的路径）
+        cases.append(Case(f"split_{prefix}_{new_prefix}", count,
+                          lambda rng, p=prefix, n=new_prefix: ipmath.split(10 << 24, p, n),
+                          lambda subnets: sum(1 for _ in subnets)))
+    for prefix, new_prefix in ((16, 30), (8, 24)):
+        cases.append(Case(f"split_export_text_{prefix}_{new_prefix}", 1 << (new_prefix - prefix),
+                          lambda rng, p=prefix, n=new_prefix: ipmath.split(10 << 24, p, n),
+                          lambda subnets: export.write_plan_text(NullWriter(), subnets)))
+    for kind, generate in (("random", random_networks), ("adjacent", adjacent_networks)):
+        for count, label in ((10000, "10k"), (100000, "100k"), (1000000, "1m")):
+            cases.append(Case(f"collapse_{kind}_{label}", count,
+                              lambda rng, count=count, generate=generate: generate(count, rng),
+                              lambda networks: len(ipmath.collapse(networks))))
+    for count, label in ((100000, "100k"), (1000000, "1m")):
+        cases.append(Case(f"contained_counts_{label}", count,
+                          lambda rng, count=count: random_networks(count, rng),
+                          collapse_and_count))
+        cases.append(Case(f"collapse_compact_random_{label}", count,
+                          lambda rng, count=count: compact.CompactNetworks(random_networks(count, rng)),
+                          lambda networks: len(compact.collapse(networks))))
+        cases.append(Case(f"contained_counts_compact_{label}", count,
+                          lambda rng, count=count: compact.CompactNetworks(random_networks(count, rng)),
+                          compact_collapse_and_count))
+    return cases
+
+
+def measure(case, repeat, memory):
+    """运行一个测试项，返回 {"seconds", "peak_mb", "items", "result"}"""
+    data = case.setup(random.Random(1))
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = case.run(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    record = {"seconds": round(best, 6), "items": case.size, "result": result}
+    if memory:
+        # tracemalloc 会拖慢计算，单独运行一次测量内存峰值（不含输入数据本身）
+        tracemalloc.start()
+        case.run(data)
+        record["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1 << 20), 2)
+        tracemalloc.stop()
+    return record
+
+
+def run_cases(cases, repeat, memory, verbose):
+    """运行全部测试项，返回结果文档"""
+    results = {}
+    for case in cases:
+        if verbose:
+            print(f"  {case.name} ...", end="", flush=True, file=sys.stderr)
+        results[case.name] = measure(case, repeat, memory)
+        if verbose:
+            print(f" {results[case.name]['seconds']:.3f}s", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cases": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    与基准比较，返回 [(测试项, 基准秒数, 本次秒数, 变化百分比, 是否回归), ...]
+
+    基准中没有的测试项不比较；结果数量不同说明计算结果变了，也算回归。
+    """
+    rows = []
+    for name, record in report["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            continue
+        seconds, base_seconds = record["seconds"], base["seconds"]
+        change = (seconds - base_seconds) * 100 / base_seconds if base_seconds else 0.0
+        regressed = (change > threshold and seconds - base_seconds > NOISE_SECONDS
+                     or record["result"] != base.get("result", record["result"]))
+        rows.append((name, base_seconds, seconds, change, regressed))
+    return rows
+
+
+def print_report(report, comparison):
+    """以表格输出结果（有基准时附带与基准的比较）"""
+    compared = {row[0]: row for row in comparison}
+    # 中文标题每个字占两列，宽度按显示列数减去字数
+    print(f"{'测试项':<27}{'数量':>8}{'耗时':>9}{'内存峰值':>9}{'基准':>9}{'变化':>7}")
+    for name, record in report["cases"].items():
+        peak = f"{record['peak_mb']:.1f}MB" if "peak_mb" in record else "-"
+        line = f"{name:<30}{record['items']:>10}{record['seconds']:>10.3f}s{peak:>13}"
+        if name in compared:
+            _, base_seconds, _, change, regressed = compared[name]
+            line += f"{base_seconds:>10.3f}s{change:>+8.1f}%" + ("  回归" if regressed else "")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="子网计算器计算引擎基准测试")
+    parser.add_argument("--repeat", type=int, default=3, help="每项运行次数，取最小耗时（默认3）")
+    parser.add_argument("--filter", "-k", action="append", default=[], metavar="TEXT",
+                        help="只运行名称中包含 TEXT 的测试项（可重复）")
+    parser.add_argument("--quick", action="store_true", help=f"跳过数据量达到 {LARGE} 的测试项")
+    parser.add_argument("--no-memory", action="store_true", help="不测量内存峰值（节省一半时间）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, metavar="FILE",
+                        help="与之比较的基准文件（默认 benchmarks/baseline.json，不存在时不比较）")
+    parser.add_argument("--threshold", type=float, default=25.0, metavar="PERCENT",
+                        help="比基准慢超过此百分比时视为回归（默认25）")
+    parser.add_argument("--save-baseline", metavar="FILE", help="把本次结果保存为基准文件（不与旧基准比较）")
+    parser.add_argument("--output", "-o", metavar="FILE", help="把本次结果（JSON）写入文件")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果和比较")
+    args = parser.parse_args()
+
+    cases = [case for case in build_cases()
+             if (not args.filter or any(text in case.name for text in args.filter))
+             and not (args.quick and case.size >= LARGE)]
+    if not cases:
+        raise SystemExit("错误: 没有匹配的测试项")
+    report = run_cases(cases, max(1, args.repeat), not args.no_memory, verbose=not args.json)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as fp:
+                json.dump(report, fp, ensure_ascii=False, indent=2)
+                fp.write("\n")
+    comparison = []
+    if not args.save_baseline and args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fp:
+            comparison = compare(report, json.load(fp), args.threshold)
+    regressions = [row[0] for row in comparison if row[4]]
+
+    if args.json:
+        report["comparison"] = [{"case": name, "baseline_seconds": base, "seconds": seconds,
+                                 "change_percent": round(change, 1), "regressed": regressed}
+                                for name, base, seconds, change, regressed in comparison]
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report, comparison)
+    if regressions:
+        print(f"回归（比基准慢超过 {args.threshold:g}% 或结果不同）: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
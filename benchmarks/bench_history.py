@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+历史记录基准测试
+
+在临时数据库中生成大量历史记录，然后测量记录一次计算的耗时，
+以及各种搜索（网络内、包含地址、关键字）读取第一页和连续翻页的耗时。
+
+    python benchmarks/bench_history.py --entries 300000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from core import ipmath  # noqa: E402
+from utils import history_manager  # noqa: E402
+from utils.history_manager import HistoryManager, address_key  # noqa: E402
+
+
+def random_network(rng):
+    """随机网络（约十分之一为IPv6）"""
+    if rng.random() < 0.1:
+        prefix = rng.choice([32, 48, 56, 64])
+        return ipmath.Subnet((0x20010db8 << 96 | rng.getrandbits(96)) & ipmath.prefix_to_netmask(prefix, 128),
+                             prefix, 128)
+    prefix = rng.randint(8, 32)
+    return ipmath.Subnet(rng.getrandbits(32) & ipmath.prefix_to_netmask(prefix, 32), prefix, 32)
+
+
+def fill(history, count, rng):
+    """批量写入 count 条随机记录（一个事务，每10秒一条）"""
+    kinds = list(history_manager.KINDS)
+    now = time.time()
+    rows = []
+    for i in range(count):
+        sn = random_network(rng)
+        text = ipmath.format_network(*sn)
+        rows.append((now - (count - i) * 10, rng.choice(kinds), text, f"结果 {i}", text, sn.bits,
+                     address_key(sn.network), address_key(ipmath.broadcast_of(*sn)), None))
+    conn = history.connect()
+    with conn:
+        conn.executemany("INSERT INTO history (created, kind, input, summary, network, bits, start, end, result) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def timed(fn, repeat):
+    """fn() 多次运行耗时的中位数（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def page_through(history, query, pages):
+    """连续读取 pages 页"""
+    before = None
+    for _ in range(pages):
+        entries = history.search(query, before)
+        if not entries:
+            break
+        before = entries[-1].id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="子网计算器历史记录基准测试")
+    parser.add_argument("--entries", type=int, default=300000, help="生成的记录数（默认300000）")
+    parser.add_argument("--repeat", type=int, default=5, help="每项测量的次数（默认5）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        history = HistoryManager(os.path.join(tmp, "history.sqlite3"))
+        start = time.perf_counter()
+        fill(history, args.entries, rng)
+        results = {"entries": args.entries, "fill_s": round(time.perf_counter() - start, 3)}
+
+        sn = ipmath.Subnet(10 << 24 | 20 << 16, 16, 32)
+        results["add_ms"] = timed(lambda: history.add("basic", "10.20.1.5/24", "测试", [sn]), args.repeat * 20)
+        queries = {
+            "all": "",
+            "inside_/16": "10.20.0.0/16",
+            "inside_/4": "inside 16.0.0.0/4",
+            "contains_address": "10.20.1.5",
+            "keyword": "结果 12345",
+            "v6_inside": "2001:db8::/32",
+            "date": time.strftime("%Y-%m-%d"),
+        }
+        for name, query in queries.items():
+            results[f"{name}_first_page_ms"] = timed(lambda: history.search(query), args.repeat)
+            results[f"{name}_10_pages_ms"] = timed(lambda: page_through(history, query, 10), args.repeat)
+        history.close()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    print(f"历史记录（{args.entries} 条，生成耗时 {results['fill_s']} s）:")
+    print(f"  记录一次计算              {results['add_ms']:8.2f} ms")
+    for name in queries:
+        print(f"  {name:<24}第一页 {results[name + '_first_page_ms']:8.2f} ms"
+              f"   10页 {results[name + '_10_pages_ms']:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+前缀集文件基准测试
+
+生成随机网络列表，分别保存为文本文件和前缀集文件（.smps），比较：
+保存耗时、文件大小、读取（解析 / 内存映射）耗时，以及读取后合并超网、统计包含数的总耗时。
+
+    python benchmarks/bench_prefix_set.py --count 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from core import export, ipmath, prefix_io  # noqa: E402
+
+
+def random_networks(count, rng):
+    """count 个随机网络（约十分之一为IPv6）"""
+    networks = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            prefix = rng.randint(32, 64)
+            networks.append(ipmath.Subnet((0x20010db8 << 96 | rng.getrandbits(96))
+                                          & ipmath.prefix_to_netmask(prefix, 128), prefix, 128))
+        else:
+            prefix = rng.randint(16, 30)
+            networks.append(ipmath.Subnet(rng.getrandbits(32) & ipmath.prefix_to_netmask(prefix, 32), prefix, 32))
+    return networks
+
+
+def timed(fn):
+    """(fn() 的返回值, 耗时秒数)"""
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def write_text(path, networks):
+    """保存为文本文件（每行一个网络）"""
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write("".join(ipmath.format_network(*sn) + "\n" for sn in networks))
+
+
+def load_and_collapse(path):
+    """读取网络列表文件，合并超网并统计每个超网包含的网络数"""
+    networks = prefix_io.read_prefix_file(path).networks
+    supernets = ipmath.collapse(networks)
+    ipmath.contained_counts(supernets, networks)
+    return len(supernets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="子网计算器前缀集文件基准测试")
+    parser.add_argument("--count", type=int, default=1000000, help="网络数量（默认1000000）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    networks = random_networks(args.count, random.Random(1))
+    results = {"count": args.count}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"text": os.path.join(tmp, "networks.txt"), "prefixset": os.path.join(tmp, "networks.smps")}
+        _, results["text_save_s"] = timed(lambda: write_text(paths["text"], networks))
+        _, results["prefixset_save_s"] = timed(
+            lambda: export.export_plan(paths["prefixset"], networks, "prefixset"))
+        for name, path in paths.items():
+            results[f"{name}_size_mb"] = round(os.path.getsize(path) / (1 << 20), 2)
+            _, results[f"{name}_load_s"] = timed(lambda: prefix_io.read_prefix_file(path))
+            supernets, results[f"{name}_load_collapse_s"] = timed(lambda: load_and_collapse(path))
+            results[f"{name}_supernets"] = supernets
+    if results["text_supernets"] != results["prefixset_supernets"]:
+        raise SystemExit("错误: 两种文件合并得到的超网数量不同")
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    print(f"{args.count} 个网络（合并为 {results['text_supernets']} 个超网）:")
+    print(f"  {'':<10}{'保存':>10}{'大小':>12}{'读取':>10}{'读取+合并+统计':>18}")
+    for name in ("text", "prefixset"):
+        print(f"  {name:<10}{results[name + '_save_s']:9.3f}s{results[name + '_size_mb']:10.2f}MB"
+              f"{results[name + '_load_s']:9.3f}s{results[name + '_load_collapse_s']:17.3f}s")
+
+
+if __name__ == "__main__":
+    main()
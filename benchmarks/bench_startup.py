@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动时间基准测试
+
+每次在新的Python进程中（冷启动）执行与 main() 相同的启动流程，直到主窗口第一次显示，
+分别记录导入、创建窗口并显示、处理完第一批事件的耗时，多次运行后输出中位数和最小值。
+每次运行使用独立的临时配置目录，可用 --tab 指定上次使用的标签页。
+
+    python benchmarks/bench_startup.py --runs 10 --tab 0
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# 在子进程中执行的启动流程，最后一行输出各阶段耗时（秒）的JSON
+CHILD_CODE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from main import create_window
+t1 = time.perf_counter()
+app, config, window = create_window(sys.argv[:1])
+t2 = time.perf_counter()
+app.processEvents()
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "window": t2 - t1, "first_events": t3 - t2, "total": t3 - t0}))
+"""
+
+
+def run_once(tab, env):
+    """在新进程中启动一次，返回各阶段耗时"""
+    with tempfile.TemporaryDirectory() as home:
+        with open(os.path.join(home, ".subnet_calculator_config.json"), "w", encoding="utf-8") as f:
+            json.dump({"last_tab": tab}, f)
+        child_env = dict(env, HOME=home, USERPROFILE=home)
+        out = subprocess.run([sys.executable, "-c", CHILD_CODE, SRC_DIR], env=child_env,
+                             check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="子网计算器启动时间基准测试")
+    parser.add_argument("--runs", type=int, default=10, help="运行次数（默认10）")
+    parser.add_argument("--tab", type=int, default=0, help="上次使用的标签页序号（默认0）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if sys.platform.startswith("linux") and not env.get("DISPLAY"):
+        # 没有显示器时（如CI）使用离屏平台
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    runs = [run_once(args.tab, env) for _ in range(args.runs)]
+    summary = {phase: {"median": statistics.median(r[phase] for r in runs),
+                       "min": min(r[phase] for r in runs)}
+               for phase in runs[0]}
+    if args.json:
+        print(json.dumps({"runs": args.runs, "tab": args.tab, "phases": summary}, indent=2))
+        return
+    print(f"启动时间（{args.runs} 次，上次标签页 {args.tab}）:")
+    for phase, stats in summary.items():
+        print(f"  {phase:<14} 中位数 {stats['median'] * 1000:8.1f} ms   最小 {stats['min'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
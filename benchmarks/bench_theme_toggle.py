@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+主题切换基准测试
+
+创建主窗口并在各标签页中填入大量结果（子网划分表格、超网结果、批量计算结果），
+然后反复切换浅色/暗色主题，记录每次切换（包括处理完随后的界面事件）的耗时。
+
+    python benchmarks/bench_theme_toggle.py --toggles 20
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="子网计算器主题切换基准测试")
+    parser.add_argument("--toggles", type=int, default=20, help="切换次数（默认20）")
+    parser.add_argument("--rows", type=int, default=10000, help="超网和批量计算的输入行数（默认10000）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    # 使用临时配置，不影响用户的配置文件
+    home = tempfile.mkdtemp()
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+
+    from PyQt5.QtWidgets import QApplication
+    from core import batch, ipmath
+    from widgets.main_window import SubnetCalculator
+    from utils.config_manager import ConfigManager
+
+    app = QApplication(sys.argv[:1])
+    window = SubnetCalculator(ConfigManager())
+    window.resize(1100, 800)
+    window.show()
+
+    # 填入结果：/8 划分为 /24（65536行）、超网计算、批量计算
+    rng = random.Random(1)
+    window.ensure_tab(1).show_result(ipmath.split(0x0A000000, 8, 24))
+    networks = [ipmath.Subnet(rng.getrandbits(24) << 8, 24) for _ in range(args.rows)]
+    supernets = ipmath.collapse(networks)
+    window.ensure_tab(2).show_result(supernets, networks, ipmath.contained_counts(supernets, networks))
+    lines = [f"{ipmath.format_ipv4(rng.getrandbits(32))}/{rng.randint(8, 30)}" for _ in range(args.rows)]
+    basic_tab = window.ensure_tab(0)
+    basic_tab.radio_batch.setChecked(True)
+    basic_tab.on_batch_calculated(batch.calculate_lines(lines))
+    window.tabs.setCurrentIndex(1)
+    app.processEvents()
+
+    timings = []
+    for _ in range(args.toggles):
+        start = time.perf_counter()
+        window.toggle_theme()
+        app.processEvents()
+        timings.append(time.perf_counter() - start)
+
+    summary = {"median": statistics.median(timings), "min": min(timings), "max": max(timings)}
+    if args.json:
+        print(json.dumps({"toggles": args.toggles, "rows": args.rows, "seconds": summary}, indent=2))
+    else:
+        print(f"主题切换（{args.toggles} 次）: 中位数 {summary['median'] * 1000:.1f} ms，"
+              f"最小 {summary['min'] * 1000:.1f} ms，最大 {summary['max'] * 1000:.1f} ms")
+    window.close()
+
+
+if __name__ == "__main__":
+    main()
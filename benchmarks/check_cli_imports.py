@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令行启动导入检查
+
+在新进程中以 python -X importtime 运行一条简单的命令（默认 subnetmaster.py info 10.0.0.0/8），
+检查启动时没有导入不该导入的重量级模块（NumPy、PyQt5），并输出导入耗时最多的几个顶层模块。
+导入了禁止的模块时退出码为1，适合在CI中使用。
+
+    python benchmarks/check_cli_imports.py
+    python benchmarks/check_cli_imports.py -- supernet prefixes.txt
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 命令行启动时不应导入的模块（只在需要时才延迟导入）
+FORBIDDEN = ("numpy", "PyQt5")
+
+DEFAULT_COMMAND = ["info", "10.0.0.0/8"]
+
+
+def imported_modules(command):
+    """运行命令，返回 {顶层模块名: 累计导入耗时(微秒)}"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", os.path.join(ROOT_DIR, "subnetmaster.py")] + command,
+                          capture_output=True, text=True)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        # 格式: "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # 缩进表示被其他模块导入，只统计顶层导入
+            top = name.strip().split(".")[0]
+            modules[top] = modules.get(top, 0) + int(cumulative)
+        else:
+            modules.setdefault(name.strip().split(".")[0], 0)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查命令行启动时导入的模块")
+    parser.add_argument("command", nargs="*", help="subnetmaster.py 的参数（默认 info 10.0.0.0/8）")
+    parser.add_argument("--top", type=int, default=5, help="输出导入耗时最多的模块数（默认5）")
+    args = parser.parse_args()
+
+    modules = imported_modules(args.command or DEFAULT_COMMAND)
+    for name, micros in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<20}{micros / 1000:8.1f} ms")
+    loaded = [name for name in FORBIDDEN if name in modules]
+    if loaded:
+        print(f"错误: 命令行启动时导入了 {', '.join(loaded)}", file=sys.stderr)
+        return 1
+    print(f"没有导入 {', '.join(FORBIDDEN)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+子网计算器命令行入口
+
+只导入 core 中的计算代码，不导入PyQt5、不需要显示器，适合脚本和CI使用。
+与各标签页使用相同的计算函数；输入来自参数、文件或标准输入，输出为文本、CSV或JSON Lines。
+
+    subnetmaster info 192.168.1.100/24
+    subnetmaster split 10.0.0.0/16 --prefix 24 --format csv
+    subnetmaster supernet prefixes.txt
+    subnetmaster supernet prefixes.txt -o supernets.smps
+    subnetmaster setop advertised.txt ipam.txt --op difference
+    subnetmaster overlap allocations.txt --format csv
+    subnetmaster range firewall_ranges.txt
+    subnetmaster free 10.0.0.0/8 allocations.txt --fit 24
+    subnetmaster lookup table.txt addresses.txt --summary
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import Counter
+from itertools import islice
+
+from core import batch, compact, export, ipmath, lookup, overlap, prefix_io, prefix_set, vlsm
+
+
+OUTPUT_FORMATS = ("text", "csv", "json")
+
+
+class CommandError(Exception):
+    """命令参数或输入有误"""
+
+
+def iter_inputs(paths):
+    """逐行读取输入文件，"-" 或未给出文件时读取标准输入"""
+    for path in paths or ["-"]:
+        if path == "-":
+            for line in sys.stdin:
+                yield line.rstrip("\r\n")
+        else:
+            yield from prefix_io.iter_file_lines(path)
+
+
+def read_networks(paths, line_numbers=False, compact=False):
+    """
+    读取网络列表：文本文件/标准输入逐行解析，单独给出的前缀集文件直接内存映射
+
+    compact 为 True 时解析结果用 CompactNetworks 保存（见 prefix_io.parse_lines）。
+    """
+    if paths and len(paths) == 1 and paths[0] != "-" and prefix_set.is_prefix_set_file(paths[0]):
+        return prefix_io.read_prefix_file(paths[0])
+    if any(path != "-" and prefix_set.is_prefix_set_file(path) for path in paths or []):
+        raise CommandError("前缀集文件只能单独作为输入")
+    return prefix_io.parse_lines(iter_inputs(paths), line_numbers=line_numbers, compact=compact)
+
+
+def wants_prefix_set(args):
+    """--output 的扩展名为前缀集（.smps）时保存为前缀集而不是文本"""
+    return bool(args.output) and args.output.lower().endswith(prefix_set.EXTENSION)
+
+
+def write_output(args, write):
+    """把 write(fp) 的结果写到 --output 指定的文件（原子替换）或标准输出"""
+    if args.output:
+        return export.write_atomic(args.output, write)
+    return write(sys.stdout)
+
+
+def report_invalid(parsed, what="无效项"):
+    """在标准错误中报告无效输入，返回是否有无效输入"""
+    if not parsed.invalid_count:
+        return False
+    print(f"警告: 共有 {parsed.invalid_count} 个{what}，已跳过:\n" + parsed.format_invalid(limit=10),
+          file=sys.stderr)
+    return True
+
+
+def write_records(fp, fmt, fields, records):
+    """把 (字段值, ...) 记录写为CSV（带表头）或JSON Lines"""
+    if fmt == "csv":
+        writer = csv.writer(fp, lineterminator="\n")
+        writer.writerow(fields)
+        writer.writerows(records)
+    else:
+        dumps = json.dumps
+        for record in records:
+            fp.write(dumps(dict(zip(fields, record)), ensure_ascii=False) + "\n")
+
+
+def parse_mask_option(mask):
+    """--mask 选项：对IPv4和IPv6分别解析出的前缀长度 {位数: 前缀长度}"""
+    if mask is None:
+        return {}
+    prefixes = {}
+    for bits in ipmath.FAMILY_BITS:
+        try:
+            prefixes[bits] = ipmath.parse_prefix(mask, bits)
+        except ValueError:
+            pass
+    if not prefixes:
+        raise CommandError(f"无效的掩码: {mask}")
+    return prefixes
+
+
+def parse_network_arg(text, mask):
+    """解析网络参数（允许主机位不为0），mask 为 --mask 选项"""
+    try:
+        return ipmath.parse_network(text, mask, strict=False)
+    except ValueError as e:
+        raise CommandError(str(e)) from None
+
+
+# ---------------------------------------------------------------- info
+
+def cmd_info(args):
+    """基本计算"""
+    defaults = parse_mask_option(args.mask)
+    lines = args.addresses if args.addresses else iter_inputs(args.file)
+    result = batch.calculate_lines(lines, defaults)
+
+    def write(fp):
+        if args.format == "csv":
+            batch.write_batch_csv(fp, result)
+        elif args.format == "json":
+            batch.write_batch_jsonl(fp, result)
+        else:
+            blocks = []
+            for line_no, text, info in result.rows:
+                if info is None:
+                    blocks.append(f"{text}: {result.errors[line_no]}\n")
+                else:
+                    blocks.append("".join(f"{desc}: {val}\n" for desc, val in ipmath.info_items(info)))
+            fp.write("\n".join(blocks))
+
+    write_output(args, write)
+    return 1 if result.invalid_count else 0
+
+
+# ---------------------------------------------------------------- split
+
+def split_prefix(args, prefix, bits):
+    """按 --count / --hosts / --prefix 求划分后的前缀长度"""
+    if args.count is not None:
+        new_prefix = ipmath.prefix_for_count(prefix, args.count)
+        if new_prefix > (bits - 2 if bits == ipmath.IPV4_BITS else bits):
+            raise CommandError("子网划分太细，会导致主机数为0")
+    elif args.hosts is not None:
+        new_prefix = ipmath.prefix_for_hosts(args.hosts, bits)
+        if new_prefix <= prefix:
+            raise CommandError("主机数超出网络容量")
+    else:
+        new_prefix = ipmath.parse_prefix(args.prefix, bits)
+        if new_prefix < prefix:
+            raise CommandError("新前缀长度不能小于网络的前缀长度")
+    return new_prefix
+
+
+def cmd_split(args):
+    """子网划分，按块流式输出完整方案"""
+    network, prefix, bits = parse_network_arg(args.network, args.mask)
+    subnets = ipmath.split(network, prefix, split_prefix(args, prefix, bits), bits)
+    if wants_prefix_set(args):
+        export.export_plan(args.output, subnets, "prefixset")
+        return 0
+    writer = {"text": export.write_plan_text, "csv": export.write_plan_csv,
+              "json": export.write_plan_jsonl}[args.format]
+    write_output(args, lambda fp: writer(fp, subnets))
+    return 0
+
+
+# ---------------------------------------------------------------- vlsm
+
+def cmd_vlsm(args):
+    """VLSM规划"""
+    network, prefix, bits = parse_network_arg(args.network, args.mask)
+    requirements = vlsm.parse_requirements("\n".join(iter_inputs(args.file)))
+    if not requirements:
+        raise CommandError("没有子网需求")
+    plan = vlsm.plan(network, prefix, requirements, bits)
+    subnets = [ipmath.Subnet(a.network, a.prefix, a.bits) for a in plan.allocations]
+    labels = [a.name for a in plan.allocations]
+
+    def write(fp):
+        if args.format == "csv":
+            export.write_plan_csv(fp, subnets, labels=labels)
+        elif args.format == "json":
+            export.write_plan_jsonl(fp, subnets, labels=labels)
+        else:
+            export.write_plan_text(fp, subnets, labels=labels)
+            fp.write("".join(f"空闲: {ipmath.format_network(*sn)}\n" for sn in plan.free))
+
+    write_output(args, write)
+    for req in plan.unallocated:
+        print(f"无法分配: {req.name} ({req.hosts} 台主机)", file=sys.stderr)
+    return 1 if plan.unallocated else 0
+
+
+# ---------------------------------------------------------------- supernet
+
+def cmd_supernet(args):
+    """超网计算：合并网络列表，并统计每个超网包含的原始网络数"""
+    parsed = read_networks(args.file, compact=True)
+    invalid = report_invalid(parsed, "无效网络")
+    supernets = compact.collapse(parsed.networks)
+    if wants_prefix_set(args):
+        export.export_plan(args.output, supernets, "prefixset")
+        return 1 if invalid else 0
+    counts = compact.contained_counts(supernets, parsed.networks)
+
+    def write(fp):
+        if args.format == "text":
+            fp.write("".join(f"{ipmath.format_network(*sn)}\t包含 {count} 个网络\n"
+                             for sn, count in zip(supernets, counts)))
+        else:
+            write_records(fp, args.format, ["network", "contained"],
+                          ((ipmath.format_network(*sn), count) for sn, count in zip(supernets, counts)))
+
+    write_output(args, write)
+    return 1 if invalid else 0
+
+
+# ---------------------------------------------------------------- setop
+
+def cmd_setop(args):
+    """两个网络列表的集合运算，输出最少的CIDR列表"""
+    parsed_a = read_networks([args.a])
+    parsed_b = read_networks([args.b])
+    invalid = report_invalid(parsed_a, "无效网络（集合A）")
+    invalid = report_invalid(parsed_b, "无效网络（集合B）") or invalid
+    result = ipmath.set_operation(parsed_a.networks, parsed_b.networks, args.op)
+    if wants_prefix_set(args):
+        export.export_plan(args.output, result, "prefixset")
+        return 1 if invalid else 0
+
+    def write(fp):
+        if args.format == "text":
+            fp.write("".join(ipmath.format_network(*sn) + "\n" for sn in result))
+        else:
+            write_records(fp, args.format, ["network"], ((ipmath.format_network(*sn),) for sn in result))
+
+    write_output(args, write)
+    return 1 if invalid else 0
+
+
+# ---------------------------------------------------------------- overlap
+
+def cmd_overlap(args):
+    """重叠检测：列出互相重复或包含的网络及其行号，有冲突时退出码为1"""
+    parsed = read_networks(args.file, line_numbers=True)
+    invalid = report_invalid(parsed, "无效网络")
+    report = overlap.find_overlaps(parsed.networks, parsed.line_numbers)
+
+    def write(fp):
+        if args.format == "csv":
+            overlap.write_overlaps_csv(fp, report)
+        elif args.format == "json":
+            overlap.write_overlaps_jsonl(fp, report)
+        else:
+            for start, chunk in export.iter_chunks(report.rows):
+                fp.write("".join("{}\t{}\t{}\t{}\t{}\t{}\n".format(*overlap.overlap_record(report, row))
+                                 for row in chunk))
+
+    write_output(args, write)
+    return 1 if invalid or len(report) else 0
+
+
+# ---------------------------------------------------------------- range
+
+def cmd_range(args):
+    """地址范围转换为最少的CIDR列表（重叠和相邻的范围先合并），按块流式输出"""
+    parsed = prefix_io.parse_range_lines(iter_inputs(args.file))
+    invalid = report_invalid(parsed, "无效的地址范围")
+    cidrs = ipmath.iter_range_cidrs(parsed.ranges)
+    if wants_prefix_set(args):
+        export.export_plan(args.output, list(cidrs), "prefixset")
+        return 1 if invalid else 0
+
+    def write(fp):
+        if args.format == "csv":
+            fp.write("network\n")
+        while True:
+            chunk = list(islice(cidrs, export.CHUNK_SIZE))
+            if not chunk:
+                break
+            if args.format == "json":
+                fp.write("".join(json.dumps({"network": ipmath.format_network(*sn)}) + "\n" for sn in chunk))
+            else:
+                fp.write("".join(ipmath.format_network(*sn) + "\n" for sn in chunk))
+
+    write_output(args, write)
+    return 1 if invalid else 0
+
+
+# ---------------------------------------------------------------- free
+
+def cmd_free(args):
+    """空闲空间：父网络中没有被已分配网络占用的最少CIDR列表（从大到小），或首个可用的 /N"""
+    parent = ipmath.Subnet(*parse_network_arg(args.network, args.mask))
+    parsed = read_networks(args.file)
+    invalid = report_invalid(parsed, "无效网络")
+    blocks = ipmath.free_blocks(parent, parsed.networks)
+    if args.fit is not None:
+        new_prefix = ipmath.parse_prefix(args.fit, parent.bits)
+        sn = ipmath.first_fit(blocks, new_prefix)
+        if sn is None:
+            print(f"{ipmath.format_network(*parent)} 中没有可用的 /{new_prefix}", file=sys.stderr)
+            return 1
+        fields, rows = ["network"], [(ipmath.format_network(*sn),)]
+    elif args.histogram:
+        fields = ["prefix", "count", "addresses"]
+        rows = [(f"/{prefix}", count, count << (parent.bits - prefix))
+                for prefix, count in sorted(Counter(sn.prefix for sn in blocks).items())]
+    else:
+        blocks.sort(key=lambda sn: (sn.prefix, sn.network))
+        if wants_prefix_set(args):
+            export.export_plan(args.output, blocks, "prefixset")
+            return 1 if invalid else 0
+        fields = ["network", "addresses"]
+        rows = ((ipmath.format_network(*sn), 1 << (sn.bits - sn.prefix)) for sn in blocks)
+
+    def write(fp):
+        if args.format == "text":
+            fp.write("".join("\t".join(map(str, row)) + "\n" for row in rows))
+        else:
+            write_records(fp, args.format, fields, rows)
+
+    write_output(args, write)
+    return 1 if invalid else 0
+
+
+# ---------------------------------------------------------------- lookup
+
+def cmd_lookup(args):
+    """地址归属查询（最长前缀匹配）"""
+    table = lookup.read_prefix_table(args.table)
+    report_invalid(table, "无效的前缀")
+    if not table.networks:
+        raise CommandError("前缀表中没有有效的网络")
+    index = lookup.PrefixIndex(table.networks, table.labels)
+    lines = iter_inputs(args.file)
+
+    def write(fp):
+        if args.summary:
+            result = lookup.aggregate(index, lines)
+            if args.format == "text":
+                fp.write("".join(f"{network}\t{label}\t{count}\n" for network, label, count in result.rows()))
+            else:
+                write_records(fp, args.format, ["network", "label", "count"], result.rows())
+            return result
+        if args.format == "csv":
+            return lookup.classify(index, lines, fp)
+        result = lookup.LookupResult(index)
+        names = [ipmath.format_network(*sn) for sn in index.networks] + [""]
+        labels = index.labels + [""]
+        matches = lookup.match_lines(index, lines, result)
+        if args.format == "text":
+            for text, owner in matches:
+                fp.write(f"{text}\t{names[owner]}\t{labels[owner]}\n")
+        else:
+            write_records(fp, "json", ["address", "network", "label"],
+                          ((text, names[owner], labels[owner]) for text, owner in matches))
+        return result
+
+    result = write_output(args, write)
+    return 1 if report_invalid(result, "无效地址") else 0
+
+
+# ---------------------------------------------------------------- main
+
+def build_parser():
+    """命令行参数定义"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--format", "-F", choices=OUTPUT_FORMATS, default="text",
+                        help="输出格式（json 为每行一个对象的 JSON Lines），默认 text")
+    common.add_argument("--output", "-o", metavar="FILE",
+                        help="写入文件而不是标准输出（split/supernet/setop/range/free 写入 .smps 文件时保存为二进制前缀集）")
+
+    parser = argparse.ArgumentParser(prog="subnetmaster", description="子网计算器（命令行版）")
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+    sub.required = True
+
+    p = sub.add_parser("info", parents=[common], help="计算IP地址/网络的基本信息")
+    p.add_argument("addresses", nargs="*", metavar="IP[/MASK]",
+                   help="要计算的地址；未给出时从 --file 或标准输入逐行读取")
+    p.add_argument("--file", "-f", action="append", metavar="FILE", help="从文件读取（可重复，\"-\" 为标准输入）")
+    p.add_argument("--mask", "-m", help="没有掩码的地址使用的掩码（如 24 或 255.255.255.0），默认视为单个主机")
+    p.set_defaults(handler=cmd_info)
+
+    p = sub.add_parser("split", parents=[common], help="子网划分，输出完整方案")
+    p.add_argument("network", metavar="NETWORK[/MASK]")
+    p.add_argument("--mask", "-m", help="网络参数没有掩码时使用的掩码")
+    method = p.add_mutually_exclusive_group(required=True)
+    method.add_argument("--count", "-c", type=int, help="按子网数量划分")
+    method.add_argument("--hosts", "-H", type=int, help="按每个子网的主机数划分")
+    method.add_argument("--prefix", "-p", help="按新前缀长度划分（如 26 或 /64）")
+    p.set_defaults(handler=cmd_split)
+
+    p = sub.add_parser("vlsm", parents=[common], help="VLSM规划")
+    p.add_argument("network", metavar="NETWORK[/MASK]")
+    p.add_argument("file", nargs="*", metavar="FILE",
+                   help="需求文件，每行 \"名称, 主机数[, 个数]\"；未给出时从标准输入读取")
+    p.add_argument("--mask", "-m", help="网络参数没有掩码时使用的掩码")
+    p.set_defaults(handler=cmd_vlsm)
+
+    p = sub.add_parser("supernet", parents=[common], help="超网计算（合并网络列表）")
+    p.add_argument("file", nargs="*", metavar="FILE", help="网络列表文件（或一个前缀集文件）；未给出时从标准输入读取")
+    p.set_defaults(handler=cmd_supernet)
+
+    p = sub.add_parser("setop", parents=[common], help="两个网络列表的集合运算（并集、交集、差集、对称差）")
+    p.add_argument("a", metavar="A", help="集合A的网络列表文件（或前缀集文件），\"-\" 为标准输入")
+    p.add_argument("b", metavar="B", help="集合B的网络列表文件（或前缀集文件）")
+    p.add_argument("--op", choices=list(ipmath.SET_OPERATIONS), default="difference",
+                   help="集合运算（difference 为 A − B），默认 difference")
+    p.set_defaults(handler=cmd_setop)
+
+    p = sub.add_parser("overlap", parents=[common], help="检测网络列表中重复或互相包含的网络")
+    p.add_argument("file", nargs="*", metavar="FILE",
+                   help="网络列表文件（或一个前缀集文件）；未给出时从标准输入读取，多个文件的行号连续计算")
+    p.set_defaults(handler=cmd_overlap)
+
+    p = sub.add_parser("range", parents=[common], help="地址范围转换为最少的CIDR列表")
+    p.add_argument("file", nargs="*", metavar="FILE",
+                   help="范围文件，每行 \"起始地址 - 结束地址\"（也可以是CIDR或单个地址）；未给出时从标准输入读取")
+    p.set_defaults(handler=cmd_range)
+
+    p = sub.add_parser("free", parents=[common], help="查找父网络中的空闲空间（已分配网络的补集）")
+    p.add_argument("network", metavar="NETWORK[/MASK]", help="父网络")
+    p.add_argument("file", nargs="*", metavar="FILE",
+                   help="已分配的网络列表文件（或一个前缀集文件）；未给出时从标准输入读取")
+    p.add_argument("--mask", "-m", help="网络参数没有掩码时使用的掩码")
+    result = p.add_mutually_exclusive_group()
+    result.add_argument("--fit", metavar="N", help="只输出首个（地址最低的）可用的 /N 网络，没有时退出码为1")
+    result.add_argument("--histogram", action="store_true", help="只输出各前缀长度的空闲块数量和地址数")
+    p.set_defaults(handler=cmd_free)
+
+    p = sub.add_parser("lookup", parents=[common], help="按前缀表查询地址归属（最长前缀匹配）")
+    p.add_argument("table", metavar="TABLE", help="前缀表文件，每行 \"网络 [标签]\"；也可以是前缀集文件（没有标签）")
+    p.add_argument("file", nargs="*", metavar="FILE", help="地址文件，每行一个地址；未给出时从标准输入读取")
+    p.add_argument("--summary", "-s", action="store_true", help="只输出每个前缀匹配的地址数")
+    p.set_defaults(handler=cmd_lookup)
+    return parser
+
+
+def main(argv=None):
+    """命令行主函数，返回退出码：0 成功，1 输入中有无效项或出错，2 参数错误"""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # 输出被管道另一端提前关闭（如 | head），不再写入
+        sys.stdout = open(os.devnull, "w")
+        return 0
+    except (CommandError, ValueError, OSError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Core模块初始化文件（纯计算代码，不依赖PyQt5）
+"""
\ No newline at end of file
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量基本计算
+
+一次处理多行 "IP[/掩码]"：每行只计算整数结果（NetworkInfo），
+文本在显示或导出时才按行格式化，所以十万行的计算和内存开销都很小。
+"""
+
+import csv
+import json
+
+from core import export, ipmath
+from core.prefix_io import ParseResult
+from core.progress import PROGRESS_INTERVAL, report
+
+
+# 导出文件的列名（CSV表头 / JSONL字段名）
+BATCH_FIELDS = ["input", "network", "netmask", "broadcast", "first_host", "last_host",
+                "usable_hosts", "category", "error"]
+
+
+class BatchResult(ParseResult):
+    """
+    批量计算结果：rows 与输入的非空行一一对应
+
+    每行为 (行号, 输入文本, NetworkInfo)，无效行的 NetworkInfo 为None，错误信息在 errors 中。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.rows = []
+        self.errors = {}   # {行号: 错误信息}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        return self.rows[i]
+
+
+def calculate_lines(lines, default_prefixes=None, result=None, progress=None, total=0):
+    """
+    逐行计算 "IP[/掩码]" 的基本信息，"#" 之后为注释
+
+    没有掩码的行使用 default_prefixes[位数]（{位数: 前缀长度}），未给出时视为单个主机。
+    返回 BatchResult；传入 result 时在其基础上继续追加。
+    """
+    if result is None:
+        result = BatchResult()
+    defaults = default_prefixes or {}
+    rows = result.rows
+    parse_address = ipmath.parse_address
+    parse_prefix = ipmath.parse_prefix
+    network_info = ipmath.network_info
+    for line_no, line in enumerate(lines, 1):
+        if progress is not None and line_no % PROGRESS_INTERVAL == 0:
+            report(progress, line_no, total)
+        if "#" in line:
+            line = line[:line.index("#")]
+        text = line.strip()
+        if not text:
+            continue
+        addr_text, _, mask = text.partition("/")
+        try:
+            address, bits = parse_address(addr_text)
+            prefix = parse_prefix(mask, bits) if mask else defaults.get(bits, bits)
+            info = network_info(address, prefix, bits)
+        except ValueError as e:
+            result.add_invalid(line_no, text)
+            result.errors[line_no] = str(e)
+            info = None
+        rows.append((line_no, text, info))
+    return result
+
+
+def batch_record(row, errors=None):
+    """一行结果的各字段文本（与 BATCH_FIELDS 对应），无效行只有 input 和 error"""
+    line_no, text, info = row
+    if info is None:
+        error = (errors or {}).get(line_no, "无效的输入")
+        return (text, "", "", "", "", "", "", "", error)
+    bits = info.bits
+
+    def fmt(value):
+        return ipmath.format_address(value, bits)
+
+    if info.usable_hosts is None:
+        first, last, usable = "", "", "0"
+    else:
+        first, last, usable = fmt(info.first_host), fmt(info.last_host), str(info.usable_hosts)
+    return (text, ipmath.format_network(info.network, info.prefix, bits), fmt(info.netmask),
+            fmt(info.broadcast), first, last, usable, info.category, "")
+
+
+def write_batch_csv(fp, result, progress=None):
+    """将批量计算结果写为CSV（带表头），返回写入的行数"""
+    writer = csv.writer(fp, lineterminator="\n")
+    writer.writerow(BATCH_FIELDS)
+    for start, chunk in export.iter_chunks(result.rows, progress):
+        writer.writerows([batch_record(row, result.errors) for row in chunk])
+    return len(result.rows)
+
+
+def write_batch_jsonl(fp, result, progress=None):
+    """将批量计算结果写为JSON Lines（每行一条输入），返回写入的行数"""
+    dumps = json.dumps
+    for start, chunk in export.iter_chunks(result.rows, progress):
+        fp.write("".join(dumps(dict(zip(BATCH_FIELDS, batch_record(row, result.errors))),
+                               ensure_ascii=False) + "\n" for row in chunk))
+    return len(result.rows)
+
+
+def write_batch_text(fp, result, progress=None):
+    """将批量计算结果写为"保存结果"使用的文本格式（IPv6 没有广播地址，写为"最后一个地址"）"""
+    for start, chunk in export.iter_chunks(result.rows, progress):
+        lines = []
+        for row in chunk:
+            text, network, netmask, broadcast, first, last, usable, category, error = \
+                batch_record(row, result.errors)
+            if error:
+                lines.append(f"{text} 错误:{error}\n")
+            else:
+                last_name = "广播" if row[2].bits == ipmath.IPV4_BITS else "最后一个地址"
+                lines.append(f"{text} 网络:{network} 掩码:{netmask} 可用:{first}-{last} "
+                             f"主机数:{usable} {last_name}:{broadcast} 类别:{category}\n")
+        fp.write("".join(lines))
+    return len(result.rows)
+
+
+def export_batch(path, result, fmt="csv", progress=None):
+    """将批量计算结果导出到文件，返回导出的行数"""
+    if fmt not in export.EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    writer = write_batch_csv if fmt == "csv" else write_batch_jsonl
+    return export.write_atomic(path, lambda fp: writer(fp, result, progress))
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+紧凑网络序列与数组上的排序合并
+
+CompactNetworks 把网络地址和前缀长度分别存放在 array 中：只有IPv4时每个网络 5 字节，
+而 Subnet 元组列表中每个网络约 100 字节（元组、地址整数和列表指针）。
+序列按输入顺序保存，下标访问和迭代时才生成 Subnet，可以直接替代 ParseResult.networks 中的列表。
+
+collapse/contained_counts 与 ipmath 中的同名函数结果相同：安装了 NumPy 时，
+IPv4 网络（包括 CompactNetworks 和前缀集中的）直接在数组上排序合并，不再逐个生成 Subnet；
+IPv6 网络、普通列表以及没有 NumPy 时使用 ipmath 的实现。
+NumPy 在第一次合并时才导入：导入本模块（prefix_io 会导入）不影响命令行和程序的启动时间。
+"""
+
+from array import array
+from functools import lru_cache
+
+from core import ipmath, prefix_set
+from core.progress import report
+
+
+_LOW64 = (1 << 64) - 1
+
+
+@lru_cache(maxsize=1)
+def _numpy():
+    """导入并返回 numpy 模块，没有安装时返回 None"""
+    try:
+        import numpy
+    except ImportError:  # 没有 NumPy 时使用 ipmath 的实现
+        return None
+    return numpy
+
+
+class CompactNetworks:
+    """
+    紧凑的网络序列（按输入顺序），append/extend 加入 Subnet
+
+    low 为网络地址（IPv6 为低 64 位），prefixes 为前缀长度。第一次加入IPv6网络之前 low 为 array("I")，
+    之后转换为 array("Q")，并增加 high（IPv6 网络地址的高 64 位，IPv4 为 0）和 v6（是否为IPv6）。
+    """
+
+    def __init__(self, networks=()):
+        self.low = array("I")
+        self.prefixes = array("B")
+        self.high = None
+        self.v6 = None
+        self.extend(networks)
+
+    def _widen(self):
+        """加入第一个IPv6网络之前，扩展为能保存IPv6地址的数组"""
+        count = len(self.prefixes)
+        self.low = array("Q", self.low)
+        self.high = array("Q", bytes(8 * count))
+        self.v6 = array("B", bytes(count))
+
+    def append(self, sn):
+        """加入一个网络"""
+        network, prefix, bits = sn
+        if bits == ipmath.IPV4_BITS:
+            self.low.append(network)
+            if self.high is not None:
+                self.high.append(0)
+                self.v6.append(0)
+        else:
+            if self.high is None:
+                self._widen()
+            self.low.append(network & _LOW64)
+            self.high.append(network >> 64)
+            self.v6.append(1)
+        self.prefixes.append(prefix)
+
+    def extend(self, networks):
+        """加入多个网络"""
+        for sn in networks:
+            self.append(sn)
+
+    def __len__(self):
+        return len(self.prefixes)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(len(self))[key]]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("网络序号超出范围")
+        if self.high is not None and self.v6[key]:
+            return ipmath.Subnet(self.high[key] << 64 | self.low[key], self.prefixes[key], ipmath.IPV6_BITS)
+        return ipmath.Subnet(self.low[key], self.prefixes[key], ipmath.IPV4_BITS)
+
+    def __iter__(self):
+        Subnet = ipmath.Subnet
+        if self.high is None:
+            for network, prefix in zip(self.low, self.prefixes):
+                yield Subnet(network, prefix, ipmath.IPV4_BITS)
+            return
+        for network, high, prefix, v6 in zip(self.low, self.high, self.prefixes, self.v6):
+            if v6:
+                yield Subnet(high << 64 | network, prefix, ipmath.IPV6_BITS)
+            else:
+                yield Subnet(network, prefix, ipmath.IPV4_BITS)
+
+    @property
+    def nbytes(self):
+        """数组占用的字节数"""
+        arrays = [self.low, self.prefixes] + ([self.high, self.v6] if self.high is not None else [])
+        return sum(len(a) * a.itemsize for a in arrays)
+
+
+def _ipv4_arrays(networks):
+    """
+    IPv4 网络的 (网络地址数组, 前缀长度数组, 其余网络)，数组为 NumPy 数组
+
+    只支持 CompactNetworks 和前缀集（其他序列或没有 NumPy 时返回 None）。
+    """
+    np = _numpy()
+    if np is None:
+        return None
+    if isinstance(networks, CompactNetworks):
+        low = np.frombuffer(networks.low, dtype=np.uint32 if networks.high is None else np.uint64)
+        prefixes = np.frombuffer(networks.prefixes, dtype=np.uint8)
+        if networks.high is None:
+            return low, prefixes, []
+        v6 = np.frombuffer(networks.v6, dtype=np.uint8).astype(bool)
+        return low[~v6], prefixes[~v6], [networks[int(i)] for i in np.flatnonzero(v6)]
+    if isinstance(networks, prefix_set.PrefixSet):
+        family = networks.v4
+        return (np.frombuffer(family.networks, dtype=np.uint32), np.frombuffer(family.prefixes, dtype=np.uint8),
+                networks.v6)
+    return None
+
+
+def _bounds(networks, prefixes):
+    """网络地址/前缀长度数组转换为 (起始地址, 结束地址) int64 数组"""
+    np = _numpy()
+    starts = networks.astype(np.int64)
+    return starts, starts + (np.int64(1) << (ipmath.IPV4_BITS - prefixes.astype(np.int64))) - 1
+
+
+def _spans(networks, prefixes):
+    """网络地址/前缀长度数组转换为按起始地址排序的 (起始地址, 结束地址) int64 数组"""
+    starts, ends = _bounds(networks, prefixes)
+    order = _numpy().argsort(starts, kind="stable")
+    return starts[order], ends[order]
+
+
+def merge_ipv4(networks, prefixes):
+    """
+    IPv4 网络合并为有序、互不重叠且互不相邻的地址范围，返回 (起始地址数组, 结束地址数组)
+
+    按起始地址排序后，结束地址的前缀最大值就是到该网络为止已合并范围的结束地址；
+    起始地址超过前一个最大值加一的位置开始新的范围。
+    """
+    np = _numpy()
+    if not len(networks):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    starts, ends = _spans(networks, prefixes)
+    reach = np.maximum.accumulate(ends)
+    breaks = np.flatnonzero(starts[1:] > reach[:-1] + 1)
+    return starts[np.r_[0, breaks + 1]], reach[np.r_[breaks, len(starts) - 1]]
+
+
+def collapse(networks, progress=None):
+    """与 ipmath.collapse 相同：合并为最少的CIDR列表，按地址族和地址排序"""
+    arrays = _ipv4_arrays(networks)
+    if arrays is None:
+        return ipmath.collapse(networks, progress)
+    v4_networks, v4_prefixes, rest = arrays
+    report(progress, 0, len(networks))
+    starts, ends = merge_ipv4(v4_networks, v4_prefixes)
+    result = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        result.extend(ipmath.range_to_cidrs(start, end, ipmath.IPV4_BITS))
+    result.extend(ipmath.collapse(rest))
+    report(progress, len(networks), 0)
+    return result
+
+
+def contained_counts(supernets, networks, progress=None):
+    """
+    与 ipmath.contained_counts 相同：每个超网包含的原始网络数量
+
+    supernets 需按地址族和地址排序且互不重叠（collapse 的结果即满足）。IPv4 网络用二分查找
+    找到起始地址不大于它的最后一个超网，再确认结束地址也在其中。
+    """
+    arrays = _ipv4_arrays(networks)
+    if arrays is None:
+        return ipmath.contained_counts(supernets, networks, progress)
+    np = _numpy()
+    v4_networks, v4_prefixes, rest = arrays
+    report(progress, 0, len(networks))
+    v4_supernets = [sn for sn in supernets if sn.bits == ipmath.IPV4_BITS]
+    other_supernets = supernets[len(v4_supernets):]
+    counts = []
+    if v4_supernets:
+        super_starts = np.array([sn.network for sn in v4_supernets], dtype=np.int64)
+        super_ends = np.array([ipmath.broadcast_of(*sn) for sn in v4_supernets], dtype=np.int64)
+        starts, ends = _bounds(v4_networks, v4_prefixes)
+        owners = np.searchsorted(super_starts, starts, side="right") - 1
+        inside = (owners >= 0) & (ends <= super_ends[np.maximum(owners, 0)])
+        counts = np.bincount(owners[inside], minlength=len(v4_supernets)).tolist()
+    counts += ipmath.contained_counts(other_supernets, rest)
+    report(progress, len(networks), 0)
+    return counts
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+子网划分方案流式导出
+
+按块从惰性子网序列中取出子网、格式化并写入文件，内存占用与方案大小无关。
+"""
+
+import csv
+import json
+import os
+
+from core import ipmath, prefix_set
+from core.progress import report
+
+
+# 每次格式化并写入的子网数量
+CHUNK_SIZE = 8192
+
+# 导出文件的列名（CSV表头 / JSONL字段名）
+PLAN_FIELDS = ["network", "prefix", "first_host", "last_host", "broadcast", "netmask"]
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# 完整方案还可以保存为二进制前缀集（见 core.prefix_set），不含名称
+PLAN_FORMATS = EXPORT_FORMATS + ("prefixset",)
+
+
+def plan_record(network, prefix, bits=ipmath.IPV4_BITS):
+    """一个子网的导出字段，没有可用主机时 first_host/last_host 为None（IPv6的broadcast为最后一个地址）"""
+    fmt = ipmath.format_ipv4 if bits == ipmath.IPV4_BITS else ipmath.format_ipv6
+    hosts = ipmath.usable_range(network, prefix, bits)
+    first, last = (fmt(hosts[0]), fmt(hosts[1])) if hosts else (None, None)
+    return (fmt(network), prefix, first, last,
+            fmt(ipmath.broadcast_of(network, prefix, bits)), fmt(ipmath.prefix_to_netmask(prefix, bits)))
+
+
+def iter_chunks(subnets, progress=None, chunk_size=CHUNK_SIZE):
+    """按块遍历子网序列，产出 (起始序号, 子网块)，每块报告一次进度"""
+    total = ipmath.sequence_length(subnets)
+    for start in range(0, total, chunk_size):
+        report(progress, start, total)
+        yield start, subnets[start:start + chunk_size]
+    report(progress, total, total)
+
+
+def write_plan_csv(fp, subnets, progress=None, labels=None):
+    """
+    将子网方案写为CSV（带表头），返回写入的行数
+
+    labels 为与 subnets 一一对应的名称序列，给出时在最前面增加 name 列。
+    """
+    writer = csv.writer(fp, lineterminator="\n")
+    writer.writerow(["name"] + PLAN_FIELDS if labels is not None else PLAN_FIELDS)
+    for start, chunk in iter_chunks(subnets, progress):
+        rows = [["" if v is None else v for v in plan_record(*sn)] for sn in chunk]
+        if labels is not None:
+            rows = [[label] + row for label, row in zip(labels[start:start + len(rows)], rows)]
+        writer.writerows(rows)
+    return ipmath.sequence_length(subnets)
+
+
+def write_plan_jsonl(fp, subnets, progress=None, labels=None):
+    """将子网方案写为JSON Lines（每行一个子网），返回写入的行数"""
+    dumps = json.dumps
+    for start, chunk in iter_chunks(subnets, progress):
+        records = [dict(zip(PLAN_FIELDS, plan_record(*sn))) for sn in chunk]
+        if labels is not None:
+            records = [dict(name=label, **record)
+                       for label, record in zip(labels[start:start + len(records)], records)]
+        fp.write("".join(dumps(record, ensure_ascii=False) + "\n" for record in records))
+    return ipmath.sequence_length(subnets)
+
+
+def write_plan_text(fp, subnets, progress=None, labels=None):
+    """将子网方案写为"保存结果"使用的文本格式（与界面相同，IPv6 没有广播地址，写为"最后一个地址"）"""
+    last_names = {ipmath.IPV4_BITS: "广播", ipmath.IPV6_BITS: "最后一个地址"}
+    for start, chunk in iter_chunks(subnets, progress):
+        lines = []
+        for i, sn in enumerate(chunk, start):
+            network, first, last, broadcast, netmask = ipmath.subnet_row(*sn)
+            name = f"{labels[i]}: " if labels is not None else ""
+            lines.append(f"{name}{network} 掩码:{netmask} 可用:{first}-{last} {last_names[sn.bits]}:{broadcast}\n")
+        fp.write("".join(lines))
+    return ipmath.sequence_length(subnets)
+
+
+def write_atomic(path, write, binary=False):
+    """
+    以 write(fp) 写入文本文件（binary 为 True 时为二进制文件），返回 write 的返回值
+
+    先写入临时文件，完成后再替换目标文件；取消或出错时删除临时文件。
+    """
+    tmp_path = f"{path}.part"
+    mode = {"mode": "wb"} if binary else {"mode": "w", "encoding": "utf-8", "newline": ""}
+    try:
+        with open(tmp_path, buffering=1 << 20, **mode) as fp:
+            result = write(fp)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return result
+
+
+def export_plan(path, subnets, fmt="csv", progress=None, labels=None):
+    """将完整子网方案导出到文件，返回导出的子网数量"""
+    if fmt not in PLAN_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    if fmt == "prefixset":
+        return write_atomic(path, lambda fp: prefix_set.write_prefix_set(fp, subnets, progress), binary=True)
+    writer = write_plan_csv if fmt == "csv" else write_plan_jsonl
+    return write_atomic(path, lambda fp: writer(fp, subnets, progress, labels))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+希尔伯特曲线利用率图
+
+把父网络的地址按希尔伯特曲线排列到 2^n × 2^n 的方格中：地址相邻的格子在图中也相邻，
+每个CIDR块都落在一个正方形（或两个相邻正方形组成的矩形）内，适合直观地查看分配情况。
+每个格子对应 2^shift 个地址，/8 在 4096×4096 的图中每个格子就是一个地址。
+
+利用率按曲线顺序存为一维 uint8 数组（0 为全部空闲，255 为全部已分配），
+按图中位置排列时只需用缓存的曲线方格做一次索引，重新绘制不需要重新计算。
+需要 NumPy；不依赖PyQt5。
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from core import ipmath
+from core.progress import PROGRESS_INTERVAL, report
+
+
+# 最大阶数：4096 × 4096 个格子
+MAX_ORDER = 12
+
+
+@lru_cache(maxsize=1)
+def curve_grid(order):
+    """
+    order 阶希尔伯特曲线的方格：grid[y, x] 为该格子在曲线上的序号（uint32，只读）
+
+    由 order-1 阶的方格拼成：左下为转置，左上、右上为平移，右下为反转置后平移，
+    每一阶都是整块数组操作，4096 × 4096 的方格约需 0.1 秒。
+    """
+    grid = np.zeros((1, 1), dtype=np.uint32)
+    for k in range(order):
+        half = 1 << k
+        quarter = half * half
+        out = np.empty((2 * half, 2 * half), dtype=np.uint32)
+        out[:half, :half] = grid.T
+        out[half:, :half] = grid + quarter
+        out[half:, half:] = grid + 2 * quarter
+        out[:half, half:] = grid[::-1, ::-1].T + 3 * quarter
+        grid = out
+    grid.setflags(write=False)
+    return grid
+
+
+def map_order(parent, max_order=MAX_ORDER):
+    """父网络的图的阶数：格子数不超过地址数，边长不超过 2^max_order"""
+    return min(max_order, (parent.bits - parent.prefix) // 2)
+
+
+class UtilizationMap:
+    """
+    父网络的利用率图
+
+    levels 为按曲线顺序排列的各格子利用率（uint8，0..255），每个格子对应 2^shift 个地址。
+    """
+
+    def __init__(self, parent, order, levels):
+        self.parent = parent
+        self.order = order
+        self.levels = levels
+        self.shift = parent.bits - parent.prefix - 2 * order
+
+    @property
+    def size(self):
+        """图的边长（格子数）"""
+        return 1 << self.order
+
+    def index_at(self, x, y):
+        """图中 (x, y) 处格子在曲线上的序号"""
+        return int(curve_grid(self.order)[y, x])
+
+    def cell_at(self, x, y):
+        """图中 (x, y) 处格子对应的网络（Subnet）"""
+        network, prefix, bits = self.parent
+        return ipmath.Subnet(network + (self.index_at(x, y) << self.shift), bits - self.shift, bits)
+
+    def utilization_at(self, x, y):
+        """图中 (x, y) 处格子的利用率（0..1）"""
+        return self.levels[self.index_at(x, y)] / 255
+
+    def image_levels(self):
+        """按图中位置排列的利用率（size × size 的 uint8 数组，第 0 行在上）"""
+        return self.levels[curve_grid(self.order)]
+
+
+def utilization_map(parent, free, max_order=MAX_ORDER, progress=None):
+    """
+    根据父网络中的空闲块（ipmath.free_blocks 的结果）计算利用率图
+
+    空闲块互不重叠：不小于一个格子的块覆盖连续的整格，用差分数组标记；
+    小于一个格子的块累加到所在格子的空闲比例中。
+    只要格子中有已分配的地址，利用率就不为 0；只要有空闲地址，就不为 255。
+    """
+    order = map_order(parent, max_order)
+    shift = parent.bits - parent.prefix - 2 * order
+    cells = 1 << (2 * order)
+    base = parent.network
+    starts, stops, partial_cells, partial_sizes = [], [], [], []
+    total = len(free)
+    for i, (network, prefix, bits) in enumerate(free):
+        if i % PROGRESS_INTERVAL == 0:
+            report(progress, i, total)
+        cell = (network - base) >> shift
+        host_bits = bits - prefix
+        if host_bits >= shift:
+            starts.append(cell)
+            stops.append(cell + (1 << (host_bits - shift)))
+        else:
+            partial_cells.append(cell)
+            partial_sizes.append(2.0 ** (host_bits - shift))
+    marks = np.zeros(cells + 1, dtype=np.int8)
+    # 整格的空闲块互不重叠且按地址排序，起止标记不会在同一格子上累加
+    marks[np.array(starts, dtype=np.int64)] += 1
+    marks[np.array(stops, dtype=np.int64)] -= 1
+    free_share = np.cumsum(marks[:-1], dtype=np.int8).astype(np.float32)
+    if partial_cells:
+        np.add.at(free_share, np.array(partial_cells, dtype=np.int64), np.array(partial_sizes, dtype=np.float32))
+    used = 1.0 - free_share
+    levels = np.rint(used * 255).astype(np.uint8)
+    levels[(levels == 0) & (used > 0)] = 1
+    levels[(levels == 255) & (used < 1)] = 254
+    report(progress, total, 0)
+    return UtilizationMap(parent, order, levels)
@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+子网计算引擎
+
+所有计算都基于整数（网络地址整数 + 前缀长度 + 地址位数），不创建 ipaddress 对象，
+也不依赖PyQt5，可在脚本、基准测试和界面中共用。
+IPv4 和 IPv6 共用同一套算法，区别只在地址位数（32 / 128）。
+"""
+
+from collections import namedtuple
+from operator import attrgetter
+
+from core.progress import PROGRESS_INTERVAL, report
+
+
+IPV4_BITS = 32
+IPV4_MAX = (1 << IPV4_BITS) - 1
+IPV6_BITS = 128
+IPV6_MAX = (1 << IPV6_BITS) - 1
+FAMILY_BITS = (IPV4_BITS, IPV6_BITS)
+
+# 子网：网络地址整数 + 前缀长度 + 地址位数（IPv4为32，IPv6为128）
+Subnet = namedtuple("Subnet", ["network", "prefix", "bits"], defaults=(IPV4_BITS,))
+
+# 先按地址族、再按地址排序的键
+family_order = attrgetter("bits", "network", "prefix")
+
+# 基本计算结果
+NetworkInfo = namedtuple("NetworkInfo", [
+    "address",        # 输入的IP地址
+    "network",        # 网络地址
+    "prefix",         # 前缀长度
+    "broadcast",      # 广播地址（IPv6为最后一个地址）
+    "netmask",        # 子网掩码
+    "num_addresses",  # 地址总数
+    "first_host",     # 第一个可用地址（无可用主机时为None）
+    "last_host",      # 最后一个可用地址（无可用主机时为None）
+    "usable_hosts",   # 可用主机数量（无可用主机时为None）
+    "category",       # 网络类别
+    "bits",           # 地址位数
+])
+
+# 网络类别判断表，顺序与原界面的判断顺序一致：私有 > 环回 > 链路本地 > 组播 > 公有
+_CATEGORY_TABLES = {
+    IPV4_BITS: [
+        ("私有网络", [(0x00000000, 8), (0x0A000000, 8), (0x7F000000, 8), (0xA9FE0000, 16),
+                  (0xAC100000, 12), (0xC0000000, 29), (0xC00000AA, 31), (0xC0000200, 24),
+                  (0xC0A80000, 16), (0xC6120000, 15), (0xC6336400, 24), (0xCB007100, 24),
+                  (0xF0000000, 4), (0xFFFFFFFF, 32)]),
+        ("环回", [(0x7F000000, 8)]),
+        ("链路本地", [(0xA9FE0000, 16)]),
+        ("组播", [(0xE0000000, 4)]),
+    ],
+    IPV6_BITS: [
+        ("私有网络", [(1, 128), (0, 128), (0xFFFF << 32, 96), (0x0100 << 112, 64),
+                  (0x2001 << 112, 23), (0x20010002 << 96, 48), (0x20010DB8 << 96, 32),
+                  (0x20010010 << 96, 28), (0xFC00 << 112, 7), (0xFE80 << 112, 10)]),
+        ("环回", [(1, 128)]),
+        ("链路本地", [(0xFE80 << 112, 10)]),
+        ("组播", [(0xFF00 << 112, 8)]),
+    ],
+}
+CATEGORY_PUBLIC = "公有网络"
+
+_DECIMAL_DIGITS = frozenset("0123456789")
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def max_value(bits):
+    """地址位数对应的最大地址"""
+    return IPV4_MAX if bits == IPV4_BITS else IPV6_MAX
+
+
+def prefix_to_netmask(prefix, bits=IPV4_BITS):
+    """前缀长度转换为掩码整数"""
+    top = max_value(bits)
+    return (top << (bits - prefix)) & top
+
+
+def hostmask(prefix, bits=IPV4_BITS):
+    """前缀长度对应的主机位掩码"""
+    return max_value(bits) >> prefix
+
+
+def broadcast_of(network, prefix, bits=IPV4_BITS):
+    """网络的广播地址（最后一个地址）"""
+    return network | hostmask(prefix, bits)
+
+
+def parse_ipv4(text):
+    """解析点分十进制IPv4地址为整数（与 ipaddress 相同，只接受ASCII数字，不接受有前导0的字节）"""
+    octets = text.strip().split(".")
+    if len(octets) != 4:
+        raise ValueError(f"无效的IPv4地址: {text!r}")
+    value = 0
+    for octet in octets:
+        if (not octet or len(octet) > 3 or not _DECIMAL_DIGITS.issuperset(octet)
+                or (octet[0] == "0" and len(octet) > 1)):
+            raise ValueError(f"无效的IPv4地址: {text!r}")
+        n = int(octet)
+        if n > 255:
+            raise ValueError(f"无效的IPv4地址: {text!r}")
+        value = (value << 8) | n
+    return value
+
+
+def format_ipv4(value):
+    """整数格式化为点分十进制IPv4地址"""
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+
+def parse_ipv6(text):
+    """解析IPv6地址为整数，支持 "::" 压缩写法和末尾内嵌的IPv4地址"""
+    text = text.strip()
+    if "::" in text:
+        head, _, tail = text.partition("::")
+        if "::" in tail:
+            raise ValueError(f"无效的IPv6地址: {text!r}")
+        head_groups = head.split(":") if head else []
+        tail_groups = tail.split(":") if tail else []
+    else:
+        head_groups = text.split(":")
+        tail_groups = None
+    last = tail_groups if tail_groups is not None else head_groups
+    if last and "." in last[-1]:
+        v4 = parse_ipv4(last.pop())
+        last += [f"{v4 >> 16:x}", f"{v4 & 0xFFFF:x}"]
+    if tail_groups is None:
+        groups = head_groups
+    else:
+        missing = 8 - len(head_groups) - len(tail_groups)
+        if missing < 1:
+            raise ValueError(f"无效的IPv6地址: {text!r}")
+        groups = head_groups + ["0"] * missing + tail_groups
+    if len(groups) != 8:
+        raise ValueError(f"无效的IPv6地址: {text!r}")
+    value = 0
+    for group in groups:
+        if not 1 <= len(group) <= 4 or not _HEX_DIGITS.issuperset(group):
+            raise ValueError(f"无效的IPv6地址: {text!r}")
+        value = (value << 16) | int(group, 16)
+    return value
+
+
+def format_ipv6(value):
+    """整数格式化为IPv6地址（RFC 5952 压缩写法）"""
+    groups = [(value >> shift) & 0xFFFF for shift in range(112, -1, -16)]
+    # 找到最长的连续0组（至少2组）用 "::" 代替
+    best_start, best_len, run_start = -1, 1, -1
+    for i, group in enumerate(groups + [1]):
+        if group == 0:
+            if run_start < 0:
+                run_start = i
+        elif run_start >= 0:
+            if i - run_start > best_len:
+                best_start, best_len = run_start, i - run_start
+            run_start = -1
+    if best_start < 0:
+        return ":".join(f"{g:x}" for g in groups)
+    head = ":".join(f"{g:x}" for g in groups[:best_start])
+    tail = ":".join(f"{g:x}" for g in groups[best_start + best_len:])
+    return f"{head}::{tail}"
+
+
+def parse_address(text):
+    """解析IPv4或IPv6地址，返回 (整数, 地址位数)"""
+    if ":" in text:
+        return parse_ipv6(text), IPV6_BITS
+    return parse_ipv4(text), IPV4_BITS
+
+
+def format_address(value, bits=IPV4_BITS):
+    """整数格式化为IP地址文本"""
+    return format_ipv4(value) if bits == IPV4_BITS else format_ipv6(value)
+
+
+def format_binary(value, bits=IPV4_BITS):
+    """整数格式化为二进制（IPv4每8位用"."分隔，IPv6每16位用":"分隔）"""
+    if bits == IPV4_BITS:
+        return ".".join(f"{(value >> shift) & 255:08b}" for shift in (24, 16, 8, 0))
+    return ":".join(f"{(value >> shift) & 0xFFFF:016b}" for shift in range(112, -1, -16))
+
+
+def netmask_to_prefix(mask):
+    """掩码整数转换为前缀长度，掩码不连续时抛出ValueError"""
+    prefix = IPV4_BITS - (~mask & IPV4_MAX).bit_length()
+    if prefix_to_netmask(prefix) != mask:
+        raise ValueError(f"无效的子网掩码: {format_ipv4(mask)}")
+    return prefix
+
+
+def parse_prefix(text, bits=IPV4_BITS):
+    """解析掩码文本，支持 "24"、"/24" 和 "255.255.255.0"（仅IPv4）三种写法"""
+    text = text.strip().lstrip("/")
+    if "." in text:
+        if bits != IPV4_BITS:
+            raise ValueError("IPv6 不支持点分十进制掩码，请使用前缀长度")
+        return netmask_to_prefix(parse_ipv4(text))
+    if not text or not _DECIMAL_DIGITS.issuperset(text) or int(text) > bits:
+        raise ValueError(f"无效的前缀长度: {text!r}")
+    return int(text)
+
+
+def parse_network(text, mask=None, strict=True):
+    """
+    解析网络文本为 Subnet
+
+    text 可以带 "/前缀" 或 "/掩码"；未带时使用 mask，都没有时视为 /32。
+    strict 为 True 时主机位不为0会抛出ValueError。
+    """
+    text = text.strip()
+    if "/" in text:
+        addr_text, mask = text.split("/", 1)
+    else:
+        addr_text = text
+    address, bits = parse_address(addr_text)
+    prefix = bits if mask is None else parse_prefix(mask, bits)
+    network = address & prefix_to_netmask(prefix, bits)
+    if strict and network != address:
+        raise ValueError(f"{text} 的主机位不为0")
+    return Subnet(network, prefix, bits)
+
+
+def parse_range(text):
+    """
+    解析地址范围文本，返回 (起始地址, 结束地址, 地址位数)
+
+    text 可以是 "起始地址 - 结束地址"、CIDR网络或单个地址。
+    """
+    text = text.strip()
+    if "/" in text:
+        network, prefix, bits = parse_network(text)
+        return network, broadcast_of(network, prefix, bits), bits
+    start_text, sep, end_text = text.partition("-")
+    start, bits = parse_address(start_text.strip())
+    if not sep:
+        return start, start, bits
+    end, end_bits = parse_address(end_text.strip())
+    if end_bits != bits:
+        raise ValueError(f"{text} 的起始地址和结束地址不是同一类地址")
+    if end < start:
+        raise ValueError(f"{text} 的起始地址大于结束地址")
+    return start, end, bits
+
+
+def format_network(network, prefix, bits=IPV4_BITS):
+    """格式化为 "网络地址/前缀" 形式"""
+    return f"{format_address(network, bits)}/{prefix}"
+
+
+def usable_range(network, prefix, bits=IPV4_BITS):
+    """
+    可用主机范围 (第一个, 最后一个)
+
+    IPv4 不含网络地址和广播地址，/31 和 /32 没有可用主机时返回None；
+    IPv6 没有广播地址，只排除子网路由器任播地址（即网络地址），/127 和 /128 全部可用。
+    """
+    last = broadcast_of(network, prefix, bits)
+    if bits == IPV4_BITS:
+        if prefix > IPV4_BITS - 2:
+            return None
+        return network + 1, last - 1
+    if prefix >= IPV6_BITS - 1:
+        return network, last
+    return network + 1, last
+
+
+# 预先算好掩码的类别判断表：{位数: [(类别, [(起始地址, 前缀长度, 掩码), ...]), ...]}
+_CATEGORY_MASKS = {
+    bits: [(label, [(start, plen, prefix_to_netmask(plen, bits)) for start, plen in ranges])
+           for label, ranges in table]
+    for bits, table in _CATEGORY_TABLES.items()
+}
+
+
+def classify(network, prefix, bits=IPV4_BITS):
+    """判断网络类别（网络地址和广播地址都在同一保留范围内才算，即网络不比保留范围大且网络地址在范围内）"""
+    for label, ranges in _CATEGORY_MASKS[bits]:
+        for start, plen, mask in ranges:
+            if prefix >= plen and network & mask == start:
+                return label
+    return CATEGORY_PUBLIC
+
+
+def network_info(address, prefix, bits=IPV4_BITS):
+    """计算IP地址/前缀的基本信息"""
+    netmask = prefix_to_netmask(prefix, bits)
+    network = address & netmask
+    broadcast = network | hostmask(prefix, bits)
+    hosts = usable_range(network, prefix, bits)
+    first, last = hosts if hosts else (None, None)
+    return NetworkInfo(address=address, network=network, prefix=prefix,
+                       broadcast=broadcast, netmask=netmask,
+                       num_addresses=1 << (bits - prefix),
+                       first_host=first, last_host=last,
+                       usable_hosts=(last - first + 1) if hosts else None,
+                       category=classify(network, prefix, bits), bits=bits)
+
+
+def info_items(info):
+    """基本计算结果的各项 (说明, 值)，与"基本计算"标签页显示的内容一致"""
+    bits = info.bits
+    ipv4 = bits == IPV4_BITS
+
+    def fmt(value):
+        return format_address(value, bits)
+
+    items = [
+        ("IP地址/网络", format_network(info.network, info.prefix, bits)),
+        ("网络地址", fmt(info.network)),
+        ("广播地址" if ipv4 else "最后一个地址", fmt(info.broadcast)),
+        ("子网掩码 (CIDR)", f"/{info.prefix}"),
+        ("子网掩码 (点分十进制)" if ipv4 else "子网掩码", fmt(info.netmask)),
+        ("地址总数", str(info.num_addresses))
+    ]
+    if info.usable_hosts is not None:
+        items += [("可用主机范围", f"{fmt(info.first_host)} - {fmt(info.last_host)}"),
+                  ("可用主机数量", str(info.usable_hosts))]
+    else:
+        items.append(("可用主机范围", "N/A"))
+    items.append(("网络类别", info.category))
+    items.append(("IP地址 (二进制)", format_binary(info.network, bits)))
+    items.append(("子网掩码 (二进制)", format_binary(info.netmask, bits)))
+    return items
+
+
+def prefix_for_count(prefix, count):
+    """划分出至少 count 个子网所需的新前缀长度"""
+    if count <= 0:
+        raise ValueError("子网数量必须大于0")
+    return prefix + (count - 1).bit_length()
+
+
+def prefix_for_hosts(hosts, bits=IPV4_BITS):
+    """容纳 hosts 台主机所需的前缀长度（IPv4另需网络和广播地址，IPv6另需任播地址）"""
+    if hosts <= 0:
+        raise ValueError("主机数量必须大于0")
+    reserved = 2 if bits == IPV4_BITS else 1
+    return bits - (hosts + reserved - 1).bit_length()
+
+
+class SubnetSequence:
+    """
+    惰性子网序列
+
+    第 i 个子网直接由 start + i * step 算出，不预先生成列表，
+    所以无论划分出多少子网，创建、len()、下标访问和切片都是 O(1)，内存固定。
+    """
+
+    __slots__ = ("start", "step", "count", "prefix", "bits")
+
+    def __init__(self, start, step, count, prefix, bits=IPV4_BITS):
+        self.start = start
+        self.step = step
+        self.count = count
+        self.prefix = prefix
+        self.bits = bits
+
+    def __len__(self):
+        # IPv6 的子网数量可能超过 len() 的上限（2**63），此时请使用 count 属性
+        return self.count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            r = range(self.count)[key]
+            count = max(0, (r.stop - r.start + r.step - (1 if r.step > 0 else -1)) // r.step)
+            return SubnetSequence(self.start + r.start * self.step, self.step * r.step,
+                                  count, self.prefix, self.bits)
+        if key < 0:
+            key += self.count
+        if not 0 <= key < self.count:
+            raise IndexError("子网序号超出范围")
+        return Subnet(self.start + key * self.step, self.prefix, self.bits)
+
+    def __iter__(self):
+        prefix, bits = self.prefix, self.bits
+        for network in range(self.start, self.start + self.count * self.step, self.step or 1):
+            yield Subnet(network, prefix, bits)
+
+    def __repr__(self):
+        return (f"SubnetSequence(start={self.start}, step={self.step}, count={self.count}, "
+                f"prefix={self.prefix}, bits={self.bits})")
+
+
+def sequence_length(seq):
+    """序列长度；SubnetSequence 直接取 count，不受 len() 上限限制"""
+    return seq.count if isinstance(seq, SubnetSequence) else len(seq)
+
+
+def split(network, prefix, new_prefix, bits=IPV4_BITS):
+    """将网络等分为前缀长度为 new_prefix 的惰性子网序列"""
+    if not prefix <= new_prefix <= bits:
+        raise ValueError(f"新前缀 /{new_prefix} 必须在 /{prefix} 到 /{bits} 之间")
+    return SubnetSequence(network & prefix_to_netmask(prefix, bits), 1 << (bits - new_prefix),
+                          1 << (new_prefix - prefix), new_prefix, bits)
+
+
+def subnet_row(network, prefix, bits=IPV4_BITS):
+    """子网划分结果的一行：网络地址、第一个可用IP、最后一个可用IP、广播地址、子网掩码"""
+    fmt = format_ipv4 if bits == IPV4_BITS else format_ipv6
+    hosts = usable_range(network, prefix, bits)
+    first, last = (fmt(hosts[0]), fmt(hosts[1])) if hosts else ("N/A", "N/A")
+    return (fmt(network), first, last,
+            fmt(broadcast_of(network, prefix, bits)), fmt(prefix_to_netmask(prefix, bits)))
+
+
+def range_to_cidrs(start, end, bits=IPV4_BITS):
+    """
+    将地址范围 [start, end] 转换为最少的CIDR列表
+
+    每个块的大小直接由起始地址的对齐程度和剩余长度算出，一个范围最多产生 2 × 地址位数 个块，
+    与范围包含的地址数无关。
+    """
+    result = []
+    while start <= end:
+        # 起始地址的对齐程度和剩余长度共同决定本次能取的最大块
+        size_bits = (start & -start).bit_length() - 1 if start else bits
+        size_bits = min(size_bits, (end - start + 1).bit_length() - 1)
+        result.append(Subnet(start, bits - size_bits, bits))
+        start += 1 << size_bits
+    return result
+
+
+def merge_ranges(networks, progress=None):
+    """
+    将同一地址族的子网列表合并为按起始地址排序、互不重叠且不相邻的地址范围列表
+
+    networks 带 presorted 属性（如内存映射的前缀集）时已排序，直接扫描而不复制排序。
+    """
+    ranges = []
+    ordered = networks if getattr(networks, "presorted", False) else sorted(networks)
+    total = len(ordered)
+    for i, (network, prefix, bits) in enumerate(ordered):
+        if i % PROGRESS_INTERVAL == 0:
+            report(progress, i, total)
+        end = broadcast_of(network, prefix, bits)
+        if ranges and network <= ranges[-1][1] + 1:
+            if end > ranges[-1][1]:
+                ranges[-1][1] = end
+        else:
+            ranges.append([network, end])
+    return ranges
+
+
+def merge_intervals(intervals, progress=None):
+    """将同一地址族的地址范围 [(起始, 结束), ...] 合并为有序、互不重叠且不相邻的范围列表"""
+    ranges = []
+    ordered = sorted(intervals)
+    total = len(ordered)
+    for i, (start, end) in enumerate(ordered):
+        if i % PROGRESS_INTERVAL == 0:
+            report(progress, i, total)
+        if ranges and start <= ranges[-1][1] + 1:
+            if end > ranges[-1][1]:
+                ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return ranges
+
+
+def iter_range_cidrs(ranges, progress=None):
+    """
+    将地址范围列表 [(起始, 结束, 位数), ...] 转换为最少的CIDR，逐个产出（IPv4在前）
+
+    重叠或相邻的范围先合并，所以结果与合并后的地址集合对应，且没有可以再合并的网络。
+    """
+    families = {bits: [] for bits in FAMILY_BITS}
+    for start, end, bits in ranges:
+        families[bits].append((start, end))
+    for bits in FAMILY_BITS:
+        for start, end in merge_intervals(families[bits], progress):
+            yield from range_to_cidrs(start, end, bits)
+
+
+def split_families(networks):
+    """按地址族拆分子网列表，返回 [(地址位数, 子网列表), ...]，IPv4在前，省略空列表"""
+    if hasattr(networks, "families"):
+        return networks.families()  # 前缀集按地址族分开保存，不需要复制
+    families = {bits: [] for bits in FAMILY_BITS}
+    for sn in networks:
+        families[sn.bits].append(sn)
+    return [(bits, families[bits]) for bits in FAMILY_BITS if families[bits]]
+
+
+def collapse(networks, progress=None):
+    """
+    将子网列表合并为最少的超网列表（同一地址族内与 ipaddress.collapse_addresses 结果一致）
+
+    IPv4 和 IPv6 分别合并，结果中IPv4在前。
+    """
+    result = []
+    for bits, family in split_families(networks):
+        for start, end in merge_ranges(family, progress):
+            result.extend(range_to_cidrs(start, end, bits))
+    return result
+
+
+# 集合运算：名称 -> 判断地址是否属于结果的函数 (是否在A中, 是否在B中) -> bool
+SET_OPERATIONS = {
+    "union": lambda in_a, in_b: in_a or in_b,
+    "intersection": lambda in_a, in_b: in_a and in_b,
+    "difference": lambda in_a, in_b: in_a and not in_b,
+    "symmetric_difference": lambda in_a, in_b: in_a != in_b,
+}
+
+
+def _range_bounds(ranges, which):
+    """
+    地址范围列表的边界点：每个范围在起始地址进入、结束地址的下一个地址离开
+
+    边界点编码为 地址 * 2 + 所属集合（A为0，B为1），整数列表排序和比较都比元组快。
+    """
+    bounds = []
+    for start, end in ranges:
+        bounds.append(start << 1 | which)
+        bounds.append((end + 1) << 1 | which)
+    return bounds
+
+
+def sweep_ranges(ranges_a, ranges_b, keep):
+    """
+    对两个已排序、互不重叠且不相邻的地址范围列表做集合运算，返回同样形式的结果范围列表
+
+    按地址顺序扫描两个列表的边界点，每个边界点处更新"是否在A中/B中"，
+    keep(是否在A中, 是否在B中) 的值改变时开始或结束一个结果范围。
+    两个边界点列表各自有序，合并排序只需线性时间，扫描为 O(|A| + |B|)。
+    """
+    bounds = _range_bounds(ranges_a, 0) + _range_bounds(ranges_b, 1)
+    bounds.sort()
+    result = []
+    in_a = in_b = False
+    start = None
+    last = len(bounds) - 1
+    for i, bound in enumerate(bounds):
+        if bound & 1:
+            in_b = not in_b
+        else:
+            in_a = not in_a
+        address = bound >> 1
+        # 同一地址上A和B的边界点都处理完后再判断
+        if i < last and bounds[i + 1] >> 1 == address:
+            continue
+        inside = keep(in_a, in_b)
+        if inside and start is None:
+            start = address
+        elif not inside and start is not None:
+            result.append((start, address - 1))
+            start = None
+    return result
+
+
+def set_operation(networks_a, networks_b, operation, progress=None):
+    """
+    两个网络列表的集合运算（union / intersection / difference / symmetric_difference），返回最少的CIDR列表
+
+    每个地址族内先把两个列表各自合并为有序的地址范围（排序为 O(n log n)），
+    再对两组范围做一次边界扫描，而不是对每一对网络调用 address_exclude。结果中IPv4在前。
+    """
+    keep = SET_OPERATIONS[operation]
+    families_a = dict(split_families(networks_a))
+    families_b = dict(split_families(networks_b))
+    result = []
+    for bits in FAMILY_BITS:
+        ranges_a = merge_ranges(families_a.get(bits, ()), progress)
+        ranges_b = merge_ranges(families_b.get(bits, ()), progress)
+        for start, end in sweep_ranges(ranges_a, ranges_b, keep):
+            result.extend(range_to_cidrs(start, end, bits))
+    return result
+
+
+def free_blocks(parent, networks, progress=None):
+    """
+    父网络中没有被 networks 占用的地址，返回按地址排序的最少CIDR列表
+
+    已分配的网络合并为有序的地址范围后扫描一次，范围之间（以及两端）的空隙转换为CIDR；
+    与父网络不同地址族或在父网络之外的部分不影响结果。
+    """
+    network, prefix, bits = parent
+    cursor, end = network, broadcast_of(network, prefix, bits)
+    family = dict(split_families(networks)).get(bits, ())
+    free = []
+    for start, stop in merge_ranges(family, progress):
+        if stop < cursor:
+            continue
+        if start > end:
+            break
+        if start > cursor:
+            free.extend(range_to_cidrs(cursor, start - 1, bits))
+        cursor = stop + 1
+    if cursor <= end:
+        free.extend(range_to_cidrs(cursor, end, bits))
+    return free
+
+
+def first_fit(blocks, new_prefix):
+    """
+    按地址排序的空闲块中第一个能放下 /new_prefix 的位置，没有时返回 None
+
+    空闲块是最少CIDR分解得到的最大对齐块，任何对齐的 /new_prefix 都完整地落在其中一块内，
+    所以第一个前缀长度不超过 new_prefix 的块的起始地址就是最低的可用位置。
+    """
+    for network, prefix, bits in blocks:
+        if prefix <= new_prefix:
+            return Subnet(network, new_prefix, bits)
+    return None
+
+
+def subnet_of(inner, outer):
+    """判断 inner 是否包含于 outer（两者均为 Subnet）"""
+    return (inner.bits == outer.bits and inner.prefix >= outer.prefix
+            and inner.network & prefix_to_netmask(outer.prefix, outer.bits) == outer.network)
+
+
+def contained_counts(supernets, networks, progress=None, members=False):
+    """
+    统计每个超网包含的原始网络数量
+
+    supernets 需按地址族和地址排序且互不重叠（collapse 的结果即满足），networks 顺序任意
+    （带 presorted 属性时视为已按 family_order 排序）。
+    排序后对两个列表做一次扫描，复杂度为 O(n log n + m)，而不是逐对判断的 O(n × m)。
+    members 为 True 时返回 (数量列表, 成员列表)，成员列表中是各超网包含的原始网络。
+    """
+    counts = [0] * len(supernets)
+    member_lists = [[] for _ in supernets] if members else None
+    ordered = networks if getattr(networks, "presorted", False) else sorted(networks, key=family_order)
+    total = len(ordered)
+    j = 0
+    for i, sn in enumerate(ordered):
+        if i % PROGRESS_INTERVAL == 0:
+            report(progress, i, total)
+        # 跳过结束地址在当前网络之前的超网
+        while j < len(supernets) and (supernets[j].bits < sn.bits or (
+                supernets[j].bits == sn.bits and broadcast_of(*supernets[j]) < sn.network)):
+            j += 1
+        if j == len(supernets):
+            break
+        outer = supernets[j]
+        if (outer.bits == sn.bits and outer.network <= sn.network
+                and broadcast_of(*sn) <= broadcast_of(*outer)):
+            counts[j] += 1
+            if members:
+                member_lists[j].append(sn)
+    return (counts, member_lists) if members else counts
\ No newline at end of file
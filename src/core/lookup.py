@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+最长前缀匹配（地址归属查询）
+
+前缀表中的网络只会互相包含、不会部分重叠，所以可以展开为互不重叠的有序区间：
+每个区间记录覆盖它的最具体（最长）前缀。查询一个地址只需在区间起点上二分查找，
+与前缀数量无关地保持 O(log n)；索引只有两个平行列表，内存占用固定。
+
+地址文件按块流式读取，逐条结果按块写出，内存占用与文件大小无关。
+"""
+
+import csv
+import io
+import re
+import socket
+from bisect import bisect_right
+from itertools import islice
+
+from core import export, ipmath, prefix_io, prefix_set
+from core.progress import PROGRESS_INTERVAL, report
+
+
+# 逐条查询时每次处理并写出的地址数量
+CHUNK_SIZE = 8192
+
+# 没有匹配前缀的地址在汇总结果中的名称
+UNMATCHED_LABEL = "未匹配"
+
+# 前缀表一行中网络与标签之间的分隔符（逗号、空格或制表符）
+_LABEL_SEPARATOR = re.compile(r"[\s,]+")
+
+_AF_FAMILY = ((socket.AF_INET, ipmath.IPV4_BITS), (socket.AF_INET6, ipmath.IPV6_BITS))
+
+
+def parse_address(text):
+    """
+    解析单个IPv4/IPv6地址，返回 (整数值, 位数)
+
+    与 ipmath.parse_address 结果相同，但使用系统的 inet_pton，适合大批量查询。
+    """
+    family, bits = _AF_FAMILY[":" in text]
+    try:
+        return int.from_bytes(socket.inet_pton(family, text), "big"), bits
+    except (OSError, ValueError):
+        raise ValueError(f"无效的IP地址: {text}") from None
+
+
+class PrefixIndex:
+    """
+    前缀表的最长前缀匹配索引
+
+    networks 为 Subnet 列表，labels 为一一对应的标签（可选）；
+    查询结果是前缀在 networks 中的下标，没有匹配时为 -1。
+    同一个前缀出现多次时以第一次出现的为准。
+    """
+
+    def __init__(self, networks, labels=None):
+        self.networks = list(networks)
+        self.labels = list(labels) if labels is not None else [""] * len(self.networks)
+        # 每个地址族：(区间起点列表, 区间所属前缀下标列表)
+        self.tables = {}
+        order = sorted(range(len(self.networks)),
+                       key=lambda i: (self.networks[i].bits, self.networks[i].network,
+                                      self.networks[i].prefix, -i))
+        for bits in (ipmath.IPV4_BITS, ipmath.IPV6_BITS):
+            family = [i for i in order if self.networks[i].bits == bits]
+            if family:
+                self.tables[bits] = self._flatten(family)
+
+    def __len__(self):
+        return len(self.networks)
+
+    def _flatten(self, order):
+        """把（已按起点、前缀长度排序的）嵌套前缀展开为互不重叠的区间"""
+        starts = []
+        owners = []
+
+        def emit(start, owner):
+            # 同一起点上后出现的（更具体的）前缀覆盖之前的
+            if starts and starts[-1] == start:
+                owners[-1] = owner
+            else:
+                starts.append(start)
+                owners.append(owner)
+
+        stack = []   # [(结束地址, 前缀下标)]，外层在下
+        for idx in order:
+            network, prefix, bits = self.networks[idx]
+            while stack and stack[-1][0] < network:
+                end, _ = stack.pop()
+                emit(end + 1, stack[-1][1] if stack else -1)
+            emit(network, idx)
+            stack.append((ipmath.broadcast_of(network, prefix, bits), idx))
+        while stack:
+            end, _ = stack.pop()
+            emit(end + 1, stack[-1][1] if stack else -1)
+        return starts, owners
+
+    def lookup(self, value, bits=ipmath.IPV4_BITS):
+        """查询地址 value 的最长匹配前缀下标，没有匹配时返回 -1"""
+        table = self.tables.get(bits)
+        if table is None:
+            return -1
+        i = bisect_right(table[0], value) - 1
+        return table[1][i] if i >= 0 else -1
+
+    def lookup_text(self, text):
+        """查询地址文本的最长匹配前缀下标，地址无效时抛出ValueError"""
+        return self.lookup(*parse_address(text))
+
+
+class LookupResult(prefix_io.ParseResult):
+    """
+    批量查询的统计结果：每个前缀匹配的地址数 + 未匹配数 + 无效地址报告
+
+    networks/labels 与查询使用的前缀表一致。
+    """
+
+    def __init__(self, index):
+        super().__init__()
+        self.networks = index.networks
+        self.labels = index.labels
+        self.counts = [0] * len(index)
+        self.unmatched = 0
+        self.total = 0   # 查询的有效地址数
+
+    def set_counts(self, counts):
+        """设置统计结果，counts 最后一项为未匹配的地址数"""
+        self.counts = counts[:-1]
+        self.unmatched = counts[-1]
+        self.total = sum(counts)
+
+    def rows(self):
+        """汇总结果的各行 (网络, 标签, 地址数)，最后一行为未匹配的地址数"""
+        rows = [(ipmath.format_network(*sn), label, count)
+                for sn, label, count in zip(self.networks, self.labels, self.counts)]
+        rows.append((UNMATCHED_LABEL, "", self.unmatched))
+        return rows
+
+
+def parse_prefix_table(lines, progress=None, total=0):
+    """
+    解析前缀表，每行 "网络 [标签]"（逗号、空格或制表符分隔），"#" 之后为注释
+
+    返回 ParseResult，labels 属性为与 networks 一一对应的标签。
+    """
+    result = prefix_io.ParseResult()
+    result.labels = labels = []
+    networks = result.networks
+    for line_no, line in enumerate(lines, 1):
+        if progress is not None and line_no % PROGRESS_INTERVAL == 0:
+            report(progress, line_no, total)
+        if "#" in line:
+            line = line[:line.index("#")]
+        line = line.strip()
+        if not line:
+            continue
+        fields = _LABEL_SEPARATOR.split(line, 1)
+        try:
+            networks.append(ipmath.parse_network(fields[0]))
+        except ValueError:
+            result.add_invalid(line_no, line)
+            continue
+        labels.append(fields[1].strip() if len(fields) > 1 else "")
+    return result
+
+
+def read_prefix_table(path, progress=None):
+    """
+    流式读取并解析前缀表文件（前缀集文件中的前缀没有标签）
+
+    前缀表总要复制到 PrefixIndex 中，前缀集读成列表后立即关闭文件映射。
+    """
+    if prefix_set.is_prefix_set_file(path):
+        result = prefix_io.read_prefix_file(path, progress)
+        with result.networks as networks:
+            result.networks = list(networks)
+        result.labels = [""] * len(result.networks)
+        return result
+    return parse_prefix_table(prefix_io.iter_file_lines(path, progress))
+
+
+def match_lines(index, lines, result, progress=None, total=0):
+    """
+    逐行查询地址，产出 (地址文本, 前缀下标)，没有匹配时下标为 -1
+
+    跳过空行和 "#" 开头的注释行，无效地址记入 result 的无效项报告。
+    progress/total 按行数报告进度（从文件读取时由 iter_file_lines 按字节报告，不必再传）。
+    这是批量查询的热点循环，解析和二分查找都直接内联在这里。
+    """
+    empty = ([], [])
+    v4_starts, v4_owners = index.tables.get(ipmath.IPV4_BITS, empty)
+    v6_starts, v6_owners = index.tables.get(ipmath.IPV6_BITS, empty)
+    pton = socket.inet_pton
+    from_bytes = int.from_bytes
+    af_inet, af_inet6 = socket.AF_INET, socket.AF_INET6
+    for line_no, line in enumerate(lines, 1):
+        if progress is not None and line_no % PROGRESS_INTERVAL == 0:
+            report(progress, line_no, total)
+        text = line.strip()
+        if not text or text[0] == "#":
+            continue
+        try:
+            if ":" in text:
+                i = bisect_right(v6_starts, from_bytes(pton(af_inet6, text), "big")) - 1
+                owner = v6_owners[i] if i >= 0 else -1
+            else:
+                i = bisect_right(v4_starts, from_bytes(pton(af_inet, text), "big")) - 1
+                owner = v4_owners[i] if i >= 0 else -1
+        except (OSError, ValueError):
+            result.add_invalid(line_no, text)
+            continue
+        yield text, owner
+
+
+def aggregate(index, lines, progress=None, total=0):
+    """统计每个前缀匹配的地址数量，返回 LookupResult"""
+    result = LookupResult(index)
+    # 最后一项统计未匹配的地址（下标 -1）
+    counts = result.counts + [0]
+    for _, owner in match_lines(index, lines, result, progress, total):
+        counts[owner] += 1
+    result.set_counts(counts)
+    return result
+
+
+def classify(index, lines, fp, progress=None, total=0):
+    """
+    逐条查询地址并按块写出CSV（address, network, label），返回 LookupResult
+
+    没有匹配前缀的地址 network/label 为空；无效地址不写出，只记入报告。
+    """
+    result = LookupResult(index)
+    counts = result.counts + [0]
+    # 已校验的地址不需要转义，只有网络和标签两列需要按CSV规则转义；每个前缀只格式化一次
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    for sn, label in zip(index.networks, index.labels):
+        writer.writerow(["", ipmath.format_network(*sn), label])
+    suffixes = buf.getvalue().splitlines(keepends=True) + [",,\n"]
+    fp.write("address,network,label\n")
+    matches = match_lines(index, lines, result, progress, total)
+    while True:
+        chunk = list(islice(matches, CHUNK_SIZE))
+        if not chunk:
+            break
+        for _, owner in chunk:
+            counts[owner] += 1
+        fp.write("".join([text + suffixes[owner] for text, owner in chunk]))
+    result.set_counts(counts)
+    return result
+
+
+def classify_file(index, in_path, out_path, progress=None):
+    """流式查询地址文件并把逐条结果写入CSV文件，返回 LookupResult"""
+    return export.write_atomic(
+        out_path, lambda fp: classify(index, prefix_io.iter_file_lines(in_path, progress), fp))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+网络重叠（冲突）检测
+
+CIDR 网络之间只有"相同"和"包含"两种重叠，不会部分重叠。按 (地址族, 网络地址, 前缀长度) 排序后，
+包含当前网络的网络一定在它之前，并且还没有结束，所以用一个栈记录尚未结束的网络，
+一次扫描就能找出每个网络的直接上级（包含它的最小网络）或与它相同的网络，复杂度为 O(n log n)。
+
+每个有冲突的网络输出一行，而不是列出所有两两组合：
+    duplicate    与之前出现的相同网络重复（指向第一次出现的位置）
+    contained    被另一个网络包含（指向包含它的最小网络）
+互相重叠的网络属于同一组，组号按最外层网络的地址顺序编号。
+"""
+
+import csv
+import json
+from collections import namedtuple
+
+from core import export, ipmath
+from core.progress import PROGRESS_INTERVAL, report
+
+
+# 导出文件的列名（CSV表头 / JSONL字段名）
+OVERLAP_FIELDS = ["group", "kind", "network", "line", "conflicts_with", "conflicts_with_line"]
+
+# 冲突类型及显示名称
+KINDS = {
+    "duplicate": "重复",
+    "contained": "包含于",
+}
+
+# 一个冲突：组号、类型、网络下标、与之冲突的网络下标
+Overlap = namedtuple("Overlap", ["group", "kind", "index", "other"])
+
+
+class OverlapReport:
+    """
+    重叠检测结果：rows 为 Overlap 列表，按地址排序，同一组的冲突相邻
+
+    networks 为输入的网络，line_numbers 为对应的行号（None 时使用网络的序号）。
+    """
+
+    def __init__(self, networks, line_numbers=None):
+        self.networks = networks
+        self.line_numbers = line_numbers
+        self.rows = []
+        self.group_count = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        return self.rows[i]
+
+    def line_of(self, index):
+        """网络所在的行号（没有行号时为序号）"""
+        return self.line_numbers[index] if self.line_numbers is not None else index + 1
+
+    def count(self, kind):
+        """某种冲突的数量"""
+        return sum(1 for row in self.rows if row.kind == kind)
+
+
+def _sorted_order(networks):
+    """按地址族、网络地址、前缀长度排序的下标（相同网络保持输入顺序）"""
+    if getattr(networks, "presorted", False):
+        return range(len(networks))
+    order = []
+    for bits in ipmath.FAMILY_BITS:
+        family = [i for i, sn in enumerate(networks) if sn.bits == bits]
+        # 同一地址族内 Subnet 元组按 (网络地址, 前缀长度) 比较，排序是稳定的
+        family.sort(key=networks.__getitem__)
+        order.extend(family)
+    return order
+
+
+def find_overlaps(networks, line_numbers=None, progress=None):
+    """找出网络列表中互相重叠的网络，返回 OverlapReport"""
+    result = OverlapReport(networks, line_numbers)
+    rows = result.rows
+    groups = {}   # 最外层网络下标 -> 组号
+    stack = []    # [(结束地址, 网络下标, 最外层网络下标)]，外层在下
+    current_bits = None
+    order = _sorted_order(networks)
+    total = len(order)
+    for n, i in enumerate(order):
+        if n % PROGRESS_INTERVAL == 0:
+            report(progress, n, total)
+        network, prefix, bits = networks[i]
+        if bits != current_bits:
+            stack.clear()
+            current_bits = bits
+        while stack and stack[-1][0] < network:
+            stack.pop()
+        end = ipmath.broadcast_of(network, prefix, bits)
+        if not stack:
+            stack.append((end, i, i))
+            continue
+        _, outer, root = stack[-1]
+        group = groups.get(root)
+        if group is None:
+            group = groups[root] = len(groups) + 1
+        outer_network, outer_prefix, _ = networks[outer]
+        if outer_network == network and outer_prefix == prefix:
+            rows.append(Overlap(group, "duplicate", i, outer))
+        else:
+            rows.append(Overlap(group, "contained", i, outer))
+            stack.append((end, i, root))
+    report(progress, total, total)
+    result.group_count = len(groups)
+    return result
+
+
+def overlap_record(result, row):
+    """一个冲突的各字段（与 OVERLAP_FIELDS 对应）"""
+    networks = result.networks
+    return (row.group, row.kind, ipmath.format_network(*networks[row.index]), result.line_of(row.index),
+            ipmath.format_network(*networks[row.other]), result.line_of(row.other))
+
+
+def write_overlaps_csv(fp, result, progress=None):
+    """将冲突列表写为CSV（带表头），返回写入的行数"""
+    writer = csv.writer(fp, lineterminator="\n")
+    writer.writerow(OVERLAP_FIELDS)
+    for start, chunk in export.iter_chunks(result.rows, progress):
+        writer.writerows([overlap_record(result, row) for row in chunk])
+    return len(result.rows)
+
+
+def write_overlaps_jsonl(fp, result, progress=None):
+    """将冲突列表写为JSON Lines（每行一个冲突），返回写入的行数"""
+    dumps = json.dumps
+    for start, chunk in export.iter_chunks(result.rows, progress):
+        fp.write("".join(dumps(dict(zip(OVERLAP_FIELDS, overlap_record(result, row))),
+                               ensure_ascii=False) + "\n" for row in chunk))
+    return len(result.rows)
+
+
+def export_overlaps(path, result, fmt="csv", progress=None):
+    """将冲突列表导出到文件，返回导出的行数"""
+    if fmt not in export.EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    writer = write_overlaps_csv if fmt == "csv" else write_overlaps_jsonl
+    return export.write_atomic(path, lambda fp: writer(fp, result, progress))
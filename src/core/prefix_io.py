@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+网络列表解析与流式文件读取
+
+文件按块读取并逐行解析，不会整体读入内存，也不经过界面文本框；
+无效行只保留前 MAX_REPORTED_ERRORS 条用于报告，其余只计数。
+"""
+
+import os
+
+from core import compact as compact_networks, ipmath, prefix_set
+from core.progress import PROGRESS_INTERVAL, report
+
+
+# 每次从文件读取的字节数
+READ_CHUNK_SIZE = 1 << 20
+
+# 无效行报告最多保留的条数
+MAX_REPORTED_ERRORS = 100
+
+
+class ParseResult:
+    """
+    网络列表解析结果：有效网络 + 有上限的无效行报告
+
+    compact 为 True 时 networks 为 CompactNetworks（数组保存，内存约为列表的二十分之一）。
+    """
+
+    def __init__(self, compact=False):
+        self.networks = compact_networks.CompactNetworks() if compact else []
+        self.invalid = []        # [(行号, 文本), ...]，最多 MAX_REPORTED_ERRORS 条
+        self.invalid_count = 0   # 无效项总数
+        self.line_numbers = None  # 与 networks 一一对应的行号（解析时要求记录才有）
+
+    def add_invalid(self, line_no, text):
+        """记录一个无效项"""
+        self.invalid_count += 1
+        if len(self.invalid) < MAX_REPORTED_ERRORS:
+            self.invalid.append((line_no, text))
+
+    def format_invalid(self, limit=MAX_REPORTED_ERRORS):
+        """无效项报告文本"""
+        lines = [f"第{line_no}行: {text}" for line_no, text in self.invalid[:limit]]
+        if self.invalid_count > len(lines):
+            lines.append(f"……其余 {self.invalid_count - len(lines)} 条未列出")
+        return "\n".join(lines)
+
+
+def parse_lines(lines, result=None, first_line=1, progress=None, total=0, line_numbers=False, compact=False):
+    """
+    解析网络列表的各行，每行可以包含多个用逗号分隔的网络，"#" 之后为注释
+
+    返回 ParseResult；传入 result 时在其基础上继续追加。
+    line_numbers 为 True 时在 result.line_numbers 中记录每个网络所在的行号；
+    compact 为 True 时新建的 result 用 CompactNetworks 保存网络。
+    """
+    if result is None:
+        result = ParseResult(compact)
+    networks = result.networks
+    if line_numbers and result.line_numbers is None:
+        result.line_numbers = []
+    numbers = result.line_numbers if line_numbers else None
+    parse = ipmath.parse_network
+    for line_no, line in enumerate(lines, first_line):
+        if progress is not None and line_no % PROGRESS_INTERVAL == 0:
+            report(progress, line_no, total)
+        if "#" in line:
+            line = line[:line.index("#")]
+        for part in line.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                networks.append(parse(part))
+            except ValueError:
+                result.add_invalid(line_no, part)
+                continue
+            if numbers is not None:
+                numbers.append(line_no)
+    return result
+
+
+class RangeParseResult(ParseResult):
+    """地址范围列表解析结果：ranges 为 [(起始地址, 结束地址, 位数), ...]"""
+
+    def __init__(self):
+        super().__init__()
+        self.ranges = []
+
+
+def parse_range_lines(lines, result=None, progress=None, total=0):
+    """
+    解析地址范围列表的各行，每行可以包含多个用逗号分隔的范围，"#" 之后为注释
+
+    范围写作 "起始地址 - 结束地址"，也可以是CIDR网络或单个地址。返回 RangeParseResult。
+    """
+    if result is None:
+        result = RangeParseResult()
+    ranges = result.ranges
+    parse = ipmath.parse_range
+    for line_no, line in enumerate(lines, 1):
+        if progress is not None and line_no % PROGRESS_INTERVAL == 0:
+            report(progress, line_no, total)
+        if "#" in line:
+            line = line[:line.index("#")]
+        for part in line.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                ranges.append(parse(part))
+            except ValueError:
+                result.add_invalid(line_no, part)
+    return result
+
+
+def parse_text(text, progress=None):
+    """解析界面中输入的网络列表文本"""
+    lines = text.split("\n")
+    return parse_lines(lines, progress=progress, total=len(lines))
+
+
+def normalize_lines(lines):
+    """
+    规范化网络列表的各行（去掉注释、空白和空项），结果相同的输入得到相同的元组
+
+    用作计算结果缓存的键；保留空行以保持行号不变，只去掉末尾的空行。
+    """
+    normalized = [",".join(part for part in map(str.strip, line.split("#", 1)[0].split(",")) if part)
+                  for line in lines]
+    while normalized and not normalized[-1]:
+        normalized.pop()
+    return tuple(normalized)
+
+
+def iter_file_lines(path, progress=None, chunk_size=READ_CHUNK_SIZE):
+    """按块读取文本文件并逐行产出，按已读取的字节数报告进度"""
+    total = os.path.getsize(path)
+    done = 0
+    tail = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            done += len(chunk)
+            report(progress, done, total)
+            buf = tail + chunk
+            end = buf.rfind(b"\n")
+            if end < 0:
+                tail = buf
+                continue
+            tail = buf[end + 1:]
+            yield from buf[:end].decode("utf-8", "replace").split("\n")
+    if tail:
+        yield tail.decode("utf-8", "replace")
+
+
+def read_range_file(path, progress=None):
+    """流式读取并解析地址范围列表文件"""
+    return parse_range_lines(iter_file_lines(path, progress))
+
+
+def read_prefix_file(path, progress=None, line_numbers=False, compact=False):
+    """
+    流式读取并解析网络列表文件（compact 见 parse_lines）
+
+    前缀集文件（.smps）不需要解析：networks 为内存映射的 PrefixSet，没有行号。
+    """
+    if prefix_set.is_prefix_set_file(path):
+        result = ParseResult()
+        result.networks = prefix_set.open_prefix_set(path)
+        report(progress, 1, 1)
+        return result
+    return parse_lines(iter_file_lines(path, progress), line_numbers=line_numbers, compact=compact)
\ No newline at end of file
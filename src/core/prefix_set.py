@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+二进制前缀集文件（.smps）
+
+保存大量网络时不再逐个格式化/解析文本地址。文件格式（小端序）:
+
+    文件头 32 字节    魔数 b"SMPREFIX"、版本(u16)、保留(u16, u32)、IPv4 数量(u64)、IPv6 数量(u64)
+    IPv4 网络地址     IPv4 数量 × u32
+    IPv4 前缀长度     IPv4 数量 × u8，之后补齐到 8 字节边界
+    IPv6 网络地址     IPv6 数量 × (高 64 位 u64, 低 64 位 u64)
+    IPv6 前缀长度     IPv6 数量 × u8
+
+每个地址族内按 (网络地址, 前缀长度) 排序，IPv4 在前，与 ipmath.family_order 的顺序一致。
+读取时用 mmap 映射文件，各数组直接作为 memoryview 使用，打开文件不需要解析也不复制数据；
+网络按下标访问时才生成 Subnet，已排序的序列交给 ipmath 计算时不再排序。
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import islice
+
+from core import ipmath
+from core.progress import PROGRESS_INTERVAL, report
+
+
+MAGIC = b"SMPREFIX"
+VERSION = 1
+EXTENSION = ".smps"
+
+_HEADER = struct.Struct("<8sHHIQQ")
+
+# 一个文件最多保存的网络数（超过时应分成多个文件）
+MAX_ENTRIES = 1 << 32
+
+_LOW64 = (1 << 64) - 1
+
+# 内存中的数组与文件字节序相同时可以直接使用映射的内存，否则需要复制并转换字节序
+_NATIVE = sys.byteorder == "little"
+
+
+def _pad(offset):
+    """补齐到 8 字节边界"""
+    return (offset + 7) & ~7
+
+
+class PrefixFamily:
+    """
+    前缀集中一个地址族的网络：已排序的 Subnet 序列
+
+    networks/prefixes 为网络地址和前缀长度数组（IPv6 的网络地址由两个 u64 拼成）。
+    presorted 表示已按 (网络地址, 前缀长度) 排序，ipmath.merge_ranges 等据此跳过排序。
+    """
+
+    presorted = True
+
+    def __init__(self, bits, networks, prefixes):
+        self.bits = bits
+        self.networks = networks
+        self.prefixes = prefixes
+
+    def __len__(self):
+        return len(self.prefixes)
+
+    def network_at(self, i):
+        """第 i 个网络地址"""
+        if self.bits == ipmath.IPV4_BITS:
+            return self.networks[i]
+        return self.networks[2 * i] << 64 | self.networks[2 * i + 1]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(len(self))[key]]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("网络序号超出范围")
+        return ipmath.Subnet(self.network_at(key), self.prefixes[key], self.bits)
+
+    def __iter__(self):
+        Subnet, bits = ipmath.Subnet, self.bits
+        if bits == ipmath.IPV4_BITS:
+            for network, prefix in zip(self.networks, self.prefixes):
+                yield Subnet(network, prefix, bits)
+            return
+        words = iter(self.networks)
+        for high, low, prefix in zip(words, words, self.prefixes):
+            yield Subnet(high << 64 | low, prefix, bits)
+
+
+class PrefixSet:
+    """
+    内存映射的前缀集文件：IPv4 在前、IPv6 在后的已排序 Subnet 序列
+
+    用 open_prefix_set() 打开；不再使用时可以调用 close() 立即解除映射。
+    """
+
+    presorted = True
+
+    def __init__(self, path, mapped, v4, v6):
+        self.path = path
+        self._mmap = mapped
+        self.v4 = v4
+        self.v6 = v6
+
+    def __len__(self):
+        return len(self.v4) + len(self.v6)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(len(self))[key]]
+        if key < 0:
+            key += len(self)
+        count4 = len(self.v4)
+        return self.v4[key] if key < count4 else self.v6[key - count4]
+
+    def __iter__(self):
+        yield from self.v4
+        yield from self.v6
+
+    def families(self):
+        """按地址族拆分，返回 [(地址位数, 已排序的网络序列), ...]，与 ipmath.split_families 相同"""
+        return [(family.bits, family) for family in (self.v4, self.v6) if len(family)]
+
+    def close(self):
+        """解除文件映射（之后不能再访问网络）"""
+        for family in (self.v4, self.v6):
+            for view in (family.networks, family.prefixes):
+                if isinstance(view, memoryview):
+                    view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_prefix_set_file(path):
+    """文件是否为前缀集文件（按文件头的魔数判断）"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _array_view(buf, offset, count, typecode):
+    """文件中 offset 处 count 个元素的数组（字节序相同时不复制）"""
+    size = array(typecode).itemsize
+    view = buf[offset:offset + count * size]
+    if _NATIVE or size == 1:
+        return view.cast(typecode)
+    values = array(typecode, view.tobytes())
+    values.byteswap()
+    return values
+
+
+def open_prefix_set(path):
+    """映射并打开前缀集文件，文件无效时抛出ValueError"""
+    size = os.path.getsize(path)
+    if size < _HEADER.size:
+        raise ValueError("不是有效的前缀集文件")
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, _, _, count4, count6 = _HEADER.unpack_from(mapped)
+    offset4 = _HEADER.size
+    offset6 = _pad(offset4 + count4 * 5)
+    if magic != MAGIC or version != VERSION or size != offset6 + count6 * 17:
+        mapped.close()
+        raise ValueError("不是有效的前缀集文件（或版本不受支持）")
+    buf = memoryview(mapped)
+    v4 = PrefixFamily(ipmath.IPV4_BITS, _array_view(buf, offset4, count4, "I"),
+                      _array_view(buf, offset4 + count4 * 4, count4, "B"))
+    v6 = PrefixFamily(ipmath.IPV6_BITS, _array_view(buf, offset6, count6 * 2, "Q"),
+                      _array_view(buf, offset6 + count6 * 16, count6, "B"))
+    buf.release()
+    return PrefixSet(path, mapped, v4, v6)
+
+
+def _blocks(networks):
+    """
+    已排序的网络序列按块生成 (网络地址序列, 前缀长度字节串)，每块 PROGRESS_INTERVAL 个网络
+
+    SubnetSequence（等分的子网）的网络地址为等差数列、前缀长度都相同，直接按块生成，不逐个生成 Subnet。
+    """
+    if isinstance(networks, ipmath.SubnetSequence):
+        step, total = networks.step, networks.count
+        for i in range(0, total, PROGRESS_INTERVAL):
+            count = min(PROGRESS_INTERVAL, total - i)
+            start = networks.start + i * step
+            yield range(start, start + count * step, step), bytes([networks.prefix]) * count
+        return
+    subnets = iter(networks)
+    while True:
+        block = list(islice(subnets, PROGRESS_INTERVAL))
+        if not block:
+            return
+        yield [sn.network for sn in block], bytes(sn.prefix for sn in block)
+
+
+def _network_words(bits, addresses):
+    """一块网络地址转换为文件中的数组（IPv6 每个地址为高、低 64 位两个 u64）"""
+    if bits == ipmath.IPV4_BITS:
+        values = array("I", addresses)
+    else:
+        values = array("Q")
+        for network in addresses:
+            values.append(network >> 64)
+            values.append(network & _LOW64)
+    if not _NATIVE:
+        values.byteswap()
+    return values
+
+
+def _write_family(fp, bits, networks, progress, done, total):
+    """
+    分块写入一个地址族的网络地址数组和前缀长度数组
+
+    文件中网络地址数组在前缀长度数组之前，所以遍历两次序列，内存中只保留一块。
+    """
+    for i, (addresses, _) in enumerate(_blocks(networks)):
+        report(progress, done + i * PROGRESS_INTERVAL, total)
+        fp.write(_network_words(bits, addresses))
+    for _, prefixes in _blocks(networks):
+        fp.write(prefixes)
+
+
+def write_prefix_set(fp, networks, progress=None):
+    """
+    将网络序列写为前缀集（fp 为二进制文件），返回写入的网络数
+
+    networks 可以是任意 Subnet 序列，写入前按地址族和地址排序；
+    SubnetSequence（子网划分结果）本身有序，直接按等差数列生成。
+    各地址族的数量事先已知，先写文件头，再分块写入各数组，不在内存中生成整个文件。
+    """
+    if isinstance(networks, ipmath.SubnetSequence):
+        if networks.count > MAX_ENTRIES:
+            raise ValueError(f"子网数量超过 {MAX_ENTRIES}，无法保存为前缀集")
+        families = [(networks.bits, networks)]
+    elif getattr(networks, "presorted", False):
+        families = ipmath.split_families(networks)
+    else:
+        families = [(bits, sorted(family)) for bits, family in ipmath.split_families(networks)]
+    families = dict(families)
+    count4, count6 = (ipmath.sequence_length(families.get(bits, ())) for bits in ipmath.FAMILY_BITS)
+    total = count4 + count6
+    fp.write(_HEADER.pack(MAGIC, VERSION, 0, 0, count4, count6))
+    if count4:
+        _write_family(fp, ipmath.IPV4_BITS, families[ipmath.IPV4_BITS], progress, 0, total)
+    end4 = _HEADER.size + count4 * 5
+    fp.write(bytes(_pad(end4) - end4))
+    if count6:
+        _write_family(fp, ipmath.IPV6_BITS, families[ipmath.IPV6_BITS], progress, count4, total)
+    report(progress, total, 0)
+    return total
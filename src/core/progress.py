@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+计算进度与取消
+
+计算函数接收可选的 progress 参数，每处理一批数据调用一次 progress.update()；
+界面在后台线程中运行计算时借此显示进度，并在用户取消时中断计算。
+"""
+
+
+# 计算函数每处理多少条数据报告一次进度
+PROGRESS_INTERVAL = 1 << 14
+
+
+class CalculationCancelled(Exception):
+    """计算被用户取消"""
+
+
+class ProgressReporter:
+    """进度报告器，callback(百分比) 只在百分比变化时调用"""
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.cancelled = False
+        self._percent = -1
+
+    def cancel(self):
+        """请求取消，计算会在下一次 update() 时中断"""
+        self.cancelled = True
+
+    def update(self, done, total):
+        """报告已完成 done / total，已取消时抛出 CalculationCancelled"""
+        if self.cancelled:
+            raise CalculationCancelled()
+        percent = done * 100 // total if total else 100
+        if percent != self._percent:
+            self._percent = percent
+            if self.callback:
+                self.callback(percent)
+
+
+def report(progress, done, total):
+    """progress 可能为None的便捷调用"""
+    if progress is not None:
+        progress.update(done, total)
\ No newline at end of file
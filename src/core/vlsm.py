@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+VLSM（可变长子网掩码）规划
+
+把一组 (名称, 主机数) 需求分配到同一个父网络中：每个需求取能容纳它的最小子网，
+按从大到小的顺序从父网络起始地址依次分配。块大小都是2的幂且非递增，
+所以游标始终自然对齐，不会产生碎片；只要总大小不超过父网络就一定能全部分配。
+排序为 O(n log n)，分配为 O(n)。
+"""
+
+from collections import namedtuple
+
+from core import ipmath
+from core.progress import PROGRESS_INTERVAL, report
+
+
+# 需求：名称 + 主机数
+Requirement = namedtuple("Requirement", ["name", "hosts"])
+
+# 分配结果：需求 + 分配到的子网
+Allocation = namedtuple("Allocation", ["name", "hosts", "network", "prefix", "bits"])
+
+# 规划结果：已分配（从大到小）、无法分配的需求、剩余空闲块
+VlsmPlan = namedtuple("VlsmPlan", ["allocations", "unallocated", "free"])
+
+
+def parse_requirements(text):
+    """
+    解析需求文本，每行一个需求，"#" 之后为注释，支持以下写法（逗号、空格或制表符分隔）:
+
+        名称, 主机数
+        名称, 主机数, 个数     （展开为 名称-1 ... 名称-个数）
+        主机数                （名称自动生成）
+
+    格式错误时抛出ValueError（带行号）。
+    """
+    requirements = []
+    for line_no, line in enumerate(text.split("\n"), 1):
+        if "#" in line:
+            line = line[:line.index("#")]
+        fields = line.replace(",", " ").replace("\t", " ").split()
+        if not fields:
+            continue
+        try:
+            if len(fields) == 1:
+                requirements.append(Requirement(f"子网{len(requirements) + 1}", int(fields[0])))
+                continue
+            name, hosts = fields[0], int(fields[1])
+            count = int(fields[2]) if len(fields) > 2 else None
+            if len(fields) > 3 or (count is not None and count <= 0):
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"第{line_no}行格式错误: {line.strip()}") from None
+        if hosts <= 0:
+            raise ValueError(f"第{line_no}行主机数必须大于0: {line.strip()}")
+        if count is None:
+            requirements.append(Requirement(name, hosts))
+        else:
+            requirements.extend(Requirement(f"{name}-{i}", hosts) for i in range(1, count + 1))
+    return requirements
+
+
+def plan(network, prefix, requirements, bits=ipmath.IPV4_BITS, progress=None):
+    """在父网络 network/prefix 中为 requirements 分配子网，返回 VlsmPlan"""
+    sized = []
+    unallocated = []
+    for req in requirements:
+        new_prefix = ipmath.prefix_for_hosts(req.hosts, bits)
+        if new_prefix < prefix:
+            unallocated.append(req)
+        else:
+            sized.append((new_prefix, req))
+    # 从大到小（前缀从短到长）；相同大小保持输入顺序
+    sized.sort(key=lambda item: item[0])
+
+    cursor = network & ipmath.prefix_to_netmask(prefix, bits)
+    end = ipmath.broadcast_of(cursor, prefix, bits)
+    allocations = []
+    total = len(sized)
+    for i, (new_prefix, req) in enumerate(sized):
+        if i % PROGRESS_INTERVAL == 0:
+            report(progress, i, total)
+        size = 1 << (bits - new_prefix)
+        if cursor + size - 1 > end:
+            unallocated.append(req)
+            continue
+        allocations.append(Allocation(req.name, req.hosts, cursor, new_prefix, bits))
+        cursor += size
+    free = ipmath.range_to_cidrs(cursor, end, bits) if cursor <= end else []
+    # 空闲块从大到小
+    free.sort(key=lambda sn: (sn.prefix, sn.network))
+    return VlsmPlan(allocations, unallocated, free)
\ No newline at end of file
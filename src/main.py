@@ -6,32 +6,46 @@
 """
 
 import sys
+
+# 计时模块最先导入，导入时刻即为启动计时起点
+from utils import startup_timer
+
 from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtCore import QCoreApplication
 
 from widgets.main_window import SubnetCalculator
-from utils.style_manager import StyleManager
 from utils.config_manager import ConfigManager
 
+_IMPORTS_DONE = startup_timer.now()
 
-def main():
-    """主函数"""
+
+def create_window(argv):
+    """创建应用和主窗口并显示（不进入事件循环），返回 (app, config, window)"""
     QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_EnableHighDpiScaling)
-    app = QApplication(sys.argv)
+    with startup_timer.phase("QApplication"):
+        app = QApplication(argv)
     
     # 加载配置
     config = ConfigManager()
     
-    # 应用主题
-    if config.is_dark_theme():
-        StyleManager.apply_dark_styles()
-    else:
-        StyleManager.apply_styles()
-    
-    # 创建并显示主窗口
-    window = SubnetCalculator(config)
-    window.show()
+    # 创建并显示主窗口（主题由主窗口的主题管理器统一应用）
+    with startup_timer.phase("SubnetCalculator.__init__"):
+        window = SubnetCalculator(config)
+    with startup_timer.phase("window.show"):
+        window.show()
+    return app, config, window
+
+
+def main():
+    """主函数"""
+    argv = startup_timer.setup(sys.argv)
+    startup_timer.record("imports", 0.0, _IMPORTS_DONE)
+    app, config, window = create_window(argv)
+    if startup_timer.is_enabled():
+        # 事件循环处理完第一批事件（包括第一次绘制）后输出计时结果
+        shown = startup_timer.now()
+        QTimer.singleShot(0, lambda: (startup_timer.record("first paint", shown), startup_timer.report()))
     
     # 运行应用
     exit_code = app.exec()
@@ -9,6 +9,8 @@ import json
 import os
 from pathlib import Path
 
+from utils import startup_timer
+
 
 class ConfigManager:
     """配置管理器，用于管理应用的配置信息"""
@@ -19,10 +21,13 @@ class ConfigManager:
             "theme": "light",
             "window_width": 1100,
             "window_height": 800,
-            "last_tab": 0
+            "last_tab": 0,
+            "live_mode": False,
+            "history_results": False
         }
         self.config = self.load_config()
     
+    @startup_timer.timed("ConfigManager.load_config")
     def load_config(self):
         """加载配置"""
         if self.config_file.exists():
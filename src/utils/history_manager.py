@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+计算历史记录管理器（SQLite）
+
+每次计算记录一行：时间、类型、输入、摘要、涉及的网络，以及可选的结果文本。
+网络存为 (位数, 起始地址, 结束地址)，地址为16字节大端序的 BLOB，SQLite 按字节比较 BLOB，
+所以 IPv4/IPv6 都可以在 (bits, start, end) 索引上查询：
+
+    10.20.0.0/16 内的记录      bits = 32 AND start BETWEEN 10.20.0.0 AND 10.20.255.255 AND end <= 10.20.255.255
+    包含 10.20.1.5 的记录      bits = 32 AND start IN (10.20.1.5 依次屏蔽为 /32../0 的网络地址) AND end >= 10.20.1.5
+
+后者成立是因为记录的网络都是 CIDR 网络（涉及多个网络时记录包含它们的最小网络），
+包含某个地址的网络只可能是该地址屏蔽到各个前缀长度得到的网络，最多 33（IPv6 为 129）次索引查找。
+
+记录按 id 倒序分页读取（WHERE id < 上一页最后的 id），翻页开销与已读取的页数无关。
+不依赖PyQt5。
+"""
+
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+from core import ipmath
+
+
+# 每页读取的记录数
+PAGE_SIZE = 200
+
+# 保存结果文本时最多保存的行数
+MAX_RESULT_LINES = 10000
+
+# 计算类型及显示名称
+KINDS = {
+    "basic": "基本计算",
+    "batch": "批量计算",
+    "split": "子网划分",
+    "vlsm": "VLSM规划",
+    "supernet": "超网计算",
+    "setop": "集合运算",
+    "overlap": "重叠检测",
+    "range": "范围转换",
+    "free": "空闲空间",
+    "lookup": "地址归属",
+}
+
+# 一条历史记录（不含结果文本）
+HistoryEntry = namedtuple("HistoryEntry", ["id", "created", "kind", "input", "summary", "network"])
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS history (
+        id INTEGER PRIMARY KEY,
+        created REAL NOT NULL,
+        kind TEXT NOT NULL,
+        input TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        network TEXT NOT NULL DEFAULT '',
+        bits INTEGER,
+        start BLOB,
+        end BLOB,
+        result TEXT
+    );
+    CREATE INDEX IF NOT EXISTS history_created ON history(created);
+    CREATE INDEX IF NOT EXISTS history_network ON history(bits, start, end);
+"""
+
+_COLUMNS = "id, created, kind, input, summary, network"
+
+
+def address_key(value):
+    """地址的索引键：16字节大端序，字节顺序与数值顺序一致"""
+    return value.to_bytes(16, "big")
+
+
+def covering_network(networks):
+    """
+    记录的网络：只有一个网络时为该网络，多个网络时为包含它们的最小网络
+
+    没有网络或同时有IPv4和IPv6时返回 None。
+    """
+    networks = list(networks)
+    if not networks or len({sn[2] for sn in networks}) != 1:
+        return None
+    if len(networks) == 1:
+        return ipmath.Subnet(*networks[0])
+    bits = networks[0][2]
+    start = min(network for network, _, _ in networks)
+    end = max(ipmath.broadcast_of(network, prefix, bits) for network, prefix, _ in networks)
+    prefix = bits - (start ^ end).bit_length()
+    return ipmath.Subnet(start & ipmath.prefix_to_netmask(prefix, bits), prefix, bits)
+
+
+def parse_query(text):
+    """
+    把搜索文本转换为 (SQL条件, 参数)
+
+        10.20.0.0/16 或 inside 10.20.0.0/16    该网络内的记录
+        10.20.1.5 或 contains 10.20.0.0/24     包含该地址/网络的记录
+        2026-10-17                              该日的记录
+        其他文本                                输入、摘要或类型名称中包含该文本的记录
+    空文本匹配全部记录。
+    """
+    text = text.strip()
+    if not text:
+        return "", []
+    word, _, rest = text.partition(" ")
+    mode = word.lower()
+    if mode in ("inside", "in", "contains") and rest.strip():
+        target = rest.strip()
+    else:
+        mode = None
+        target = text
+    try:
+        network, prefix, bits = ipmath.parse_network(target, strict=False)
+    except ValueError:
+        network = None
+    if network is not None:
+        end = ipmath.broadcast_of(network, prefix, bits)
+        if mode is None:
+            mode = "inside" if "/" in target else "contains"
+        if mode == "contains":
+            starts = sorted({address_key(network & ipmath.prefix_to_netmask(p, bits)) for p in range(prefix + 1)})
+            return (f"bits = ? AND start IN ({', '.join('?' * len(starts))}) AND end >= ?",
+                    [bits] + starts + [address_key(end)])
+        return ("bits = ? AND start >= ? AND start <= ? AND end <= ?",
+                [bits, address_key(network), address_key(end), address_key(end)])
+    try:
+        day = datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        day = None
+    if day is not None:
+        return "created >= ? AND created < ?", [day.timestamp(), (day + timedelta(days=1)).timestamp()]
+    pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    condition = "input LIKE ? ESCAPE '\\' OR summary LIKE ? ESCAPE '\\'"
+    params = [pattern, pattern]
+    # 也匹配计算类型的名称，如 "VLSM"、"超网"
+    kinds = [kind for kind, name in KINDS.items() if text.lower() in name.lower()]
+    if kinds:
+        condition += f" OR kind IN ({', '.join('?' * len(kinds))})"
+        params += kinds
+    return f"({condition})", params
+
+
+class HistoryManager:
+    """计算历史记录管理器，数据库在第一次使用时才打开"""
+
+    def __init__(self, path=None):
+        self.db_file = Path(path) if path else Path.home() / ".subnet_calculator_history.sqlite3"
+        self.conn = None
+
+    def connect(self):
+        """打开（必要时创建）数据库"""
+        if self.conn is None:
+            conn = sqlite3.connect(str(self.db_file))
+            # WAL 模式下每次提交不需要同步整个数据库文件，记录一次计算只需不到1毫秒
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self.conn = conn
+        return self.conn
+
+    def add(self, kind, input_text, summary, networks=(), result_lines=None, created=None):
+        """
+        记录一次计算，返回记录的 id（写入失败时返回 None）
+
+        networks 为涉及的网络 [(网络, 前缀长度, 位数), ...]；result_lines 为结果文本的各行
+        （可迭代对象，只保存前 MAX_RESULT_LINES 行），None 表示不保存结果。
+        """
+        sn = covering_network(networks)
+        if sn is None:
+            bits = start = end = None
+            network = ""
+        else:
+            bits = sn.bits
+            start = address_key(sn.network)
+            end = address_key(ipmath.broadcast_of(*sn))
+            network = ipmath.format_network(*sn)
+        result = None
+        if result_lines is not None:
+            lines = list(islice(result_lines, MAX_RESULT_LINES + 1))
+            if len(lines) > MAX_RESULT_LINES:
+                lines[-1] = f"……只保存了前 {MAX_RESULT_LINES} 行"
+            result = "\n".join(lines)
+        try:
+            conn = self.connect()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO history (created, kind, input, summary, network, bits, start, end, result) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (time.time() if created is None else created, kind, input_text, summary, network,
+                     bits, start, end, result))
+        except sqlite3.Error:
+            return None  # 历史记录写入失败不影响计算
+        return cursor.lastrowid
+
+    def search(self, query="", before_id=None, limit=PAGE_SIZE):
+        """按 parse_query 的规则搜索，返回 id 小于 before_id 的最新 limit 条记录（HistoryEntry 列表）"""
+        condition, params = parse_query(query)
+        conditions = [condition] if condition else []
+        if before_id is not None:
+            conditions.append("id < ?")
+            params.append(before_id)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        # 先在索引中选出这一页的 id（只对 id 排序），再按 id 读取整行
+        try:
+            rows = self.connect().execute(
+                f"SELECT {_COLUMNS} FROM history WHERE id IN "
+                f"(SELECT id FROM history{where} ORDER BY id DESC LIMIT ?) ORDER BY id DESC", params + [limit])
+            return [HistoryEntry(*row) for row in rows]
+        except sqlite3.Error:
+            return []  # 数据库无法读取时视为没有记录
+
+    def get_result(self, entry_id):
+        """记录保存的结果文本，没有保存时返回 None"""
+        row = self.connect().execute("SELECT result FROM history WHERE id = ?", (entry_id,)).fetchone()
+        return row[0] if row else None
+
+    def count(self):
+        """记录总数"""
+        return self.connect().execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def clear(self):
+        """删除全部记录"""
+        conn = self.connect()
+        with conn:
+            conn.execute("DELETE FROM history")
+        conn.execute("VACUUM")
+
+    def close(self):
+        """关闭数据库"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
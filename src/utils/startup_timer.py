@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动阶段计时（可选）
+
+通过环境变量或命令行参数开启，记录从导入到主窗口第一次显示的各阶段耗时：
+
+    SUBNETMASTER_STARTUP_TIMING=1            打印到标准错误
+    SUBNETMASTER_STARTUP_TIMING=timing.json  写入JSON文件
+    python run.py --startup-timing[=timing.json]
+
+未开启时各函数只做一次布尔判断。本模块不依赖PyQt5，应在其他模块之前导入，
+导入时刻即为计时起点。
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+ENV_VAR = "SUBNETMASTER_STARTUP_TIMING"
+FLAG = "--startup-timing"
+
+_origin = time.perf_counter()
+_enabled = False
+_output = None      # JSON文件路径，None 表示打印
+_records = []       # [(名称, 开始, 结束, 嵌套层级)]，时间为相对起点的秒数
+_depth = 0
+
+
+def setup(argv):
+    """根据环境变量和命令行参数决定是否开启计时，返回去掉计时参数后的 argv"""
+    value = os.environ.get(ENV_VAR, "")
+    rest = []
+    for arg in argv:
+        if arg == FLAG:
+            value = value or "1"
+        elif arg.startswith(FLAG + "="):
+            value = arg[len(FLAG) + 1:]
+        else:
+            rest.append(arg)
+    if value and value != "0":
+        enable(None if value == "1" else value)
+    return rest
+
+
+def enable(output=None):
+    """开启计时，output 为JSON文件路径（None 时打印到标准错误）"""
+    global _enabled, _output
+    _enabled = True
+    _output = output
+
+
+def is_enabled():
+    """是否正在计时"""
+    return _enabled
+
+
+def now():
+    """相对计时起点的秒数"""
+    return time.perf_counter() - _origin
+
+
+def record(name, start, end=None):
+    """记录一个阶段（start/end 为 now() 的返回值，end 默认为现在）"""
+    if _enabled:
+        _records.append((name, start, now() if end is None else end, _depth))
+
+
+@contextmanager
+def phase(name):
+    """记录 with 语句块的耗时"""
+    global _depth
+    if not _enabled:
+        yield
+        return
+    start = now()
+    _depth += 1
+    try:
+        yield
+    finally:
+        _depth -= 1
+        record(name, start)
+
+
+def timed(name):
+    """记录函数每次调用耗时的装饰器"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def report():
+    """输出各阶段耗时并停止计时（之后的调用不再记录）"""
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+    total = now()
+    records = sorted(_records, key=lambda r: r[1])
+    if _output:
+        import json
+        data = {
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "total_ms": round(total * 1000, 3),
+            "phases": [{"name": name, "start_ms": round(start * 1000, 3),
+                        "duration_ms": round((end - start) * 1000, 3), "depth": depth}
+                       for name, start, end, depth in records],
+        }
+        with open(_output, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return
+    # 中文字符显示宽度为2，表头按显示宽度对齐
+    lines = ["启动耗时:", f"  {'阶段':<40}{'开始(ms)':>8}{'耗时(ms)':>8}"]
+    for name, start, end, depth in records:
+        label = "  " * depth + name
+        lines.append(f"  {label:<42}{start * 1000:>10.1f}{(end - start) * 1000:>10.1f}")
+    lines.append(f"  {'总计':<40}{'':>10}{total * 1000:>10.1f}")
+    print("\n".join(lines), file=sys.stderr)
@@ -5,25 +5,21 @@
 样式管理器类定义
 """
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QPalette, QColor
+import re
 from PyQt5.QtWidgets import QApplication
 
+from utils import startup_timer
+
+
+# 样式表中的一条规则: 选择器列表 { 声明 }
+_RULE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+
 
 class StyleManager:
     """样式管理器，用于统一界面样式"""
-    
-    @staticmethod
-    def apply_styles():
-        """应用统一样式"""
-        app = QApplication.instance()
-        
-        # 设置全局字体
-        font = QFont("Microsoft YaHei", 9)
-        app.setFont(font)
-        
-        # 设置样式表
-        app.setStyleSheet("""
+
+    # 浅色主题样式表
+    LIGHT_STYLESHEET = """
             QWidget {
                 font-family: "Microsoft YaHei", "Segoe UI", sans-serif;
                 font-size: 9pt;
@@ -95,7 +91,7 @@ class StyleManager:
                 outline: none;
             }
             
-            QTreeWidget {
+            QTreeWidget, QTableView {
                 border: 1px solid #CCCCCC;
                 border-radius: 4px;
                 alternate-background-color: #F8F8F8;
@@ -107,7 +103,7 @@ class StyleManager:
                 padding: 4px;
             }
             
-            QTreeWidget::item:selected {
+            QTreeWidget::item:selected, QTableView::item:selected {
                 background-color: #0078D4;
                 color: white;
             }
@@ -195,15 +191,10 @@ class StyleManager:
                 border-radius: 4px;
                 background-color: #0078D4;
             }
-        """)
+        """
 
-    @staticmethod
-    def apply_dark_styles():
-        """应用暗色主题样式"""
-        app = QApplication.instance()
-        
-        # 设置样式表
-        app.setStyleSheet("""
+    # 暗色主题样式表
+    DARK_STYLESHEET = """
             QWidget {
                 font-family: "Microsoft YaHei", "Segoe UI", sans-serif;
                 font-size: 9pt;
@@ -281,7 +272,7 @@ class StyleManager:
                 outline: none;
             }
             
-            QTreeWidget {
+            QTreeWidget, QTableView {
                 border: 1px solid #555555;
                 border-radius: 4px;
                 background-color: #333337;
@@ -295,7 +286,7 @@ class StyleManager:
                 padding: 4px;
             }
             
-            QTreeWidget::item:selected {
+            QTreeWidget::item:selected, QTableView::item:selected {
                 background-color: #0078D4;
                 color: white;
             }
@@ -396,4 +387,42 @@ class StyleManager:
             QMessageBox QLabel {
                 color: #E0E0E0;
             }
-        """)
\ No newline at end of file
+        """
+
+    # 主窗口上表示当前主题的属性。两种主题的规则合并为一个样式表，每条规则只对该属性
+    # 为 true（暗色）或 false（浅色）的主窗口及其子组件生效，切换主题时样式表不变，
+    # 只需修改属性并重新应用可见组件的样式
+    THEME_PROPERTY = "darkTheme"
+
+    # 合并后的样式表，第一次使用时构建
+    _stylesheet = None
+
+    @staticmethod
+    def scope_stylesheet(stylesheet, dark):
+        """把样式表中的每个选择器限定在主题属性为 dark 的主窗口之下"""
+        condition = f'[{StyleManager.THEME_PROPERTY}="{"true" if dark else "false"}"]'
+        rules = []
+        for selectors, body in _RULE.findall(stylesheet):
+            scoped = []
+            for selector in selectors.split(","):
+                selector = selector.strip()
+                scoped.append(f"*{condition} {selector}")
+                # 主窗口本身只匹配不带子控件、伪状态和对象名的选择器（如 QWidget）
+                if selector.isidentifier():
+                    scoped.append(selector + condition)
+            rules.append(", ".join(scoped) + " {" + body + "}")
+        return "\n".join(rules)
+
+    @classmethod
+    def stylesheet(cls):
+        """两种主题合并后的样式表"""
+        if cls._stylesheet is None:
+            cls._stylesheet = (cls.scope_stylesheet(cls.LIGHT_STYLESHEET, False) + "\n"
+                               + cls.scope_stylesheet(cls.DARK_STYLESHEET, True))
+        return cls._stylesheet
+
+    @staticmethod
+    @startup_timer.timed("StyleManager.apply_styles")
+    def apply_styles():
+        """应用样式表（两种主题共用，启动时设置一次）"""
+        QApplication.instance().setStyleSheet(StyleManager.stylesheet())
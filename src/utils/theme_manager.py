@@ -6,59 +6,124 @@
 """
 
 import sys
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt
+from collections import namedtuple
+from PyQt5.QtWidgets import QApplication, QWidget
+from PyQt5.QtCore import Qt, QObject, QEvent
 from PyQt5.QtGui import QPalette, QColor, QFont
 
+from utils import startup_timer
 from utils.style_manager import StyleManager
 
 
+# 主题：调色板 + 字体，每种主题只构建一次（样式表两种主题共用，见 StyleManager）
+Theme = namedtuple("Theme", ["dark", "palette", "font"])
+
+
+class StyleRefresher(QObject):
+    """
+    主题属性改变后重新应用组件的样式
+
+    只立即处理可见的组件；隐藏的子树（未显示的标签页、折叠的输入框、弹出菜单等）
+    在第一次重新显示时才处理，大部分组件不可见时切换主题的开销与可见组件数成正比。
+    """
+
+    def repolish(self, widget):
+        """重新应用 widget 及其可见子组件的样式，隐藏的子组件推迟到显示时"""
+        style = widget.style()
+        style.unpolish(widget)
+        style.polish(widget)
+        widget.update()
+        for child in widget.children():
+            if not isinstance(child, QWidget):
+                continue
+            if child.isVisible():
+                self.repolish(child)
+            else:
+                # 重复安装同一个过滤器不会重复调用
+                child.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Show:
+            obj.removeEventFilter(self)
+            self.repolish(obj)
+        return False
+
+
 class ThemeManager:
-    def __init__(self, parent):
-        self.parent = parent
-        self.dark_theme = False
+    # 已构建的主题 {是否暗色: Theme}
+    _themes = {}
 
-    def apply_theme(self):
-        """应用当前主题"""
-        app = QApplication.instance()
-        if self.dark_theme:
-            # 应用暗色主题调色板
-            dark = QPalette()
-            dark.setColor(QPalette.ColorRole.Window, QColor(45, 45, 48))
-            dark.setColor(QPalette.ColorRole.WindowText, Qt.GlobalColor.white)
-            dark.setColor(QPalette.ColorRole.Base, QColor(51, 51, 55))
-            dark.setColor(QPalette.ColorRole.AlternateBase, QColor(61, 61, 64))
-            dark.setColor(QPalette.ColorRole.ToolTipBase, Qt.GlobalColor.white)
-            dark.setColor(QPalette.ColorRole.ToolTipText, Qt.GlobalColor.white)
-            dark.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.white)
-            dark.setColor(QPalette.ColorRole.Button, QColor(61, 61, 64))
-            dark.setColor(QPalette.ColorRole.ButtonText, Qt.GlobalColor.white)
-            dark.setColor(QPalette.ColorRole.BrightText, Qt.GlobalColor.red)
-            dark.setColor(QPalette.ColorRole.Link, QColor(42, 130, 218))
-            dark.setColor(QPalette.ColorRole.Highlight, QColor(42, 130, 218))
-            dark.setColor(QPalette.ColorRole.HighlightedText, Qt.GlobalColor.black)
-            app.setPalette(dark)
-            
-            # 应用暗色主题样式
-            StyleManager.apply_dark_styles()
-        else:
-            # 应用浅色主题
-            app.setStyle("Fusion")
-            app.setPalette(app.style().standardPalette())
-            
-            # 应用浅色主题样式
-            StyleManager.apply_styles()
+    def __init__(self, parent, dark_theme=False):
+        self.parent = parent
+        self.dark_theme = dark_theme
+        # 当前已应用的主题，切换时只重新设置与它不同的部分
+        self.applied = None
+        self.refresher = StyleRefresher()
 
-        # 统一字体（防止系统 DPI 缩放导致模糊）
+    @staticmethod
+    def build_font():
+        """统一字体（防止系统 DPI 缩放导致模糊）"""
         font = QFont("Microsoft YaHei", 9)
         if sys.platform == "darwin":
             font = QFont("SF Pro", 10)
         elif sys.platform.startswith("linux"):
             font = QFont("Noto Sans", 9)
-        app.setFont(font)
+        return font
+
+    @staticmethod
+    def build_theme(dark):
+        """构建主题（浅色主题使用 Fusion 风格的标准调色板，需在设置 Fusion 风格之后调用）"""
+        if dark:
+            # 暗色主题调色板
+            palette = QPalette()
+            palette.setColor(QPalette.ColorRole.Window, QColor(45, 45, 48))
+            palette.setColor(QPalette.ColorRole.WindowText, Qt.GlobalColor.white)
+            palette.setColor(QPalette.ColorRole.Base, QColor(51, 51, 55))
+            palette.setColor(QPalette.ColorRole.AlternateBase, QColor(61, 61, 64))
+            palette.setColor(QPalette.ColorRole.ToolTipBase, Qt.GlobalColor.white)
+            palette.setColor(QPalette.ColorRole.ToolTipText, Qt.GlobalColor.white)
+            palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.white)
+            palette.setColor(QPalette.ColorRole.Button, QColor(61, 61, 64))
+            palette.setColor(QPalette.ColorRole.ButtonText, Qt.GlobalColor.white)
+            palette.setColor(QPalette.ColorRole.BrightText, Qt.GlobalColor.red)
+            palette.setColor(QPalette.ColorRole.Link, QColor(42, 130, 218))
+            palette.setColor(QPalette.ColorRole.Highlight, QColor(42, 130, 218))
+            palette.setColor(QPalette.ColorRole.HighlightedText, Qt.GlobalColor.black)
+        else:
+            palette = QApplication.instance().style().standardPalette()
+        return Theme(dark, palette, ThemeManager.build_font())
+
+    @classmethod
+    def get_theme(cls, dark):
+        """获取（必要时构建并缓存）主题"""
+        theme = cls._themes.get(dark)
+        if theme is None:
+            theme = cls._themes[dark] = cls.build_theme(dark)
+        return theme
+
+    @startup_timer.timed("ThemeManager.apply_theme")
+    def apply_theme(self):
+        """应用当前主题，只重新设置与已应用主题不同的部分"""
+        app = QApplication.instance()
+        applied = self.applied
+        if applied is None:
+            # 两种主题都使用 Fusion 风格，只需设置一次
+            app.setStyle("Fusion")
+        theme = self.get_theme(self.dark_theme)
+        if applied is None or applied.font != theme.font:
+            app.setFont(theme.font)
+        if applied is None or applied.palette != theme.palette:
+            app.setPalette(theme.palette)
+        self.parent.setProperty(StyleManager.THEME_PROPERTY, theme.dark)
+        if applied is None:
+            # 样式表只在启动时设置一次
+            StyleManager.apply_styles()
+        elif applied.dark != theme.dark:
+            self.refresher.repolish(self.parent)
+        self.applied = theme
 
     def toggle_theme(self):
         """切换主题"""
         self.dark_theme = not self.dark_theme
         self.apply_theme()
-        self.parent.status.showMessage("已切换到暗色主题" if self.dark_theme else "已切换到浅色主题")
\ No newline at end of file
+        self.parent.status.showMessage("已切换到暗色主题" if self.dark_theme else "已切换到浅色主题")
@@ -5,21 +5,33 @@
 基本计算Widget类定义
 """
 
-from math import log2, ceil
-import ipaddress
+from pathlib import Path
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox,
                                QLabel, QLineEdit, QComboBox, QTreeWidget,
                                QTreeWidgetItem, QPushButton, QRadioButton,
-                               QButtonGroup, QMessageBox)
+                               QButtonGroup, QMessageBox, QTextEdit, QFileDialog)
 from PyQt5.QtCore import Qt
 
+from core import batch, ipmath, prefix_io
+from widgets.result_table_model import ResultTableModel, create_result_view
+from widgets.live_updater import LiveUpdater
+from utils import startup_timer
+
 
 class BasicCalcWidget(QWidget):
+    BATCH_HEADERS = ["输入", "网络", "子网掩码", "广播地址/最后一个地址", "第一个可用IP",
+                     "最后一个可用IP", "可用主机数", "网络类别", "错误"]
+    # 各地址族的默认前缀长度（切换地址类型时掩码下拉框的初始值）
+    DEFAULT_PREFIXES = {ipmath.IPV4_BITS: 24, ipmath.IPV6_BITS: 64}
+
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
+        self.batch_result = None
+        self.live = LiveUpdater(self, self.calculate)
         self.build_ui()
 
+    @startup_timer.timed("BasicCalcWidget.build_ui")
     def build_ui(self):
         """构建用户界面"""
         main_layout = QVBoxLayout(self)
@@ -30,15 +42,61 @@ class BasicCalcWidget(QWidget):
         input_layout = QVBoxLayout(input_group)
         input_layout.setSpacing(10)
 
+        # 计算模式选择
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("计算模式:"), 0)
+        self.mode_group = QButtonGroup()
+        self.radio_single = QRadioButton("单个地址")
+        self.radio_batch = QRadioButton("批量计算")
+        self.mode_group.addButton(self.radio_single)
+        self.mode_group.addButton(self.radio_batch)
+        self.radio_single.setChecked(True)
+        mode_layout.addWidget(self.radio_single)
+        mode_layout.addWidget(self.radio_batch)
+        mode_layout.addStretch(1)
+        input_layout.addLayout(mode_layout)
+
         # IP地址输入
-        ip_layout = QHBoxLayout()
+        self.ip_box = QWidget()
+        ip_layout = QHBoxLayout(self.ip_box)
+        ip_layout.setContentsMargins(0, 0, 0, 0)
         ip_layout.addWidget(QLabel("IP地址/网络:"), 0)
         self.ip_edit = QLineEdit()
-        self.ip_edit.setPlaceholderText("例如: 192.168.1.1 或 192.168.1.0/24")
+        self.ip_edit.setPlaceholderText("例如: 192.168.1.1、192.168.1.0/24 或 2001:db8::1/64")
         ip_layout.addWidget(self.ip_edit, 1)
-        input_layout.addLayout(ip_layout)
+        input_layout.addWidget(self.ip_box)
+
+        # 批量输入
+        self.batch_box = QWidget()
+        batch_layout = QVBoxLayout(self.batch_box)
+        batch_layout.setContentsMargins(0, 0, 0, 0)
+        batch_label = QLabel("每行一个 IP[/掩码]，没有掩码的行按地址类型使用下面选择的前缀长度:")
+        batch_label.setWordWrap(True)
+        batch_layout.addWidget(batch_label)
+        default_layout = QHBoxLayout()
+        # 批量计算中没有掩码的行使用的前缀长度 {位数: 下拉框}
+        self.batch_prefix_combos = {}
+        for bits, name in ((ipmath.IPV4_BITS, "IPv4"), (ipmath.IPV6_BITS, "IPv6")):
+            combo = QComboBox()
+            combo.addItems([f"/{i}" for i in range(0, bits + 1)])
+            combo.setCurrentText(f"/{self.DEFAULT_PREFIXES[bits]}")
+            combo.setMinimumWidth(80)
+            default_layout.addWidget(QLabel(f"{name}:"), 0)
+            default_layout.addWidget(combo, 0)
+            self.batch_prefix_combos[bits] = combo
+        default_layout.addStretch(1)
+        batch_layout.addLayout(default_layout)
+        self.batch_edit = QTextEdit()
+        self.batch_edit.setPlaceholderText("例如:\n192.168.1.10/24\n10.0.0.5/255.255.0.0\n172.16.3.4\n2001:db8::1/64")
+        batch_layout.addWidget(self.batch_edit)
+        self.batch_box.setVisible(False)
+        input_layout.addWidget(self.batch_box)
 
-        # 掩码格式选择
+        # 掩码格式选择和掩码输入（单个地址）
+        self.mask_box = QWidget()
+        mask_box_layout = QVBoxLayout(self.mask_box)
+        mask_box_layout.setContentsMargins(0, 0, 0, 0)
+        mask_box_layout.setSpacing(10)
         mask_format_layout = QHBoxLayout()
         mask_format_layout.addWidget(QLabel("掩码格式:"), 0)
         self.mask_group = QButtonGroup()
@@ -50,14 +108,14 @@ class BasicCalcWidget(QWidget):
         mask_format_layout.addWidget(self.radio_cidr)
         mask_format_layout.addWidget(self.radio_dot)
         mask_format_layout.addStretch(1)
-        input_layout.addLayout(mask_format_layout)
+        mask_box_layout.addLayout(mask_format_layout)
 
         # 掩码输入
         mask_layout = QHBoxLayout()
         mask_layout.addWidget(QLabel("子网掩码:"), 0)
         self.mask_combo = QComboBox()
-        self.mask_combo.addItems([f"/{i}" for i in range(8, 33)])
-        self.mask_combo.setCurrentText("/24")
+        self.mask_bits = None
+        self.update_mask_range()
         self.mask_combo.setMinimumWidth(80)
         mask_layout.addWidget(self.mask_combo, 0)
         
@@ -66,7 +124,8 @@ class BasicCalcWidget(QWidget):
         self.mask_edit.setMinimumWidth(120)
         mask_layout.addWidget(self.mask_edit, 0)
         mask_layout.addStretch(1)
-        input_layout.addLayout(mask_layout)
+        mask_box_layout.addLayout(mask_layout)
+        input_layout.addWidget(self.mask_box)
 
         # 按钮区域
         button_layout = QHBoxLayout()
@@ -79,9 +138,19 @@ class BasicCalcWidget(QWidget):
         example_btn = QPushButton("示例")
         example_btn.setObjectName("exampleButton")
         example_btn.clicked.connect(self.fill_example)
+        self.import_btn = QPushButton("导入文件…")
+        self.import_btn.setObjectName("exampleButton")
+        self.import_btn.clicked.connect(self.import_file)
+        self.import_btn.setVisible(False)
+        self.export_btn = QPushButton("导出结果")
+        self.export_btn.setObjectName("exampleButton")
+        self.export_btn.clicked.connect(self.export_batch)
+        self.export_btn.setVisible(False)
         button_layout.addWidget(calc_btn)
         button_layout.addWidget(clear_btn)
         button_layout.addWidget(example_btn)
+        button_layout.addWidget(self.import_btn)
+        button_layout.addWidget(self.export_btn)
         input_layout.addLayout(button_layout)
 
         main_layout.addWidget(input_group)
@@ -94,69 +163,178 @@ class BasicCalcWidget(QWidget):
         self.tree.setColumnWidth(0, 350)
         self.tree.setAlternatingRowColors(True)
         result_layout.addWidget(self.tree)
+        self.batch_model = ResultTableModel(self.BATCH_HEADERS, self.batch_row, self)
+        self.batch_table = create_result_view(self.batch_model, [180, 160, 130, 170, 130, 130, 100, 90])
+        self.batch_table.setVisible(False)
+        result_layout.addWidget(self.batch_table)
         main_layout.addWidget(result_group)
 
         # 连接信号
+        self.radio_batch.toggled.connect(self.toggle_mode)
         self.radio_cidr.toggled.connect(self.toggle_mask)
+        self.ip_edit.textChanged.connect(self.update_mask_range)
+        self.live.watch(self.ip_edit.textChanged, self.mask_combo.currentTextChanged,
+                        self.mask_edit.textChanged, self.radio_cidr.toggled)
+
+    def update_mask_range(self):
+        """根据输入地址的类型（IPv4/IPv6）更新可选的前缀长度"""
+        bits = ipmath.IPV6_BITS if ":" in self.ip_edit.text() else ipmath.IPV4_BITS
+        if bits == self.mask_bits:
+            return
+        self.mask_bits = bits
+        self.mask_combo.clear()
+        self.mask_combo.addItems([f"/{i}" for i in range(0, bits + 1)])
+        self.mask_combo.setCurrentText(f"/{self.DEFAULT_PREFIXES[bits]}")
+
+    def toggle_mode(self):
+        """切换单个地址/批量计算"""
+        is_batch = self.radio_batch.isChecked()
+        for widget in (self.ip_box, self.mask_box, self.tree):
+            widget.setVisible(not is_batch)
+        for widget in (self.batch_box, self.batch_table, self.import_btn, self.export_btn):
+            widget.setVisible(is_batch)
 
     def toggle_mask(self):
         """切换掩码输入方式"""
         self.mask_combo.setVisible(self.radio_cidr.isChecked())
         self.mask_edit.setVisible(not self.radio_cidr.isChecked())
 
-    def calculate(self):
-        """执行计算"""
+    def current_mask(self):
+        """当前选择的掩码文本"""
+        if self.radio_cidr.isChecked():
+            return self.mask_combo.currentText()
+        return self.mask_edit.text().strip()
+
+    def calculate(self, live=False):
+        """执行计算（live 为实时计算：输入为空时不提示，错误显示在状态栏）"""
+        if self.radio_batch.isChecked():
+            if not live:
+                self.calculate_batch()
+            return
         ip = self.ip_edit.text().strip()
         if not ip:
-            QMessageBox.warning(self, "提示", "请输入IP地址")
+            if not live:
+                QMessageBox.warning(self, "提示", "请输入IP地址")
             return
         try:
-            if self.radio_cidr.isChecked():
-                mask = self.mask_combo.currentText()
-                net = ipaddress.IPv4Network(f"{ip}{mask}", strict=False)
-            else:
-                mask = self.mask_edit.text().strip()
-                net = ipaddress.IPv4Network(f"{ip}/{mask}", strict=False)
-            self.show_result(net)
-            self.parent.status.showMessage(f"基本计算完成: {net}")
+            key = ipmath.parse_network(ip, self.current_mask(), strict=False)
         except ValueError as e:
-            QMessageBox.critical(self, "错误", f"输入格式错误:\n{str(e)}")
+            self.live.warn("错误", f"输入格式错误:\n{str(e)}", live, critical=True)
+            return
+        info = self.live.cache.get(key)
+        if info is None and live:
+            # 单个地址的计算很快，实时计算时直接在界面线程中完成
+            info = ipmath.network_info(*key)
+        if info is not None:
+            self.on_calculated(info, key, live)
+            return
+        self.parent.run_task("基本计算", lambda progress: ipmath.network_info(*key),
+                             lambda info: self.on_calculated(info, key))
+
+    def on_calculated(self, info, key, live=False):
+        """计算完成（key 为规范化后的输入 (地址, 前缀长度, 位数)）；只有点击"计算"的结果记录到历史记录"""
+        self.live.cache.put(key, info)
+        network = ipmath.format_network(info.network, info.prefix, info.bits)
+        self.live.show(key, lambda: self.show_result(info))
+        if not live:
+            hosts = f"{info.usable_hosts} 个可用主机" if info.usable_hosts else "没有可用主机"
+            ip = self.ip_edit.text().strip()
+            self.parent.record_history(
+                "basic", ip if "/" in ip else f"{ip}/{self.current_mask().lstrip('/')}",
+                f"{network}，{hosts}", [(info.network, info.prefix, info.bits)],
+                (f"{desc}: {val}" for desc, val in ipmath.info_items(info)))
+        self.parent.status.showMessage(f"基本计算完成: {network}")
 
-    def show_result(self, net):
+    def show_result(self, info):
         """显示计算结果"""
         self.tree.clear()
-        items = [
-            ("IP地址/网络", str(net)),
-            ("网络地址", str(net.network_address)),
-            ("广播地址", str(net.broadcast_address)),
-            ("子网掩码 (CIDR)", f"/{net.prefixlen}"),
-            ("子网掩码 (点分十进制)", str(net.netmask)),
-            ("地址总数", str(net.num_addresses))
-        ]
-        if net.prefixlen <= 30:
-            items += [("可用主机范围", f"{net.network_address + 1} - {net.broadcast_address - 1}"),
-                      ("可用主机数量", str(net.num_addresses - 2))]
-        else:
-            items.append(("可用主机范围", "N/A"))
-        cls = "私有网络" if net.is_private else (
-            "环回" if net.is_loopback else (
-                "链路本地" if net.is_link_local else ("组播" if net.is_multicast else "公有网络")))
-        items.append(("网络类别", cls))
-        items.append(("IP地址 (二进制)", '.'.join(f"{int(x):08b}" for x in str(net.network_address).split('.'))))
-        items.append(("子网掩码 (二进制)", '.'.join(f"{int(x):08b}" for x in str(net.netmask).split('.'))))
-        for desc, val in items:
+        for desc, val in ipmath.info_items(info):
             QTreeWidgetItem(self.tree, [desc, val])
 
+    def default_prefixes(self):
+        """批量计算中没有掩码的行使用的前缀长度 {位数: 前缀长度}（IPv4 和 IPv6 各自选择）"""
+        return {bits: ipmath.parse_prefix(combo.currentText(), bits)
+                for bits, combo in self.batch_prefix_combos.items()}
+
+    def calculate_batch(self):
+        """批量计算文本框中的各行"""
+        lines = self.batch_edit.toPlainText().split("\n")
+        if not any(line.strip() for line in lines):
+            QMessageBox.warning(self, "提示", "请输入要计算的地址")
+            return
+        defaults = self.default_prefixes()
+        self.parent.run_task("批量计算",
+                             lambda progress: batch.calculate_lines(lines, defaults, progress=progress,
+                                                                    total=len(lines)),
+                             self.on_batch_calculated)
+
+    def import_file(self):
+        """从文件导入并批量计算（后台流式读取，不经过文本框）"""
+        defaults = self.default_prefixes()
+        path, _ = QFileDialog.getOpenFileName(self, "导入地址列表", str(Path.home()),
+                                              "Text Files (*.txt *.csv *.lst);;All Files (*)")
+        if not path:
+            return
+        name = Path(path).name
+        self.parent.run_task(f"导入 {name}",
+                             lambda progress: batch.calculate_lines(prefix_io.iter_file_lines(path, progress),
+                                                                    defaults),
+                             lambda result: self.on_batch_calculated(result, name),
+                             lambda e: QMessageBox.critical(self, "错误", f"读取文件失败: {str(e)}"))
+
+    def on_batch_calculated(self, result, source=None):
+        """批量计算完成"""
+        self.batch_result = result
+        self.batch_model.set_rows(result)
+        message = f"批量计算完成: {len(result)} 行"
+        if result.invalid_count:
+            message += f"，其中 {result.invalid_count} 行无效"
+        if source:
+            message = f"已从 {source} 导入，{message}"
+        self.parent.record_history("batch", source or f"{len(result)} 行输入", message,
+                                   result_lines=("\t".join(self.batch_row(row)) for row in result.rows))
+        self.parent.status.showMessage(message)
+
+    def batch_row(self, row):
+        """批量结果的一行"""
+        return batch.batch_record(row, self.batch_result.errors if self.batch_result else None)
+
+    def export_batch(self):
+        """将批量计算结果流式导出为CSV或JSONL"""
+        result = self.batch_result
+        if not result:
+            QMessageBox.warning(self, "提示", "请先进行批量计算")
+            return
+        path, selected = QFileDialog.getSaveFileName(
+            self, "导出结果", str(Path.home() / "batch_result.csv"),
+            "CSV Files (*.csv);;JSON Lines (*.jsonl)")
+        if not path:
+            return
+        fmt = "jsonl" if path.lower().endswith(".jsonl") or "jsonl" in selected else "csv"
+        self.parent.run_export("导出结果",
+                               lambda progress: batch.export_batch(path, result, fmt, progress),
+                               lambda count: self.parent.status.showMessage(f"已导出 {count} 行到 {path}"),
+                               lambda e: QMessageBox.critical(self, "错误", f"导出失败: {str(e)}"))
+
     def clear(self):
         """清除输入和结果"""
         self.ip_edit.clear()
+        self.batch_edit.clear()
         self.mask_combo.setCurrentText("/24")
         self.mask_edit.setText("255.255.255.0")
+        for bits, combo in self.batch_prefix_combos.items():
+            combo.setCurrentText(f"/{self.DEFAULT_PREFIXES[bits]}")
         self.tree.clear()
+        self.live.shown = None
+        self.batch_result = None
+        self.batch_model.clear()
 
     def fill_example(self):
         """填充示例数据"""
-        self.ip_edit.setText("192.168.1.100")
+        if self.radio_batch.isChecked():
+            self.batch_edit.setPlainText("192.168.1.100/24\n10.0.0.5/255.255.0.0\n172.16.3.4\n2001:db8::1/64")
+        else:
+            self.ip_edit.setText("192.168.1.100")
         self.mask_combo.setCurrentText("/24")
 
     def collect_text(self):
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后台计算任务类定义
+"""
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from core.progress import ProgressReporter, CalculationCancelled
+
+
+class WorkerSignals(QObject):
+    """后台任务信号（在界面线程中接收）"""
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    cancelled = pyqtSignal()
+
+
+class CalcWorker(QRunnable):
+    """在线程池中运行 fn(progress)，通过信号返回结果、异常或取消"""
+
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.signals = WorkerSignals()
+        self.reporter = ProgressReporter(self.signals.progress.emit)
+
+    def cancel(self):
+        """请求取消任务"""
+        self.reporter.cancel()
+
+    def run(self):
+        try:
+            result = self.fn(self.reporter)
+        except CalculationCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
\ No newline at end of file
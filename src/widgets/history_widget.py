@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+历史记录Widget类定义
+"""
+
+import time
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QLineEdit,
+                               QTextEdit, QPushButton, QCheckBox, QMessageBox, QSplitter)
+from PyQt5.QtCore import Qt, QTimer, QModelIndex
+
+from utils import history_manager, startup_timer
+from widgets.result_table_model import ResultTableModel, create_result_view
+
+
+# 搜索框停止输入后等待的时间（毫秒）
+SEARCH_DELAY_MS = 150
+
+
+class HistoryTableModel(ResultTableModel):
+    """分页加载的历史记录表格模型：视图滚动到末尾时才读取下一页"""
+
+    HEADERS = ["时间", "类型", "输入", "网络", "摘要"]
+
+    def __init__(self, history, parent=None):
+        super().__init__(self.HEADERS, self.entry_row, parent)
+        self.history = history
+        self.query = ""
+        # 是否可能还有下一页
+        self.more = False
+
+    @staticmethod
+    def entry_row(entry):
+        """一条记录的各列"""
+        return (time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.created)),
+                history_manager.KINDS.get(entry.kind, entry.kind), entry.input, entry.network, entry.summary)
+
+    def load(self, query):
+        """按搜索文本重新读取第一页"""
+        self.query = query
+        rows = self.history.search(query)
+        self.more = len(rows) == history_manager.PAGE_SIZE
+        self.set_rows(rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self.more or not self.rows:
+            return
+        page = self.history.search(self.query, self.rows[-1].id)
+        self.more = len(page) == history_manager.PAGE_SIZE
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+
+
+class HistoryWidget(QWidget):
+    """计算历史记录：搜索、分页浏览和查看保存的结果"""
+
+    def __init__(self, parent):
+        super().__init__()
+        self.parent = parent
+        # 有新记录时置为 True，下次显示时重新读取
+        self.stale = False
+        self.build_ui()
+
+    @startup_timer.timed("HistoryWidget.build_ui")
+    def build_ui(self):
+        """构建用户界面"""
+        main_layout = QVBoxLayout(self)
+        main_layout.setSpacing(15)
+
+        # 搜索组
+        search_group = QGroupBox("搜索历史记录")
+        search_layout = QVBoxLayout(search_group)
+        search_layout.setSpacing(10)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText(
+            "例如: 10.20.0.0/16（该网络内的记录）、10.20.1.5（包含该地址的记录）、2026-10-17、关键字")
+        self.search_edit.setClearButtonEnabled(True)
+        search_layout.addWidget(self.search_edit)
+
+        option_layout = QHBoxLayout()
+        self.results_check = QCheckBox(f"同时保存计算结果（每条最多 {history_manager.MAX_RESULT_LINES} 行）")
+        self.results_check.setChecked(bool(self.parent.config.get("history_results", False)))
+        self.results_check.toggled.connect(lambda checked: self.parent.config.set("history_results", checked))
+        option_layout.addWidget(self.results_check)
+        option_layout.addStretch(1)
+        clear_btn = QPushButton("清空历史")
+        clear_btn.setObjectName("clearButton")
+        clear_btn.clicked.connect(self.clear_history)
+        option_layout.addWidget(clear_btn)
+        search_layout.addLayout(option_layout)
+        main_layout.addWidget(search_group)
+
+        # 记录列表和保存的结果
+        result_group = QGroupBox("历史记录")
+        result_layout = QVBoxLayout(result_group)
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.model = HistoryTableModel(self.parent.history, self)
+        self.table = create_result_view(self.model, [150, 80, 260, 160])
+        self.table.selectionModel().currentRowChanged.connect(self.show_entry)
+        splitter.addWidget(self.table)
+        self.result_edit = QTextEdit()
+        self.result_edit.setReadOnly(True)
+        self.result_edit.setPlaceholderText("选择一条记录查看保存的计算结果")
+        splitter.addWidget(self.result_edit)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
+        result_layout.addWidget(splitter)
+        self.count_label = QLabel()
+        result_layout.addWidget(self.count_label)
+        main_layout.addWidget(result_group)
+
+        # 输入停止后才搜索
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.search)
+        self.search_edit.textChanged.connect(self.search_timer.start)
+        self.model.rowsInserted.connect(self.update_count)
+        self.search()
+
+    def showEvent(self, event):
+        """显示时读取上次显示之后的新记录"""
+        if self.stale:
+            self.search()
+        super().showEvent(event)
+
+    def search(self):
+        """按搜索框的内容重新读取记录"""
+        self.stale = False
+        self.result_edit.clear()
+        self.model.load(self.search_edit.text())
+        self.update_count()
+
+    def update_count(self):
+        """显示已读取的记录数"""
+        count = len(self.model.rows)
+        more = "，滚动到末尾时继续读取" if self.model.more else ""
+        self.count_label.setText(f"已显示 {count} 条记录{more}")
+
+    def show_entry(self, current, previous=None):
+        """显示选中记录保存的结果"""
+        if not current.isValid():
+            self.result_edit.clear()
+            return
+        result = self.parent.history.get_result(self.model.rows[current.row()].id)
+        self.result_edit.setPlainText(result if result is not None else "（这条记录没有保存计算结果）")
+
+    def clear_history(self):
+        """删除全部历史记录"""
+        if QMessageBox.question(self, "确认", "确定要删除全部历史记录吗？") != QMessageBox.StandardButton.Yes:
+            return
+        self.parent.history.clear()
+        self.search()
+        self.parent.status.showMessage("已清空历史记录")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+实时计算（边输入边计算）辅助类定义
+"""
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWidgets import QMessageBox
+
+from utils.lru_cache import LRUCache
+
+
+# 输入停止改变后等待的时间（毫秒），连续输入时只在停下来后计算一次
+LIVE_DELAY_MS = 300
+
+
+class LiveUpdater(QObject):
+    """
+    标签页的实时计算：输入改变后延迟计算（防抖），结果按规范化后的输入缓存
+
+    calculate(live=True) 由标签页实现：解析输入得到规范化的键（如 (网络, 前缀长度, 位数)），
+    先查 cache，命中时直接显示；显示前用 show() 跳过与当前显示相同的结果。
+    主窗口的"实时计算"开关关闭时 schedule() 不做任何事。
+    """
+
+    def __init__(self, widget, calculate, cache_size=64):
+        super().__init__(widget)
+        self.widget = widget
+        self.calculate = calculate
+        self.cache = LRUCache(cache_size)
+        # 当前显示的结果对应的键，None 表示显示的不是缓存中的结果（或没有结果）
+        self.shown = None
+        # 实时计算启动的后台任务编号
+        self.task_id = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(LIVE_DELAY_MS)
+        self.timer.timeout.connect(self.run)
+
+    def watch(self, *signals):
+        """这些信号触发时（输入改变）安排一次实时计算"""
+        for signal in signals:
+            signal.connect(self.schedule)
+
+    def schedule(self, *args):
+        """安排一次实时计算，在 LIVE_DELAY_MS 内再次调用会重新计时"""
+        if self.widget.parent.live_mode:
+            self.timer.start()
+
+    def run(self):
+        """防抖计时结束，执行实时计算"""
+        window = self.widget.parent
+        if not window.live_mode:
+            return
+        # 不打断用户启动的后台任务（如导出），等它结束后再计算
+        if window.current_task is not None and window.task_id != self.task_id:
+            self.timer.start()
+            return
+        self.calculate(live=True)
+
+    def run_task(self, live, description, fn, on_finished):
+        """启动后台任务，实时计算启动的任务会被下一次实时计算替换"""
+        window = self.widget.parent
+        window.run_task(description, fn, on_finished)
+        self.task_id = window.task_id if live else None
+
+    def show(self, key, render):
+        """调用 render() 显示 key 对应的结果；与当前显示的结果相同时跳过，返回是否重新显示"""
+        if key is not None and key == self.shown:
+            return False
+        render()
+        self.shown = key
+        return True
+
+    def warn(self, title, message, live, critical=False):
+        """提示输入问题：实时计算时显示在状态栏（不打断输入），否则弹出对话框"""
+        if live:
+            self.widget.parent.status.showMessage(message.replace("\n", " "))
+        elif critical:
+            QMessageBox.critical(self.widget, title, message)
+        else:
+            QMessageBox.warning(self.widget, title, message)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+地址归属查询Widget类定义
+"""
+
+from pathlib import Path
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QTextEdit,
+                               QPushButton, QRadioButton, QButtonGroup, QMessageBox, QFileDialog)
+
+from core import ipmath, lookup, prefix_io, prefix_set
+from widgets.result_table_model import ResultTableModel, create_result_view
+from utils import startup_timer
+
+
+class LookupWidget(QWidget):
+    """按前缀表（最长前缀匹配）查询地址归属"""
+
+    DETAIL_HEADERS = ["地址", "匹配前缀", "标签"]
+    SUMMARY_HEADERS = ["前缀", "标签", "地址数"]
+
+    def __init__(self, parent):
+        super().__init__()
+        self.parent = parent
+        # 已构建的前缀索引，前缀表改变后重新构建
+        self.index = None
+        # 从文件导入的前缀表（不经过文本框）
+        self.table_path = None
+        self.build_ui()
+
+    @startup_timer.timed("LookupWidget.build_ui")
+    def build_ui(self):
+        """构建用户界面"""
+        main_layout = QVBoxLayout(self)
+        main_layout.setSpacing(15)
+
+        # 前缀表组
+        table_group = QGroupBox("前缀表")
+        table_layout = QVBoxLayout(table_group)
+        table_layout.setSpacing(10)
+        table_header = QHBoxLayout()
+        table_header.addWidget(QLabel("每行一个网络，可在后面加标签(用逗号或空格分隔):"), 1)
+        import_table_btn = QPushButton("导入前缀表…")
+        import_table_btn.setObjectName("exampleButton")
+        import_table_btn.clicked.connect(self.import_table)
+        table_header.addWidget(import_table_btn, 0)
+        table_layout.addLayout(table_header)
+        self.table_edit = QTextEdit()
+        self.table_edit.setPlaceholderText("例如:\n10.0.0.0/8 内网\n10.20.0.0/16 办公网\n2001:db8::/32 实验室")
+        self.table_edit.textChanged.connect(self.on_table_edited)
+        table_layout.addWidget(self.table_edit)
+        self.table_label = QLabel()
+        self.table_label.setVisible(False)
+        table_layout.addWidget(self.table_label)
+        main_layout.addWidget(table_group)
+
+        # 查询地址组
+        addr_group = QGroupBox("查询地址")
+        addr_layout = QVBoxLayout(addr_group)
+        addr_layout.setSpacing(10)
+        self.addr_edit = QTextEdit()
+        self.addr_edit.setPlaceholderText("每行一个IP地址，例如:\n10.20.1.5\n10.30.0.1\n2001:db8::1")
+        addr_layout.addWidget(self.addr_edit)
+
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("结果:"), 0)
+        self.mode_group = QButtonGroup()
+        self.radio_detail = QRadioButton("逐条显示")
+        self.radio_summary = QRadioButton("按前缀汇总")
+        self.mode_group.addButton(self.radio_detail)
+        self.mode_group.addButton(self.radio_summary)
+        self.radio_detail.setChecked(True)
+        mode_layout.addWidget(self.radio_detail)
+        mode_layout.addWidget(self.radio_summary)
+        mode_layout.addStretch(1)
+        addr_layout.addLayout(mode_layout)
+
+        button_layout = QHBoxLayout()
+        query_btn = QPushButton("查询")
+        query_btn.setObjectName("calculateButton")
+        query_btn.clicked.connect(self.query)
+        clear_btn = QPushButton("清除")
+        clear_btn.setObjectName("clearButton")
+        clear_btn.clicked.connect(self.clear)
+        file_btn = QPushButton("查询文件…")
+        file_btn.setObjectName("exampleButton")
+        file_btn.clicked.connect(self.query_file)
+        button_layout.addWidget(query_btn)
+        button_layout.addWidget(clear_btn)
+        button_layout.addWidget(file_btn)
+        addr_layout.addLayout(button_layout)
+        main_layout.addWidget(addr_group)
+
+        # 结果显示组
+        result_group = QGroupBox("查询结果")
+        result_layout = QVBoxLayout(result_group)
+        self.model = ResultTableModel(self.DETAIL_HEADERS, lambda row: row, self)
+        self.table = create_result_view(self.model, [260, 220])
+        result_layout.addWidget(self.table)
+        main_layout.addWidget(result_group)
+
+    def on_table_edited(self):
+        """前缀表文本改变：放弃已导入的文件和已构建的索引"""
+        self.index = None
+        if self.table_path is not None and self.table_edit.toPlainText():
+            self.table_path = None
+            self.table_label.setVisible(False)
+
+    def import_table(self):
+        """选择前缀表文件（查询时在后台流式读取，不经过文本框）"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "导入前缀表", str(Path.home()),
+            f"Text Files (*.txt *.csv *.lst);;前缀集 (*{prefix_set.EXTENSION});;All Files (*)")
+        if not path:
+            return
+        self.table_edit.clear()
+        self.table_path = path
+        self.index = None
+        self.table_label.setText(f"前缀表文件: {Path(path).name}")
+        self.table_label.setVisible(True)
+
+    def run_query(self, description, query, on_finished, writes_file=False):
+        """
+        在后台线程中（必要时先构建前缀索引）执行 query(index, progress)
+
+        完成后在界面线程调用 on_finished(index, 查询结果)。
+        writes_file 为 True 时作为导出任务运行（不会被新的计算取消）。
+        """
+        index, path = self.index, self.table_path
+        text = self.table_edit.toPlainText()
+        if index is None and path is None and not text.strip():
+            QMessageBox.warning(self, "提示", "请输入或导入前缀表")
+            return
+
+        def run(progress):
+            parsed = None
+            table = index
+            if table is None:
+                if path is not None:
+                    parsed = lookup.read_prefix_table(path, progress)
+                else:
+                    parsed = lookup.parse_prefix_table(text.split("\n"))
+                if not parsed.networks:
+                    raise ValueError("前缀表中没有有效的网络")
+                table = lookup.PrefixIndex(parsed.networks, parsed.labels)
+            return parsed, table, query(table, progress)
+
+        def finished(result):
+            parsed, table, query_result = result
+            if parsed is not None:
+                self.index = table
+                if parsed.invalid_count:
+                    self.show_invalid_report(parsed, "前缀表中")
+            on_finished(table, query_result)
+
+        (self.parent.run_export if writes_file else self.parent.run_task)(description, run, finished)
+
+    def query(self):
+        """查询文本框中的地址"""
+        lines = self.addr_edit.toPlainText().split("\n")
+        if not any(line.strip() for line in lines):
+            QMessageBox.warning(self, "提示", "请输入要查询的地址")
+            return
+        if self.radio_summary.isChecked():
+            self.run_query("地址归属汇总",
+                           lambda index, progress: lookup.aggregate(index, lines, progress, len(lines)),
+                           self.on_aggregated)
+            return
+
+        def match(index, progress):
+            result = lookup.LookupResult(index)
+            matches = list(lookup.match_lines(index, lines, result, progress, len(lines)))
+            counts = result.counts + [0]
+            for _, owner in matches:
+                counts[owner] += 1
+            result.set_counts(counts)
+            return result, matches
+
+        self.run_query("地址归属查询", match, self.on_matched)
+
+    def query_file(self):
+        """查询地址文件：逐条结果流式写入CSV文件，汇总结果显示在表格中"""
+        in_path, _ = QFileDialog.getOpenFileName(self, "选择地址文件", str(Path.home()),
+                                                 "Text Files (*.txt *.csv *.log);;All Files (*)")
+        if not in_path:
+            return
+        name = Path(in_path).name
+        if self.radio_summary.isChecked():
+            self.run_query(f"汇总 {name}",
+                           lambda index, progress: lookup.aggregate(
+                               index, prefix_io.iter_file_lines(in_path, progress)),
+                           self.on_aggregated)
+            return
+        out_path, _ = QFileDialog.getSaveFileName(self, "保存查询结果", str(Path(in_path).with_suffix(".lookup.csv")),
+                                                  "CSV Files (*.csv)")
+        if not out_path:
+            return
+        self.run_query(f"查询 {name}",
+                       lambda index, progress: lookup.classify_file(index, in_path, out_path, progress),
+                       lambda index, result: self.on_classified(result, out_path), writes_file=True)
+
+    def on_matched(self, index, result):
+        """逐条查询完成"""
+        result, matches = result
+        names = [ipmath.format_network(*sn) for sn in index.networks] + ["未匹配"]
+        labels = index.labels + [""]
+        self.model.headers = self.DETAIL_HEADERS
+        self.model.formatter = lambda row: (row[0], names[row[1]], labels[row[1]])
+        self.model.set_rows(matches)
+        self.report_result(result, f"查询了 {len(matches)} 个地址")
+
+    def on_aggregated(self, index, result):
+        """汇总查询完成"""
+        self.show_summary(result)
+        self.report_result(result, f"查询了 {result.total} 个地址")
+
+    def on_classified(self, result, out_path):
+        """地址文件查询完成，表格中显示汇总结果"""
+        self.show_summary(result)
+        self.report_result(result, f"已将 {result.total} 个地址的查询结果写入 {out_path}")
+
+    def show_summary(self, result):
+        """显示按前缀汇总的结果"""
+        self.model.headers = self.SUMMARY_HEADERS
+        self.model.formatter = lambda row: (row[0], row[1], str(row[2]))
+        self.model.set_rows(result.rows())
+
+    def report_result(self, result, message):
+        """在状态栏显示查询统计，并报告无效地址"""
+        if result.invalid_count:
+            self.show_invalid_report(result, "")
+        summary = f"{message}，其中 {result.unmatched} 个没有匹配的前缀"
+        table = Path(self.table_path).name if self.table_path else f"{len(result.networks)} 个前缀"
+        self.parent.record_history(
+            "lookup", f"前缀表: {table}", summary,
+            result_lines=(f"{ipmath.format_network(*sn)}\t{label}\t{count}"
+                          for sn, label, count in zip(result.networks, result.labels, result.counts)))
+        self.parent.status.showMessage(summary)
+
+    def show_invalid_report(self, parsed, where):
+        """显示无效项报告（只列出前几条，完整的有上限列表放在详细信息中）"""
+        box = QMessageBox(QMessageBox.Icon.Warning, "警告",
+                          f"{where}共有 {parsed.invalid_count} 个无效项，已跳过:\n"
+                          + parsed.format_invalid(limit=10), parent=self)
+        if parsed.invalid_count > 10:
+            box.setDetailedText(parsed.format_invalid())
+        box.exec()
+
+    def clear(self):
+        """清除输入和结果"""
+        self.table_edit.clear()
+        self.addr_edit.clear()
+        self.table_path = None
+        self.table_label.setVisible(False)
+        self.index = None
+        self.model.clear()
@@ -7,24 +7,35 @@
 
 import sys
 from pathlib import Path
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, 
-                               QMenuBar, QStatusBar, QMessageBox, QFileDialog, QAction)
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout,
+                               QMenuBar, QStatusBar, QMessageBox, QFileDialog, QAction,
+                               QProgressBar, QPushButton)
+from PyQt5.QtCore import Qt, QThreadPool
 
 from widgets.basic_calc_widget import BasicCalcWidget
 from widgets.subnet_widget import SubnetWidget
 from widgets.supernet_widget import SupernetWidget
+from widgets.lookup_widget import LookupWidget
+from widgets.history_widget import HistoryWidget
+from widgets.calc_worker import CalcWorker
+from core import batch, export, ipmath
 from utils.theme_manager import ThemeManager
 from resources.resource_manager import ResourceManager
 from utils.config_manager import ConfigManager
+from utils.history_manager import HistoryManager
 
 
 class SubnetCalculator(QMainWindow):
+    # 标签页：(属性名, 组件类, 标题)，组件在第一次打开该标签页时才创建
+    TABS = [
+        ("tab_basic", BasicCalcWidget, "基本计算"),
+        ("tab_subnet", SubnetWidget, "子网划分"),
+        ("tab_super", SupernetWidget, "超网计算"),
+        ("tab_lookup", LookupWidget, "地址归属"),
+        ("tab_history", HistoryWidget, "历史记录"),
+    ]
+
     def __init__(self, config = None):
-        super().__init__()
-        self.config = config or ConfigManager()
-        super().__init__()
-        self.config = config or ConfigManager()
         super().__init__()
         self.config = config or ConfigManager()
         self.setWindowTitle("子网计算器v5.0")
@@ -37,14 +48,31 @@ class SubnetCalculator(QMainWindow):
         # 设置窗口图标
         ResourceManager.set_window_icon(self)
         
-        # 主题管理器
-        self.theme_manager = ThemeManager(self)
+        # 主题管理器：在创建组件之前应用一次主题，组件创建时直接使用最终样式
+        self.theme_manager = ThemeManager(self, self.config.is_dark_theme())
+        self.theme_manager.apply_theme()
+
+        # 计算历史记录（数据库在第一次记录或打开历史记录标签页时才打开）
+        self.history = HistoryManager()
+
+        # 实时计算（输入改变后自动计算）
+        self.live_mode = bool(self.config.get("live_mode", False))
+
+        # 后台计算任务（同一时间只保留最新的一个）
+        self.current_task = None
+        self.task_id = 0
+        # 后台导出任务（写文件，不会被新的计算任务取消）
+        self.export_task = None
+        self.after_export = []
         
         self.init_ui()
         
-        # 设置上次使用的标签页
+        # 设置上次使用的标签页（只创建这一个标签页的组件）
         last_tab = int(self.config.get("last_tab", 0) or 0)
+        if not 0 <= last_tab < len(self.TABS):
+            last_tab = 0
         self.tabs.setCurrentIndex(last_tab)
+        self.ensure_tab(last_tab)
 
     def init_ui(self):
         """初始化用户界面"""
@@ -80,6 +108,11 @@ class SubnetCalculator(QMainWindow):
         toggle_theme.setShortcut("Ctrl+T")
         toggle_theme.triggered.connect(self.toggle_theme)
         view_menu.addAction(toggle_theme)
+        live_action = QAction("实时计算", self)
+        live_action.setCheckable(True)
+        live_action.setChecked(self.live_mode)
+        live_action.toggled.connect(self.set_live_mode)
+        view_menu.addAction(live_action)
 
         # 帮助菜单
         help_menu = menu.addMenu("帮助")
@@ -99,22 +132,167 @@ class SubnetCalculator(QMainWindow):
         self.setStatusBar(self.status)
         self.status.showMessage("就绪")
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setVisible(False)
+        self.status.addPermanentWidget(self.progress_bar)
+        self.cancel_btn = QPushButton("取消")
+        self.cancel_btn.setObjectName("clearButton")
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.clicked.connect(self.cancel_task)
+        self.status.addPermanentWidget(self.cancel_btn)
+
+        self.export_bar = QProgressBar()
+        self.export_bar.setRange(0, 100)
+        self.export_bar.setMaximumWidth(150)
+        self.export_bar.setFormat("导出 %p%")
+        self.export_bar.setVisible(False)
+        self.status.addPermanentWidget(self.export_bar)
+        self.export_cancel_btn = QPushButton("取消导出")
+        self.export_cancel_btn.setObjectName("clearButton")
+        self.export_cancel_btn.setVisible(False)
+        self.export_cancel_btn.clicked.connect(self.cancel_export)
+        self.status.addPermanentWidget(self.export_cancel_btn)
+
     def create_tabs(self):
         """创建标签页"""
         self.tabs = QTabWidget()
-        self.tabs.currentChanged.connect(self.on_tab_changed)
         self.setCentralWidget(self.tabs)
+        for attr, _, title in self.TABS:
+            setattr(self, attr, None)
+            page = QWidget()
+            QVBoxLayout(page).setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(page, title)
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+
+    def ensure_tab(self, index):
+        """返回标签页中的组件，第一次打开时才创建"""
+        attr, widget_class, _ = self.TABS[index]
+        widget = getattr(self, attr)
+        if widget is None:
+            widget = widget_class(self)
+            setattr(self, attr, widget)
+            self.tabs.widget(index).layout().addWidget(widget)
+        return widget
+
+    def run_task(self, description, fn, on_finished, on_failed=None):
+        """
+        在后台线程中执行 fn(progress)
 
-        self.tab_basic = BasicCalcWidget(self)
-        self.tab_subnet = SubnetWidget(self)
-        self.tab_super = SupernetWidget(self)
+        完成后在界面线程调用 on_finished(结果)；出错时调用 on_failed(异常)。
+        开始新任务会取消正在进行的旧任务，旧任务的结果会被丢弃。
+        """
+        if self.current_task is not None:
+            self.current_task.cancel()
+        self.task_id += 1
+        task_id = self.task_id
+        worker = CalcWorker(fn)
 
-        self.tabs.addTab(self.tab_basic, "基本计算")
-        self.tabs.addTab(self.tab_subnet, "子网划分")
-        self.tabs.addTab(self.tab_super, "超网计算")
+        def finished(result):
+            if self.on_task_done(task_id):
+                on_finished(result)
+
+        def failed(error):
+            if self.on_task_done(task_id):
+                (on_failed or self.show_task_error)(error)
+
+        worker.signals.progress.connect(lambda percent: self.on_task_progress(task_id, percent))
+        worker.signals.finished.connect(finished)
+        worker.signals.failed.connect(failed)
+        worker.signals.cancelled.connect(lambda: self.on_task_done(task_id))
+        self.current_task = worker
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.cancel_btn.setVisible(True)
+        self.status.showMessage(f"正在计算: {description}")
+        QThreadPool.globalInstance().start(worker)
+
+    def run_export(self, description, fn, on_finished, on_failed=None):
+        """
+        在后台线程中执行写文件的任务 fn(progress)
+
+        导出任务与计算任务分开：开始新的计算不会取消导出，导出有单独的进度条和取消按钮；
+        同一时间只进行一个导出。导出被取消时总会在状态栏提示文件没有保存。
+        """
+        if self.export_task is not None:
+            QMessageBox.information(self, "提示", "正在导出文件，请等待完成或取消后再试")
+            return
+        worker = CalcWorker(fn)
+
+        def done():
+            self.export_task = None
+            self.export_bar.setVisible(False)
+            self.export_cancel_btn.setVisible(False)
+            callbacks, self.after_export = self.after_export, []
+            for callback in callbacks:
+                callback()
+
+        def finished(result):
+            done()
+            on_finished(result)
+
+        def failed(error):
+            done()
+            (on_failed or self.show_task_error)(error)
+
+        def cancelled():
+            done()
+            self.status.showMessage(f"{description}已取消，文件没有保存")
+
+        worker.signals.progress.connect(self.export_bar.setValue)
+        worker.signals.finished.connect(finished)
+        worker.signals.failed.connect(failed)
+        worker.signals.cancelled.connect(cancelled)
+        self.export_task = worker
+        self.export_bar.setValue(0)
+        self.export_bar.setVisible(True)
+        self.export_cancel_btn.setVisible(True)
+        self.status.showMessage(f"正在导出: {description}")
+        QThreadPool.globalInstance().start(worker)
+
+    def when_export_done(self, callback):
+        """没有正在进行的导出时立即调用 callback()，否则在导出结束（完成、失败或取消）后调用"""
+        if self.export_task is None:
+            callback()
+        else:
+            self.after_export.append(callback)
+
+    def cancel_export(self):
+        """取消当前导出任务（取消完成后提示）"""
+        if self.export_task is not None:
+            self.export_task.cancel()
+
+    def on_task_progress(self, task_id, percent):
+        """后台任务进度更新"""
+        if task_id == self.task_id:
+            self.progress_bar.setValue(percent)
+
+    def on_task_done(self, task_id):
+        """后台任务结束，返回结果是否仍然有效（不是被新任务替换的旧任务）"""
+        if task_id != self.task_id:
+            return False
+        self.current_task = None
+        self.progress_bar.setVisible(False)
+        self.cancel_btn.setVisible(False)
+        self.status.showMessage("就绪")
+        return True
+
+    def cancel_task(self):
+        """取消当前后台任务"""
+        if self.current_task is not None:
+            self.current_task.cancel()
+            self.on_task_done(self.task_id)
+            self.task_id += 1
+            self.status.showMessage("计算已取消")
+
+    def show_task_error(self, error):
+        """显示后台任务的错误"""
+        QMessageBox.critical(self, "错误", str(error))
 
     def on_tab_changed(self, index):
         """标签页切换事件"""
+        self.ensure_tab(index)
         if self.config:
             self.config.set("last_tab", index)
 
@@ -126,26 +304,61 @@ class SubnetCalculator(QMainWindow):
             self.config.set_theme(self.theme_manager.dark_theme)
         self.status.showMessage("已切换到暗色主题" if self.theme_manager.dark_theme else "已切换到浅色主题")
 
+    def set_live_mode(self, enabled):
+        """开启/关闭实时计算，开启时立即按当前输入计算已打开的标签页"""
+        self.live_mode = enabled
+        if self.config:
+            self.config.set("live_mode", enabled)
+        for attr, _, _ in self.TABS:
+            live = getattr(getattr(self, attr), "live", None)
+            if live is not None:
+                live.schedule()
+        self.status.showMessage("已开启实时计算" if enabled else "已关闭实时计算")
+
+    def record_history(self, kind, input_text, summary, networks=(), result_lines=None):
+        """
+        记录一次计算到历史记录
+
+        networks 为涉及的网络；result_lines 为结果文本各行的可迭代对象，只在开启"保存计算结果"时读取。
+        """
+        if not self.config.get("history_results", False):
+            result_lines = None
+        self.history.add(kind, input_text, summary, networks, result_lines)
+        if self.tab_history is not None:
+            self.tab_history.stale = True
+
     def save_all_results(self):
-        """保存所有结果到文件"""
-        content = "=== 子网计算器结果 ===\n\n"
-        basic = self.tab_basic.collect_text()
-        if basic:
-            content += "--- 基本计算结果 ---\n" + basic + "\n"
-        subnet = self.tab_subnet.collect_text()
-        if subnet:
-            content += "--- 子网划分结果 ---\n" + subnet + "\n"
-        supernet = self.tab_super.collect_text()
-        if supernet:
-            content += "--- 超网计算结果 ---\n" + supernet + "\n"
+        """保存所有结果到文件（子网划分结果在后台线程中流式写入）"""
+        # 还没有打开过的标签页没有结果
+        basic_tab, subnet_tab, super_tab = self.tab_basic, self.tab_subnet, self.tab_super
+        basic = basic_tab.collect_text() if basic_tab else ""
+        basic_batch = basic_tab.batch_result if basic_tab else None
+        supernet = super_tab.collect_text() if super_tab else ""
+        subnets, labels = (subnet_tab.subnets, subnet_tab.labels) if subnet_tab else ([], None)
 
         path, _ = QFileDialog.getSaveFileName(self, "保存结果", str(Path.home()), "Text Files (*.txt)")
-        if path:
-            try:
-                Path(path).write_text(content, encoding="utf-8")
-                self.status.showMessage(f"已保存到 {path}")
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"保存文件失败: {str(e)}")
+        if not path:
+            return
+
+        def write(f, progress):
+            f.write("=== 子网计算器结果 ===\n\n")
+            if basic:
+                f.write("--- 基本计算结果 ---\n" + basic + "\n")
+            if basic_batch:
+                f.write("--- 批量计算结果 ---\n")
+                batch.write_batch_text(f, basic_batch, progress)
+                f.write("\n")
+            if ipmath.sequence_length(subnets):
+                f.write("--- 子网划分结果 ---\n")
+                export.write_plan_text(f, subnets, progress, labels)
+                f.write("\n")
+            if supernet:
+                f.write("--- 超网计算结果 ---\n" + supernet + "\n")
+
+        # 先写入临时文件，取消或出错时不会留下不完整的文件
+        self.run_export("保存结果", lambda progress: export.write_atomic(path, lambda f: write(f, progress)),
+                        lambda _: self.status.showMessage(f"已保存到 {path}"),
+                        lambda e: QMessageBox.critical(self, "错误", f"保存文件失败: {str(e)}"))
 
     def show_help(self):
         """显示帮助信息"""
@@ -155,6 +368,7 @@ class SubnetCalculator(QMainWindow):
                                 "快捷键:\n"
                                 "Ctrl+S: 保存结果\n"
                                 "Ctrl+T: 切换主题\n"
+                                "视图→实时计算: 输入时自动计算\n"
                                 "Ctrl+Q: 退出程序\n"
                                 "F1: 使用说明")
 
@@ -168,6 +382,8 @@ class SubnetCalculator(QMainWindow):
                                 "• 基本计算: 计算IP地址相关信息\n"
                                 "• 子网划分: 按子网数量或主机数量划分\n"
                                 "• 超网计算: 多个网络合并为超网\n"
+                                "• 地址归属: 按前缀表查询地址的最长匹配前缀\n"
+                                "• 历史记录: 搜索以前的计算\n"
                                 "• 主题切换: 支持浅色和暗色主题")
 
     def closeEvent(self, a0):
@@ -176,5 +392,9 @@ class SubnetCalculator(QMainWindow):
         if self.config:
             self.config.set("window_width", self.width())
             self.config.set("window_height", self.height())
+        for task in (self.current_task, self.export_task):
+            if task is not None:
+                task.cancel()
+        self.history.close()
         if a0 is not None:
             a0.accept()
\ No newline at end of file
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结果表格模型类定义
+"""
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import QTableView, QHeaderView, QAbstractItemView
+
+
+class ResultTableModel(QAbstractTableModel):
+    """
+    按需格式化的结果表格模型
+
+    rows 只需支持 len() 和下标访问，formatter 把一行数据转换为各列文本。
+    视图只会请求可见行，所以无论结果有多少行，格式化开销和内存都是固定的。
+    """
+
+    CACHE_SIZE = 512
+
+    # 视图能显示的最大行数：行号和像素位置在Qt中都是32位整数，更多的行只能导出查看
+    MAX_ROWS = 50_000_000
+
+    def __init__(self, headers, formatter, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.formatter = formatter
+        self.rows = []
+        self._cache = {}
+
+    def set_rows(self, rows):
+        """替换全部结果行"""
+        self.beginResetModel()
+        self.rows = rows
+        self._cache = {}
+        self.endResetModel()
+
+    def clear(self):
+        """清空结果"""
+        self.set_rows([])
+
+    def total_rows(self):
+        """结果的实际行数（可能超过 MAX_ROWS）"""
+        try:
+            return len(self.rows)
+        except OverflowError:
+            return self.rows.count
+
+    def is_truncated(self):
+        """结果是否多于视图能显示的行数"""
+        return self.total_rows() > self.MAX_ROWS
+
+    def row_values(self, row):
+        """获取某一行格式化后的各列文本"""
+        values = self._cache.get(row)
+        if values is None:
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            values = self._cache[row] = self.formatter(self.rows[row])
+        return values
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else min(self.total_rows(), self.MAX_ROWS)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        return self.row_values(index.row())[index.column()]
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+
+def create_result_view(model, column_widths=(), row_numbers=True):
+    """创建显示结果模型的表格视图（固定行高，避免逐行测量）"""
+    view = QTableView()
+    view.setModel(model)
+    view.setAlternatingRowColors(True)
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setWordWrap(False)
+    view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+    view.verticalHeader().setDefaultSectionSize(view.fontMetrics().height() + 8)
+    view.verticalHeader().setVisible(row_numbers)
+    view.horizontalHeader().setStretchLastSection(True)
+    for i, w in enumerate(column_widths):
+        view.setColumnWidth(i, w)
+    return view
\ No newline at end of file
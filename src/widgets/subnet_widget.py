@@ -5,21 +5,32 @@
 子网划分Widget类定义
 """
 
-from math import log2, ceil
-import ipaddress
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox,
-                               QLabel, QLineEdit, QComboBox, QTreeWidget,
-                               QTreeWidgetItem, QPushButton, QRadioButton,
-                               QButtonGroup, QMessageBox)
+                               QLabel, QLineEdit, QComboBox, QPushButton, QRadioButton,
+                               QButtonGroup, QMessageBox, QFileDialog, QTextEdit)
 from PyQt5.QtCore import Qt
+from pathlib import Path
+
+from core import ipmath, export, prefix_set, vlsm
+from widgets.result_table_model import ResultTableModel, create_result_view
+from widgets.live_updater import LiveUpdater
+from utils import startup_timer
 
 
 class SubnetWidget(QWidget):
+    V4_HEADERS = ["网络地址", "第一个可用IP", "最后一个可用IP", "广播地址", "子网掩码"]
+    V6_HEADERS = ["网络地址", "第一个可用IP", "最后一个可用IP", "最后一个地址", "子网掩码"]
+    VLSM_HEADERS = ["名称", "需求主机数", "分配网络", "第一个可用IP", "最后一个可用IP", "广播地址", "可用主机数"]
+
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
+        self.subnets = []
+        self.labels = None
+        self.live = LiveUpdater(self, self.calculate)
         self.build_ui()
 
+    @startup_timer.timed("SubnetWidget.build_ui")
     def build_ui(self):
         """构建用户界面"""
         main_layout = QVBoxLayout(self)
@@ -34,7 +45,7 @@ class SubnetWidget(QWidget):
         ip_layout = QHBoxLayout()
         ip_layout.addWidget(QLabel("网络地址:"), 0)
         self.ip_edit = QLineEdit()
-        self.ip_edit.setPlaceholderText("例如: 192.168.1.0")
+        self.ip_edit.setPlaceholderText("例如: 192.168.1.0 或 2001:db8::")
         ip_layout.addWidget(self.ip_edit, 1)
         param_layout.addLayout(ip_layout)
 
@@ -42,8 +53,6 @@ class SubnetWidget(QWidget):
         mask_layout = QHBoxLayout()
         mask_layout.addWidget(QLabel("子网掩码:"), 0)
         self.mask_combo = QComboBox()
-        self.mask_combo.addItems([f"/{i}" for i in range(8, 33)])
-        self.mask_combo.setCurrentText("/24")
         self.mask_combo.setMinimumWidth(80)
         mask_layout.addWidget(self.mask_combo, 0)
         mask_layout.addStretch(1)
@@ -55,11 +64,17 @@ class SubnetWidget(QWidget):
         self.method_group = QButtonGroup()
         self.radio_count = QRadioButton("按子网数量")
         self.radio_hosts = QRadioButton("按主机数量")
+        self.radio_prefix = QRadioButton("按前缀长度")
+        self.radio_vlsm = QRadioButton("VLSM规划")
         self.method_group.addButton(self.radio_count)
         self.method_group.addButton(self.radio_hosts)
+        self.method_group.addButton(self.radio_prefix)
+        self.method_group.addButton(self.radio_vlsm)
         self.radio_count.setChecked(True)
         method_layout.addWidget(self.radio_count)
         method_layout.addWidget(self.radio_hosts)
+        method_layout.addWidget(self.radio_prefix)
+        method_layout.addWidget(self.radio_vlsm)
         method_layout.addStretch(1)
         param_layout.addLayout(method_layout)
 
@@ -82,6 +97,33 @@ class SubnetWidget(QWidget):
         hosts_layout.addStretch(1)
         param_layout.addLayout(hosts_layout)
 
+        # 新前缀长度选择
+        new_prefix_layout = QHBoxLayout()
+        new_prefix_layout.addWidget(QLabel("新前缀长度:"), 0)
+        self.new_prefix_combo = QComboBox()
+        self.new_prefix_combo.setMinimumWidth(80)
+        self.new_prefix_combo.setVisible(False)
+        new_prefix_layout.addWidget(self.new_prefix_combo, 0)
+        new_prefix_layout.addStretch(1)
+        param_layout.addLayout(new_prefix_layout)
+
+        # VLSM需求输入
+        self.vlsm_box = QWidget()
+        vlsm_layout = QVBoxLayout(self.vlsm_box)
+        vlsm_layout.setContentsMargins(0, 0, 0, 0)
+        vlsm_header = QHBoxLayout()
+        vlsm_header.addWidget(QLabel("子网需求（每行: 名称, 主机数[, 个数]）:"), 1)
+        vlsm_import_btn = QPushButton("导入需求…")
+        vlsm_import_btn.setObjectName("exampleButton")
+        vlsm_import_btn.clicked.connect(self.import_requirements)
+        vlsm_header.addWidget(vlsm_import_btn, 0)
+        vlsm_layout.addLayout(vlsm_header)
+        self.vlsm_edit = QTextEdit()
+        self.vlsm_edit.setPlaceholderText("例如:\n用户, 500\n服务器, 60\n无线, 200\n互联, 2, 20")
+        vlsm_layout.addWidget(self.vlsm_edit)
+        self.vlsm_box.setVisible(False)
+        param_layout.addWidget(self.vlsm_box)
+
         # 按钮区域
         button_layout = QHBoxLayout()
         calc_btn = QPushButton("计算")
@@ -90,8 +132,12 @@ class SubnetWidget(QWidget):
         clear_btn = QPushButton("清除")
         clear_btn.setObjectName("clearButton")
         clear_btn.clicked.connect(self.clear)
+        export_btn = QPushButton("导出完整方案")
+        export_btn.setObjectName("exampleButton")
+        export_btn.clicked.connect(self.export_plan)
         button_layout.addWidget(calc_btn)
         button_layout.addWidget(clear_btn)
+        button_layout.addWidget(export_btn)
         param_layout.addLayout(button_layout)
 
         main_layout.addWidget(param_group)
@@ -99,79 +145,212 @@ class SubnetWidget(QWidget):
         # 结果显示组
         result_group = QGroupBox("子网划分结果")
         result_layout = QVBoxLayout(result_group)
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["网络地址", "第一个可用IP", "最后一个可用IP", "广播地址", "子网掩码"])
-        for i, w in enumerate([180, 150, 150, 180, 150]):
-            self.tree.setColumnWidth(i, w)
-        self.tree.setAlternatingRowColors(True)
-        result_layout.addWidget(self.tree)
+        self.model = ResultTableModel(self.V4_HEADERS, lambda sn: ipmath.subnet_row(*sn), self)
+        self.table = create_result_view(self.model, [180, 150, 150, 180, 150])
+        result_layout.addWidget(self.table)
         main_layout.addWidget(result_group)
 
         # 连接信号
         self.radio_count.toggled.connect(self.toggle_method)
+        self.radio_hosts.toggled.connect(self.toggle_method)
+        self.radio_vlsm.toggled.connect(self.toggle_method)
+        self.ip_edit.textChanged.connect(self.update_mask_range)
+        self.mask_bits = None
+        self.update_mask_range()
+        self.live.watch(self.ip_edit.textChanged, self.mask_combo.currentTextChanged,
+                        self.count_edit.textChanged, self.hosts_edit.textChanged,
+                        self.new_prefix_combo.currentTextChanged, self.vlsm_edit.textChanged,
+                        self.method_group.buttonToggled)
+
+    def update_mask_range(self):
+        """根据输入地址的类型（IPv4/IPv6）更新可选的前缀长度"""
+        bits = ipmath.IPV6_BITS if ":" in self.ip_edit.text() else ipmath.IPV4_BITS
+        if bits == self.mask_bits:
+            return
+        self.mask_bits = bits
+        ipv4 = bits == ipmath.IPV4_BITS
+        self.mask_combo.clear()
+        self.mask_combo.addItems([f"/{i}" for i in range(0, bits + 1)])
+        self.mask_combo.setCurrentText("/24" if ipv4 else "/48")
+        self.new_prefix_combo.clear()
+        self.new_prefix_combo.addItems([f"/{i}" for i in range(1, bits + 1)])
+        self.new_prefix_combo.setCurrentText("/26" if ipv4 else "/64")
 
     def toggle_method(self):
         """切换划分方法"""
         self.count_edit.setVisible(self.radio_count.isChecked())
-        self.hosts_edit.setVisible(not self.radio_count.isChecked())
+        self.hosts_edit.setVisible(self.radio_hosts.isChecked())
+        self.new_prefix_combo.setVisible(self.radio_prefix.isChecked())
+        self.vlsm_box.setVisible(self.radio_vlsm.isChecked())
 
-    def calculate(self):
-        """执行子网划分计算"""
+    def calculate(self, live=False):
+        """执行子网划分计算（live 为实时计算：输入为空时不提示，问题显示在状态栏）"""
         net_addr = self.ip_edit.text().strip()
         mask = self.mask_combo.currentText()
         if not net_addr:
-            QMessageBox.warning(self, "提示", "请输入网络地址")
+            if not live:
+                QMessageBox.warning(self, "提示", "请输入网络地址")
             return
+        warn = self.live.warn
         try:
-            net = ipaddress.IPv4Network(f"{net_addr}{mask}", strict=False)
+            network, prefix, bits = ipmath.parse_network(net_addr, mask, strict=False)
             if self.radio_count.isChecked():
                 count = int(self.count_edit.text())
                 if count <= 0:
-                    QMessageBox.warning(self, "提示", "子网数量必须大于0")
+                    warn("提示", "子网数量必须大于0", live)
                     return
-                bits = ceil(log2(count))
-                new_prefix = net.prefixlen + bits
-                if new_prefix > 30:
-                    QMessageBox.warning(self, "警告", "子网划分太细，会导致主机数为0")
+                new_prefix = ipmath.prefix_for_count(prefix, count)
+                if new_prefix > (bits - 2 if bits == ipmath.IPV4_BITS else bits):
+                    warn("警告", "子网划分太细，会导致主机数为0", live)
                     return
-                subnets = list(net.subnets(new_prefix=new_prefix))
-            else:
+            elif self.radio_hosts.isChecked():
                 hosts = int(self.hosts_edit.text())
                 if hosts <= 0:
-                    QMessageBox.warning(self, "提示", "主机数量必须大于0")
+                    warn("提示", "主机数量必须大于0", live)
+                    return
+                new_prefix = ipmath.prefix_for_hosts(hosts, bits)
+                if new_prefix <= prefix:
+                    warn("警告", "主机数超出网络容量", live)
+                    return
+            elif self.radio_vlsm.isChecked():
+                requirements = vlsm.parse_requirements(self.vlsm_edit.toPlainText())
+                if not requirements:
+                    if not live:
+                        QMessageBox.warning(self, "提示", "请输入子网需求")
                     return
-                bits = ceil(log2(hosts + 2))
-                new_prefix = 32 - bits
-                if new_prefix <= net.prefixlen:
-                    QMessageBox.warning(self, "警告", "主机数超出网络容量")
+                key = ("vlsm", network, prefix, bits, tuple(requirements))
+                plan = self.live.cache.get(key)
+                if plan is not None:
+                    self.on_planned(plan, key, live)
+                    return
+                self.live.run_task(live, "VLSM规划",
+                                   lambda progress: vlsm.plan(network, prefix, requirements, bits, progress),
+                                   lambda plan: self.on_planned(plan, key, live))
+                return
+            else:
+                new_prefix = ipmath.parse_prefix(self.new_prefix_combo.currentText(), bits)
+                if new_prefix < prefix:
+                    warn("警告", "新前缀长度不能小于网络的前缀长度", live)
                     return
-                subnets = list(net.subnets(new_prefix=new_prefix))
-            self.show_result(subnets)
-            self.parent.status.showMessage(f"成功划分 {len(subnets)} 个子网")
         except ValueError as e:
-            QMessageBox.critical(self, "错误", f"输入格式错误:\n{str(e)}")
+            warn("错误", f"输入格式错误:\n{str(e)}", live, critical=True)
+            return
+        # 不同的划分方式得到相同的新前缀长度时结果相同，共用一个键
+        key = ("split", network, prefix, bits, new_prefix)
+        subnets = self.live.cache.get(key)
+        if subnets is None and live:
+            # 划分结果是按需生成的序列，创建很快，实时计算时直接在界面线程中完成
+            subnets = ipmath.split(network, prefix, new_prefix, bits)
+        if subnets is not None:
+            self.on_calculated(subnets, key, live)
+            return
+        self.parent.run_task("子网划分", lambda progress: ipmath.split(network, prefix, new_prefix, bits),
+                             lambda subnets: self.on_calculated(subnets, key))
+
+    def on_calculated(self, subnets, key, live=False):
+        """计算完成（key 为规范化后的输入）；只有点击"计算"的结果记录到历史记录"""
+        self.live.cache.put(key, subnets)
+        self.live.show(key, lambda: self.show_result(subnets))
+        if not live:
+            _, network, prefix, bits, new_prefix = key
+            self.parent.record_history(
+                "split", f"{ipmath.format_network(network, prefix, bits)} → /{new_prefix}",
+                f"{ipmath.sequence_length(subnets)} 个子网", [(network, prefix, bits)],
+                ("\t".join(ipmath.subnet_row(*sn)) for sn in subnets))
+        message = f"成功划分 {ipmath.sequence_length(subnets)} 个子网"
+        if self.model.is_truncated():
+            message += f"，表格中显示前 {self.model.MAX_ROWS} 个，完整方案请使用\"导出完整方案\""
+        self.parent.status.showMessage(message)
 
     def show_result(self, subnets):
         """显示子网划分结果"""
-        self.tree.clear()
-        for sn in subnets[:100]:  # 限制显示前100个子网
-            first = str(sn.network_address + 1) if sn.prefixlen <= 30 else "N/A"
-            last = str(sn.broadcast_address - 1) if sn.prefixlen <= 30 else "N/A"
-            QTreeWidgetItem(self.tree, [str(sn.network_address), first, last,
-                                        str(sn.broadcast_address), str(sn.netmask)])
+        self.subnets = subnets
+        self.labels = None
+        self.model.headers = self.V4_HEADERS if subnets.bits == ipmath.IPV4_BITS else self.V6_HEADERS
+        self.model.formatter = lambda sn: ipmath.subnet_row(*sn)
+        self.model.set_rows(subnets)
+
+    def on_planned(self, plan, key, live=False):
+        """VLSM规划完成（key 为规范化后的输入）；只有点击"计算"的结果记录到历史记录"""
+        self.live.cache.put(key, plan)
+        self.live.show(key, lambda: self.show_plan(plan))
+        free = sum(1 << (sn.bits - sn.prefix) for sn in plan.free)
+        message = f"VLSM规划完成: 已分配 {len(plan.allocations)} 个子网，剩余 {free} 个空闲地址"
+        if plan.unallocated:
+            message += f"，{len(plan.unallocated)} 个需求无法分配"
+        if not live:
+            _, network, prefix, bits, requirements = key
+            self.parent.record_history(
+                "vlsm", f"{ipmath.format_network(network, prefix, bits)}，{len(requirements)} 个需求",
+                message.split(": ", 1)[1], [(network, prefix, bits)],
+                ("\t".join(self.vlsm_row(row)) for row in self.model.rows))
+        self.parent.status.showMessage(message)
+
+    def show_plan(self, plan):
+        """显示VLSM规划结果：已分配（从大到小）、无法分配的需求、剩余空闲块"""
+        self.subnets = [ipmath.Subnet(a.network, a.prefix, a.bits) for a in plan.allocations]
+        self.labels = [a.name for a in plan.allocations]
+        rows = [(a.name, a.hosts, sn) for a, sn in zip(plan.allocations, self.subnets)]
+        rows += [(req.name, req.hosts, None) for req in plan.unallocated]
+        rows += [("(空闲)", None, sn) for sn in plan.free]
+        self.model.headers = self.VLSM_HEADERS
+        self.model.formatter = self.vlsm_row
+        self.model.set_rows(rows)
+
+    @staticmethod
+    def vlsm_row(row):
+        """VLSM结果的一行"""
+        name, hosts, sn = row
+        hosts_text = "" if hosts is None else str(hosts)
+        if sn is None:
+            return (name, hosts_text, "无法分配", "", "", "", "")
+        _, first, last, broadcast, _ = ipmath.subnet_row(*sn)
+        usable = ipmath.usable_range(*sn)
+        capacity = str(usable[1] - usable[0] + 1) if usable else "0"
+        return (name, hosts_text, ipmath.format_network(*sn), first, last, broadcast, capacity)
+
+    def import_requirements(self):
+        """从文件导入VLSM需求"""
+        path, _ = QFileDialog.getOpenFileName(self, "导入子网需求", str(Path.home()),
+                                              "Text Files (*.txt *.csv);;All Files (*)")
+        if not path:
+            return
+        try:
+            self.vlsm_edit.setPlainText(Path(path).read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.critical(self, "错误", f"读取文件失败: {str(e)}")
+            return
+        self.radio_vlsm.setChecked(True)
 
     def clear(self):
         """清除输入和结果"""
         self.ip_edit.clear()
         self.mask_combo.setCurrentText("/24")
+        self.new_prefix_combo.setCurrentText("/26")
         self.count_edit.setText("4")
         self.hosts_edit.clear()
-        self.tree.clear()
-
-    def collect_text(self):
-        """收集文本结果用于保存"""
-        txt = ""
-        for i in range(self.tree.topLevelItemCount()):
-            item = self.tree.topLevelItem(i)
-            txt += f"{item.text(0)} 掩码:{item.text(4)} 可用:{item.text(1)}-{item.text(2)} 广播:{item.text(3)}\n"
-        return txt
\ No newline at end of file
+        self.vlsm_edit.clear()
+        self.subnets = []
+        self.labels = None
+        self.live.shown = None
+        self.model.clear()
+
+    def export_plan(self):
+        """将完整的子网划分方案流式导出为CSV、JSONL或前缀集（不含名称）"""
+        subnets, labels = self.subnets, self.labels
+        if not ipmath.sequence_length(subnets):
+            QMessageBox.warning(self, "提示", "请先进行子网划分计算")
+            return
+        path, selected = QFileDialog.getSaveFileName(
+            self, "导出完整方案", str(Path.home() / "subnet_plan.csv"),
+            f"CSV Files (*.csv);;JSON Lines (*.jsonl);;前缀集 (*{prefix_set.EXTENSION})")
+        if not path:
+            return
+        if path.lower().endswith(prefix_set.EXTENSION) or prefix_set.EXTENSION in selected:
+            fmt = "prefixset"
+        else:
+            fmt = "jsonl" if path.lower().endswith(".jsonl") or "jsonl" in selected else "csv"
+        self.parent.run_export("导出完整方案",
+                               lambda progress: export.export_plan(path, subnets, fmt, progress, labels),
+                               lambda count: self.parent.status.showMessage(f"已导出 {count} 个子网到 {path}"),
+                               lambda e: QMessageBox.critical(self, "错误", f"导出失败: {str(e)}"))
@@ -5,20 +5,162 @@
 超网计算Widget类定义
 """
 
-import ipaddress
+from collections import Counter
 from pathlib import Path
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox,
-                               QLabel, QTextEdit, QTreeWidget, QTreeWidgetItem,
-                               QPushButton, QMessageBox, QFileDialog)
-from PyQt5.QtCore import Qt
+                               QLabel, QLineEdit, QTextEdit, QPushButton, QRadioButton, QButtonGroup,
+                               QComboBox, QMessageBox, QFileDialog)
+from PyQt5.QtCore import Qt, QTimer
+
+from core import compact, export, ipmath, lookup, overlap, prefix_io, prefix_set
+from widgets.result_table_model import ResultTableModel, create_result_view
+from widgets.live_updater import LiveUpdater
+from utils import startup_timer
+
+
+def optional_hilbert():
+    """利用率图需要 NumPy：第一次使用时才导入（不影响启动时间），未安装时返回 None"""
+    try:
+        from core import hilbert
+    except ImportError:
+        return None
+    return hilbert
+
+
+class SupernetResultRows:
+    """
+    超网计算结果的各行（属性, 值），按行号即时生成
+
+    前3行是输入概况，之后每个超网固定占 ROWS_PER_SUPERNET 行（最后一个超网没有空行）。
+    """
+
+    ROWS_PER_SUPERNET = 9
+
+    def __init__(self, supernets, original, counts):
+        self.supernets = supernets
+        self.original = original
+        self.counts = counts
+
+    def __len__(self):
+        if not self.supernets:
+            return 0
+        return 3 + len(self.supernets) * self.ROWS_PER_SUPERNET - 1
+
+    def __getitem__(self, row):
+        if row < 3:
+            return self.header_row(row)
+        idx, field = divmod(row - 3, self.ROWS_PER_SUPERNET)
+        return self.supernet_row(idx, field)
+
+    def header_row(self, row):
+        """输入概况"""
+        original = self.original
+        if row == 0:
+            return ("输入的网络数量", str(len(original)))
+        if row == 1:
+            return ("原始网络列表", ", ".join(ipmath.format_network(*n) for n in original[:5])
+                    + (", ..." if len(original) > 5 else ""))
+        return ("", "")
+
+    def supernet_row(self, idx, field):
+        """第 idx 个超网的第 field 个属性"""
+        sn = self.supernets[idx]
+        ipv4 = sn.bits == ipmath.IPV4_BITS
+
+        def fmt(value):
+            return ipmath.format_address(value, sn.bits)
+
+        if field == 0:
+            return (f"超网 #{idx + 1}", ipmath.format_network(*sn))
+        if field == 1:
+            return ("网络地址", fmt(sn.network))
+        if field == 2:
+            return ("广播地址" if ipv4 else "最后一个地址", fmt(ipmath.broadcast_of(*sn)))
+        if field == 3:
+            return ("子网掩码 (CIDR)", f"/{sn.prefix}")
+        if field == 4:
+            return ("子网掩码 (点分十进制)" if ipv4 else "子网掩码", fmt(ipmath.prefix_to_netmask(sn.prefix, sn.bits)))
+        if field == 5:
+            return ("地址总数", str(1 << (sn.bits - sn.prefix)))
+        if field == 6:
+            hosts = ipmath.usable_range(*sn)
+            return ("可用主机范围", f"{fmt(hosts[0])} - {fmt(hosts[1])}" if hosts else "N/A")
+        if field == 7:
+            return ("包含的原始网络", f"{self.counts[idx]}个")
+        return ("", "")
+
+
+# 集合运算及显示名称
+SET_OPERATION_NAMES = {
+    "union": "并集 A ∪ B",
+    "intersection": "交集 A ∩ B",
+    "difference": "差集 A − B",
+    "symmetric_difference": "对称差 A Δ B",
+}
+
+
+def head(networks, count=3):
+    """网络列表的前几个网络（用于摘要）"""
+    text = ", ".join(ipmath.format_network(*sn) for sn in networks[:count])
+    return text + (", ..." if len(networks) > count else "")
+
+
+def address_totals(networks):
+    """网络列表包含的地址总数（IPv4、IPv6分别统计）"""
+    counts = {bits: 0 for bits in ipmath.FAMILY_BITS}
+    for _, prefix, bits in networks:
+        counts[bits] += 1 << (bits - prefix)
+    return "，".join(f"IPv{4 if bits == ipmath.IPV4_BITS else 6}: {count}"
+                    for bits, count in counts.items() if count) or "0"
+
+
+class NetworkListRows:
+    """
+    结果为网络列表时的各行（属性, 值），按行号即时生成
+
+    前面是概况各行和一个空行，之后每个结果网络占一行（名称为 "label #序号"）。
+    """
+
+    def __init__(self, summary, networks, label="结果"):
+        self.summary = list(summary) + [("", "")]
+        self.networks = networks
+        self.label = label
+
+    def __len__(self):
+        return len(self.summary) + len(self.networks)
+
+    def __getitem__(self, row):
+        if row < len(self.summary):
+            return self.summary[row]
+        idx = row - len(self.summary)
+        return (f"{self.label} #{idx + 1}", ipmath.format_network(*self.networks[idx]))
 
 
 class SupernetWidget(QWidget):
+    # 实时计算缓存的结果数（每个结果包含全部输入网络，只保留最近几个）
+    LIVE_CACHE_SIZE = 8
+
+    MAP_HINT = "滚轮缩放，拖动平移，双击显示全图；鼠标悬停查看网络"
+
+    OVERLAP_HEADERS = ["组", "类型", "网络", "行号", "冲突的网络", "行号"]
+
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
+        self.live = LiveUpdater(self, self.calculate, self.LIVE_CACHE_SIZE)
+        # 当前结果中可以保存为前缀集的网络列表 {名称: 网络列表}，第一项为计算结果
+        self.saveable = {}
+        # 导入的前缀集（.smps 文件，内存映射），不再被当前结果引用时关闭
+        self.prefix_sets = []
+        # 集合运算的两个输入（A、B）使用的文件，None 表示使用文本框的内容
+        self.files = [None, None]
+        # 当前显示的重叠检测结果（OverlapReport），用于导出
+        self.overlaps = None
+        # 当前显示的 (父网络, 按地址排序的空闲块)，用于查找首个可用位置
+        self.free = None
         self.build_ui()
 
+    @startup_timer.timed("SupernetWidget.build_ui")
     def build_ui(self):
         """构建用户界面"""
         main_layout = QVBoxLayout(self)
@@ -28,14 +170,87 @@ class SupernetWidget(QWidget):
         input_group = QGroupBox("输入网络列表")
         input_layout = QVBoxLayout(input_group)
         input_layout.setSpacing(10)
-        
-        label = QLabel("网络地址(用逗号或换行分隔):")
-        label.setWordWrap(True)
-        input_layout.addWidget(label)
-        
+
+        # 计算方式选择
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("计算方式:"), 0)
+        self.mode_group = QButtonGroup()
+        self.radio_collapse = QRadioButton("超网合并")
+        self.radio_setop = QRadioButton("集合运算")
+        self.radio_overlap = QRadioButton("重叠检测")
+        self.radio_range = QRadioButton("范围转换")
+        self.radio_free = QRadioButton("空闲空间")
+        self.mode_group.addButton(self.radio_collapse)
+        self.mode_group.addButton(self.radio_setop)
+        self.mode_group.addButton(self.radio_overlap)
+        self.mode_group.addButton(self.radio_range)
+        self.mode_group.addButton(self.radio_free)
+        self.radio_collapse.setChecked(True)
+        mode_layout.addWidget(self.radio_collapse)
+        mode_layout.addWidget(self.radio_setop)
+        mode_layout.addWidget(self.radio_overlap)
+        mode_layout.addWidget(self.radio_range)
+        mode_layout.addWidget(self.radio_free)
+        self.op_combo = QComboBox()
+        for operation, name in SET_OPERATION_NAMES.items():
+            self.op_combo.addItem(name, operation)
+        self.op_combo.setCurrentIndex(self.op_combo.findData("difference"))
+        self.op_combo.setEnabled(False)
+        mode_layout.addWidget(self.op_combo)
+        mode_layout.addStretch(1)
+        input_layout.addLayout(mode_layout)
+
+        # 空闲空间的父网络和首个可用位置查询
+        self.free_box = QWidget()
+        free_layout = QHBoxLayout(self.free_box)
+        free_layout.setContentsMargins(0, 0, 0, 0)
+        free_layout.addWidget(QLabel("父网络:"), 0)
+        self.parent_edit = QLineEdit()
+        self.parent_edit.setPlaceholderText("例如: 10.0.0.0/8")
+        free_layout.addWidget(self.parent_edit, 1)
+        free_layout.addWidget(QLabel("查找首个可用 /"), 0)
+        self.fit_edit = QLineEdit()
+        self.fit_edit.setPlaceholderText("24")
+        self.fit_edit.setMaximumWidth(60)
+        free_layout.addWidget(self.fit_edit, 0)
+        self.fit_label = QLabel()
+        free_layout.addWidget(self.fit_label, 1)
+        self.free_box.setVisible(False)
+        self.fit_edit.textChanged.connect(self.update_fit)
+        input_layout.addWidget(self.free_box)
+
+        lists_layout = QHBoxLayout()
+        a_layout = QVBoxLayout()
+        self.label_a = QLabel("网络地址(用逗号或换行分隔):")
+        self.label_a.setWordWrap(True)
+        a_layout.addWidget(self.label_a)
         self.text_edit = QTextEdit()
-        self.text_edit.setPlaceholderText("例如:\n192.168.1.0/24, 192.168.2.0/24\n或:\n192.168.1.0/24\n192.168.2.0/24")
-        input_layout.addWidget(self.text_edit)
+        self.text_edit.setPlaceholderText("例如:\n192.168.1.0/24, 192.168.2.0/24\n或:\n192.168.1.0/24\n192.168.2.0/24\n2001:db8::/48\n2001:db8:1::/48")
+        a_layout.addWidget(self.text_edit)
+        lists_layout.addLayout(a_layout, 1)
+
+        # 集合运算的第二个输入
+        self.b_box = QWidget()
+        b_layout = QVBoxLayout(self.b_box)
+        b_layout.setContentsMargins(0, 0, 0, 0)
+        b_header = QHBoxLayout()
+        b_header.addWidget(QLabel("集合 B（用逗号或换行分隔）:"), 1)
+        import_b_btn = QPushButton("导入B…")
+        import_b_btn.setObjectName("exampleButton")
+        import_b_btn.clicked.connect(lambda: self.import_operand(1))
+        b_header.addWidget(import_b_btn, 0)
+        b_layout.addLayout(b_header)
+        self.b_edit = QTextEdit()
+        self.b_edit.setPlaceholderText("例如:\n192.168.1.128/25\n10.0.0.0/8")
+        b_layout.addWidget(self.b_edit)
+        self.b_box.setVisible(False)
+        lists_layout.addWidget(self.b_box, 1)
+        input_layout.addLayout(lists_layout)
+        self.edits = [self.text_edit, self.b_edit]
+        self.placeholders = [edit.placeholderText() for edit in self.edits]
+        self.mode_group.buttonToggled.connect(self.toggle_mode)
+        self.live.watch(self.text_edit.textChanged, self.b_edit.textChanged, self.mode_group.buttonToggled,
+                        self.op_combo.currentIndexChanged, self.parent_edit.textChanged)
 
         # 按钮区域
         button_layout = QHBoxLayout()
@@ -45,80 +260,625 @@ class SupernetWidget(QWidget):
         clear_btn = QPushButton("清除")
         clear_btn.setObjectName("clearButton")
         clear_btn.clicked.connect(self.clear)
+        import_btn = QPushButton("导入文件…")
+        import_btn.setObjectName("exampleButton")
+        import_btn.clicked.connect(self.import_file)
+        save_btn = QPushButton("保存前缀集…")
+        save_btn.setObjectName("exampleButton")
+        save_btn.clicked.connect(self.save_prefix_set)
         button_layout.addWidget(calc_btn)
         button_layout.addWidget(clear_btn)
+        self.export_btn = QPushButton("导出冲突…")
+        self.export_btn.setObjectName("exampleButton")
+        self.export_btn.clicked.connect(self.export_overlaps)
+        self.export_btn.setVisible(False)
+        button_layout.addWidget(import_btn)
+        button_layout.addWidget(save_btn)
+        button_layout.addWidget(self.export_btn)
         input_layout.addLayout(button_layout)
 
         main_layout.addWidget(input_group)
 
         # 结果显示组
         result_group = QGroupBox("超网计算结果")
-        result_layout = QVBoxLayout(result_group)
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["属性", "值"])
-        self.tree.setColumnWidth(0, 300)
-        self.tree.setAlternatingRowColors(True)
-        result_layout.addWidget(self.tree)
+        result_layout = QHBoxLayout(result_group)
+        self.model = ResultTableModel(["属性", "值"], lambda row: row, self)
+        self.table = create_result_view(self.model, [300], row_numbers=False)
+        result_layout.addWidget(self.table, 1)
+        self.overlap_model = ResultTableModel(self.OVERLAP_HEADERS, self.overlap_row, self)
+        self.overlap_table = create_result_view(self.overlap_model, [60, 80, 200, 70, 200])
+        self.overlap_table.setVisible(False)
+        result_layout.addWidget(self.overlap_table, 1)
+
+        # 空闲空间的利用率图（视图在第一次切换到空闲空间时才创建）
+        self.map_box = QWidget()
+        self.map_layout = QVBoxLayout(self.map_box)
+        self.map_layout.setContentsMargins(0, 0, 0, 0)
+        self.map_view = None
+        self.map_index = None
+        self.map_label = QLabel()
+        self.map_label.setWordWrap(True)
+        self.map_layout.addWidget(self.map_label)
+        self.map_box.setVisible(False)
+        result_layout.addWidget(self.map_box, 1)
         main_layout.addWidget(result_group)
 
-    def calculate(self):
-        """执行超网计算"""
+    def toggle_mode(self, *args):
+        """切换计算方式"""
+        setop = self.radio_setop.isChecked()
+        is_overlap = self.radio_overlap.isChecked()
+        if not setop and any(self.files):
+            self.detach_files()
+        self.b_box.setVisible(setop)
+        self.op_combo.setEnabled(setop)
+        self.free_box.setVisible(self.radio_free.isChecked())
+        self.map_box.setVisible(self.radio_free.isChecked())
+        if self.radio_free.isChecked():
+            self.ensure_map_view()
+        if setop:
+            self.label_a.setText("集合 A（用逗号或换行分隔）:")
+        elif self.radio_range.isChecked():
+            self.label_a.setText("地址范围（每行一个或多个用逗号分隔的 \"起始地址 - 结束地址\"，也可以是CIDR网络或单个地址）:")
+        elif self.radio_free.isChecked():
+            self.label_a.setText("已分配的网络（用逗号或换行分隔）:")
+        else:
+            self.label_a.setText("网络地址(用逗号或换行分隔):")
+        self.table.setVisible(not is_overlap)
+        self.overlap_table.setVisible(is_overlap)
+        self.export_btn.setVisible(is_overlap)
+
+    def ensure_map_view(self):
+        """创建利用率图视图；没有安装 NumPy 时只显示提示"""
+        if self.map_view is not None:
+            return
+        if optional_hilbert() is None:
+            self.map_label.setText("安装 NumPy（pip install numpy）后可以显示利用率图")
+            return
+        from widgets.utilization_map import UtilizationMapView
+        self.map_view = UtilizationMapView()
+        self.map_view.hovered.connect(self.show_map_cell)
+        self.map_layout.insertWidget(0, self.map_view, 1)
+        self.map_label.setText(self.MAP_HINT)
+
+    def show_map(self, umap, index):
+        """显示利用率图（umap 为 None 时清除）"""
+        self.map_index = index
+        if self.map_view is None:
+            return
+        self.map_view.set_map(umap)
+        self.map_label.setText(self.MAP_HINT)
+
+    def show_map_cell(self, cell, utilization):
+        """显示鼠标所在格子的网络、利用率和所属的已分配网络"""
+        if cell is None:
+            self.map_label.setText(self.MAP_HINT)
+            return
+        text = f"{ipmath.format_network(*cell)}  已分配 {utilization:.0%}"
+        owner = self.map_index.lookup(cell.network, cell.bits) if self.map_index is not None else -1
+        if owner >= 0:
+            text += f"，属于 {ipmath.format_network(*self.map_index.networks[owner])}"
+        self.map_label.setText(text)
+
+    def calculate(self, live=False):
+        """执行超网计算（live 为实时计算：输入为空时不提示，问题显示在状态栏）"""
+        if self.radio_setop.isChecked():
+            self.calculate_set(live)
+            return
+        if self.radio_overlap.isChecked():
+            self.calculate_overlaps(live)
+            return
+        if self.radio_range.isChecked():
+            self.calculate_ranges(live)
+            return
+        if self.radio_free.isChecked():
+            self.calculate_free(live)
+            return
         txt = self.text_edit.toPlainText().strip()
         if not txt:
-            QMessageBox.warning(self, "提示", "请输入网络列表")
+            if not live:
+                QMessageBox.warning(self, "提示", "请输入网络列表")
+            return
+        lines = txt.split("\n")
+        key = ("collapse", prefix_io.normalize_lines(lines))
+        result = self.live.cache.get(key)
+        if result is not None:
+            self.on_calculated(result, key=key, live=live)
+            return
+        self.live.run_task(live, "超网计算",
+                           lambda progress: self.compute(
+                               prefix_io.parse_lines(lines, progress=progress, total=len(lines), compact=True),
+                               progress),
+                           lambda result: self.on_calculated(result, key=key, live=live))
+
+    def calculate_overlaps(self, live=False):
+        """重叠检测：找出互相重复或包含的网络及其行号"""
+        txt = self.text_edit.toPlainText()
+        if not txt.strip():
+            if not live:
+                QMessageBox.warning(self, "提示", "请输入网络列表")
             return
+        # 不去掉开头的空行，行号与文本框一致
+        lines = txt.split("\n")
+        key = ("overlap", prefix_io.normalize_lines(lines))
+        result = self.live.cache.get(key)
+        if result is not None:
+            self.on_overlaps(result, key=key, live=live)
+            return
+        self.live.run_task(live, "重叠检测",
+                           lambda progress: self.compute_overlaps(prefix_io.parse_lines(
+                               lines, progress=progress, total=len(lines), line_numbers=True), progress),
+                           lambda result: self.on_overlaps(result, key=key, live=live))
+
+    def parse_parent(self, live=False):
+        """解析空闲空间的父网络，无效时提示并返回 None"""
+        text = self.parent_edit.text().strip()
+        if not text:
+            if not live:
+                QMessageBox.warning(self, "提示", "请输入父网络")
+            return None
         try:
-            networks = []
-            invalid = []
-            for part in txt.replace("\n", ",").split(","):
-                part = part.strip()
-                if not part:
-                    continue
-                try:
-                    networks.append(ipaddress.IPv4Network(part))
-                except ValueError:
-                    invalid.append(part)
-            if invalid:
-                QMessageBox.warning(self, "警告", f"以下网络无效: {', '.join(invalid)}")
-            if len(networks) < 2:
-                QMessageBox.warning(self, "提示", "至少需要两个网络")
+            return ipmath.parse_network(text, strict=False)
+        except ValueError as e:
+            self.live.warn("错误", f"无效的父网络: {e}", live, critical=True)
+            return None
+
+    def calculate_free(self, live=False):
+        """空闲空间：父网络中没有被已分配网络占用的部分（已分配列表可以为空）"""
+        parent = self.parse_parent(live)
+        if parent is None:
+            return
+        lines = self.text_edit.toPlainText().strip().split("\n")
+        key = ("free", parent, prefix_io.normalize_lines(lines))
+        result = self.live.cache.get(key)
+        if result is not None:
+            self.on_free(result, key=key, live=live)
+            return
+        self.live.run_task(live, "查找空闲空间",
+                           lambda progress: self.compute_free(parent, prefix_io.parse_lines(
+                               lines, progress=progress, total=len(lines)), progress),
+                           lambda result: self.on_free(result, key=key, live=live))
+
+    def calculate_ranges(self, live=False):
+        """范围转换：把 "起始地址 - 结束地址" 范围列表转换为最少的CIDR列表"""
+        txt = self.text_edit.toPlainText().strip()
+        if not txt:
+            if not live:
+                QMessageBox.warning(self, "提示", "请输入地址范围")
+            return
+        lines = txt.split("\n")
+        key = ("range", prefix_io.normalize_lines(lines))
+        result = self.live.cache.get(key)
+        if result is not None:
+            self.on_ranges(result, key=key, live=live)
+            return
+        self.live.run_task(live, "范围转换",
+                           lambda progress: self.compute_ranges(
+                               prefix_io.parse_range_lines(lines, progress=progress, total=len(lines)), progress),
+                           lambda result: self.on_ranges(result, key=key, live=live))
+
+    def calculate_set(self, live=False):
+        """集合运算：两个输入各自合并为有序地址范围后做一次扫描，结果为最少的CIDR列表"""
+        operation = self.op_combo.currentData()
+        files = list(self.files)
+        if live and any(files):
+            return  # 使用文件的输入只在点击"计算"时读取
+        lines = []
+        for i, name in enumerate("AB"):
+            text = self.edits[i].toPlainText().strip()
+            if not text and not files[i]:
+                if not live:
+                    QMessageBox.warning(self, "提示", f"请输入集合 {name} 的网络列表")
+                return
+            lines.append(text.split("\n"))
+        key = None
+        if not any(files):
+            key = ("setop", operation, prefix_io.normalize_lines(lines[0]), prefix_io.normalize_lines(lines[1]))
+            result = self.live.cache.get(key)
+            if result is not None:
+                self.on_set_calculated(result, key, live)
                 return
-            supernets = list(ipaddress.collapse_addresses(networks))
-            self.show_result(supernets, networks)
-            self.parent.status.showMessage(f"找到 {len(supernets)} 个超网")
+
+        def read(i, progress):
+            if files[i]:
+                return prefix_io.read_prefix_file(files[i], progress)
+            return prefix_io.parse_lines(lines[i], progress=progress, total=len(lines[i]))
+
+        self.live.run_task(live, "集合运算",
+                           lambda progress: self.compute_set(read(0, progress), read(1, progress), operation, progress),
+                           lambda result: self.on_set_calculated(result, key, live))
+
+    def choose_file(self, title):
+        """选择网络列表文件（文本或前缀集）"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, title, str(Path.home()),
+            f"Text Files (*.txt *.csv *.lst);;前缀集 (*{prefix_set.EXTENSION});;All Files (*)")
+        return path
+
+    def import_operand(self, i):
+        """集合运算的输入 i（0 为A，1 为B）改为使用文件，点击"计算"时在后台读取，不经过文本框"""
+        name = "AB"[i]
+        path = self.choose_file(f"导入集合 {name}")
+        if not path:
+            return
+        self.files[i] = path
+        edit = self.edits[i]
+        edit.clear()
+        edit.setReadOnly(True)
+        edit.setPlaceholderText(f"使用文件 {Path(path).name}\n（点击\"清除\"后恢复手动输入）")
+        self.parent.status.showMessage(f"集合 {name} 使用文件 {Path(path).name}，点击\"计算\"开始集合运算")
+
+    def import_file(self):
+        """从文件导入网络列表（后台流式解析，不经过文本框）并按当前计算方式直接计算；集合运算时作为集合 A"""
+        if self.radio_setop.isChecked():
+            self.import_operand(0)
+            return
+        if self.radio_free.isChecked() and self.parse_parent() is None:
+            return
+        path = self.choose_file("导入网络列表")
+        if not path:
+            return
+        name = Path(path).name
+        if self.radio_free.isChecked():
+            parent = self.parse_parent()
+            self.parent.run_task(f"导入 {name}",
+                                 lambda progress: self.compute_free(
+                                     parent, prefix_io.read_prefix_file(path, progress), progress),
+                                 lambda result: self.on_free(result, name),
+                                 lambda e: QMessageBox.critical(self, "错误", f"读取文件失败: {str(e)}"))
+            return
+        if self.radio_range.isChecked():
+            self.parent.run_task(f"导入 {name}",
+                                 lambda progress: self.compute_ranges(prefix_io.read_range_file(path, progress),
+                                                                      progress),
+                                 lambda result: self.on_ranges(result, name),
+                                 lambda e: QMessageBox.critical(self, "错误", f"读取文件失败: {str(e)}"))
+            return
+        if self.radio_overlap.isChecked():
+            self.parent.run_task(f"导入 {name}",
+                                 lambda progress: self.compute_overlaps(
+                                     prefix_io.read_prefix_file(path, progress, line_numbers=True), progress),
+                                 lambda result: self.on_overlaps(result, name),
+                                 lambda e: QMessageBox.critical(self, "错误", f"读取文件失败: {str(e)}"))
+            return
+        self.parent.run_task(f"导入 {name}",
+                             lambda progress: self.compute(
+                                 prefix_io.read_prefix_file(path, progress, compact=True), progress),
+                             lambda result: self.on_calculated(result, name),
+                             lambda e: QMessageBox.critical(self, "错误", f"读取文件失败: {str(e)}"))
+
+    def save_prefix_set(self):
+        """将计算结果或输入的网络保存为二进制前缀集文件，之后可以直接导入（内存映射，不需要解析）"""
+        if not self.saveable:
+            QMessageBox.warning(self, "提示", "请先进行计算")
+            return
+        filters = {f"{name} (*{prefix_set.EXTENSION})": networks for name, networks in self.saveable.items()}
+        path, selected = QFileDialog.getSaveFileName(
+            self, "保存前缀集", str(Path.home() / f"networks{prefix_set.EXTENSION}"), ";;".join(filters))
+        if not path:
+            return
+        networks = filters.get(selected, next(iter(filters.values())))
+        self.parent.run_export("保存前缀集",
+                               lambda progress: export.export_plan(path, networks, "prefixset", progress),
+                               lambda count: self.parent.status.showMessage(f"已保存 {count} 个网络到 {path}"),
+                               lambda e: QMessageBox.critical(self, "错误", f"保存失败: {str(e)}"))
+
+    @staticmethod
+    def compute(parsed, progress):
+        """在后台线程中合并超网并统计包含关系（输入为 CompactNetworks 或前缀集时在数组上计算）"""
+        if len(parsed.networks) < 2:
+            return parsed, None, None
+        supernets = compact.collapse(parsed.networks, progress)
+        counts = compact.contained_counts(supernets, parsed.networks, progress)
+        return parsed, supernets, counts
+
+    @staticmethod
+    def compute_free(parent, parsed, progress):
+        """
+        在后台线程中找出空闲块，并按从大到小排序、统计各种大小的数量
+
+        安装了 NumPy 时还计算利用率图，并为悬停查询建立已分配网络的前缀索引。
+        """
+        blocks = ipmath.free_blocks(parent, parsed.networks, progress)
+        largest = sorted(blocks, key=lambda sn: (sn.prefix, sn.network))
+        histogram = sorted(Counter(sn.prefix for sn in blocks).items())
+        hilbert = optional_hilbert()
+        umap = index = None
+        if hilbert is not None:
+            umap = hilbert.utilization_map(parent, blocks, progress=progress)
+            index = lookup.PrefixIndex(parsed.networks)
+        return parent, parsed, blocks, largest, histogram, umap, index
+
+    @staticmethod
+    def compute_ranges(parsed, progress):
+        """在后台线程中把地址范围转换为CIDR列表"""
+        networks = list(ipmath.iter_range_cidrs(parsed.ranges, progress))
+        return parsed, networks, address_totals(networks)
+
+    @staticmethod
+    def compute_overlaps(parsed, progress):
+        """在后台线程中做重叠检测"""
+        return parsed, overlap.find_overlaps(parsed.networks, parsed.line_numbers, progress)
+
+    @staticmethod
+    def compute_set(parsed_a, parsed_b, operation, progress):
+        """在后台线程中做集合运算"""
+        networks = ipmath.set_operation(parsed_a.networks, parsed_b.networks, operation, progress)
+        return parsed_a, parsed_b, operation, networks, address_totals(networks)
+
+    def on_calculated(self, result, source=None, key=None, live=False):
+        """后台计算完成（key 为规范化后的输入，从文件导入时为 None）"""
+        parsed, supernets, counts = result
+        if key is not None:
+            self.live.cache.put(key, result)
+        if parsed.invalid_count and not live:
+            self.show_invalid_report(parsed)
+        if supernets is None:
+            self.live.warn("提示", "至少需要两个网络", live)
+            return
+        self.set_saveable({"超网结果": supernets, "输入的网络": parsed.networks})
+        self.live.show(key, lambda: self.show_result(supernets, parsed.networks, counts))
+        if not live:
+            self.record_history(parsed, supernets, source)
+        message = f"找到 {len(supernets)} 个超网"
+        if source:
+            message = f"已从 {source} 导入 {len(parsed.networks)} 个网络，{message}"
+        if parsed.invalid_count and live:
+            message += f"，跳过了 {parsed.invalid_count} 个无效网络"
+        self.parent.status.showMessage(message)
+
+    def on_set_calculated(self, result, key=None, live=False):
+        """集合运算完成（key 为规范化后的输入，使用文件时为 None）"""
+        parsed_a, parsed_b, operation, networks, totals = result
+        if key is not None:
+            self.live.cache.put(key, result)
+        if not live:
+            for parsed, name in ((parsed_a, "集合 A "), (parsed_b, "集合 B ")):
+                if parsed.invalid_count:
+                    self.show_invalid_report(parsed, name)
+        self.set_saveable({"运算结果": networks, "集合 A": parsed_a.networks, "集合 B": parsed_b.networks})
+        rows = NetworkListRows([("集合运算", SET_OPERATION_NAMES[operation]),
+                                ("集合 A 的网络数量", str(len(parsed_a.networks))),
+                                ("集合 B 的网络数量", str(len(parsed_b.networks))),
+                                ("结果网络数量", str(len(networks)) if networks else "0（空集）"),
+                                ("结果地址总数", totals)], networks)
+        self.live.show(key, lambda: self.model.set_rows(rows))
+        if not live:
+            self.record_set_history(parsed_a, parsed_b, operation, networks)
+        message = f"{SET_OPERATION_NAMES[operation]}: 结果为 {len(networks)} 个网络"
+        invalid_count = parsed_a.invalid_count + parsed_b.invalid_count
+        if invalid_count and live:
+            message += f"，跳过了 {invalid_count} 个无效网络"
+        self.parent.status.showMessage(message)
+
+    def on_free(self, result, source=None, key=None, live=False):
+        """空闲空间计算完成（key 为规范化后的输入，从文件导入时为 None）"""
+        parent, parsed, blocks, largest, histogram, umap, index = result
+        if key is not None:
+            self.live.cache.put(key, result)
+        if parsed.invalid_count and not live:
+            self.show_invalid_report(parsed)
+        self.free = (parent, blocks)
+        self.set_saveable({"空闲块": blocks, "已分配的网络": parsed.networks})
+        size = 1 << (parent.bits - parent.prefix)
+        free = sum(1 << (sn.bits - sn.prefix) for sn in blocks)
+        summary = [("父网络", ipmath.format_network(*parent)),
+                   ("已分配的网络数量", str(len(parsed.networks))),
+                   ("已分配地址", f"{size - free}（{(size - free) * 100 / size:.2f}%）"),
+                   ("空闲地址", f"{free}（{free * 100 / size:.2f}%）"),
+                   ("空闲块数量", str(len(blocks)))]
+        summary += [(f"空闲块 /{prefix}", f"{count} 个") for prefix, count in histogram]
+        rows = NetworkListRows(summary, largest, "空闲块")
+        message = f"{ipmath.format_network(*parent)} 中有 {len(blocks)} 个空闲块，共 {free} 个空闲地址"
+
+        def render():
+            self.model.set_rows(rows)
+            self.show_map(umap, index)
+
+        self.live.show(key, render)
+        if not live:
+            self.parent.record_history(
+                "free", f"{ipmath.format_network(*parent)}，" + (source or f"{len(parsed.networks)} 个已分配网络"),
+                message, [parent], self.result_lines())
+        if source:
+            message = f"已从 {source} 导入 {len(parsed.networks)} 个网络，{message}"
+        if parsed.invalid_count and live:
+            message += f"，跳过了 {parsed.invalid_count} 个无效网络"
+        self.parent.status.showMessage(message)
+        self.update_fit()
+
+    def update_fit(self):
+        """在当前的空闲块中查找第一个能放下 /N 的位置"""
+        text = self.fit_edit.text().strip()
+        if not text or self.free is None:
+            self.fit_label.clear()
+            return
+        parent, blocks = self.free
+        try:
+            new_prefix = ipmath.parse_prefix(text, parent.bits)
         except ValueError as e:
-            QMessageBox.critical(self, "错误", f"输入格式错误:\n{str(e)}")
+            self.fit_label.setText(str(e))
+            return
+        sn = ipmath.first_fit(blocks, new_prefix)
+        self.fit_label.setText(f"首个可用: {ipmath.format_network(*sn)}" if sn else f"没有可用的 /{new_prefix}")
+
+    def on_ranges(self, result, source=None, key=None, live=False):
+        """范围转换完成（key 为规范化后的输入，从文件导入时为 None）"""
+        parsed, networks, totals = result
+        if key is not None:
+            self.live.cache.put(key, result)
+        if parsed.invalid_count and not live:
+            self.show_invalid_report(parsed, item="地址范围")
+        self.set_saveable({"转换结果": networks})
+        rows = NetworkListRows([("输入的范围数量", str(len(parsed.ranges))),
+                                ("结果网络数量", str(len(networks))),
+                                ("地址总数", totals)], networks)
+        message = f"{len(parsed.ranges)} 个地址范围转换为 {len(networks)} 个网络"
+        self.live.show(key, lambda: self.model.set_rows(rows))
+        if not live:
+            first = [f"{ipmath.format_address(start, bits)}-{ipmath.format_address(end, bits)}"
+                     for start, end, bits in parsed.ranges[:3]]
+            self.parent.record_history(
+                "range", source or f"{len(parsed.ranges)} 个范围: {', '.join(first)}"
+                + (", ..." if len(parsed.ranges) > 3 else ""),
+                f"{len(networks)} 个网络: {head(networks)}", networks, self.result_lines())
+        if source:
+            message = f"已从 {source} 导入，{message}"
+        if parsed.invalid_count and live:
+            message += f"，跳过了 {parsed.invalid_count} 个无效范围"
+        self.parent.status.showMessage(message)
+
+    def on_overlaps(self, result, source=None, key=None, live=False):
+        """重叠检测完成（key 为规范化后的输入，从文件导入时为 None）"""
+        parsed, report = result
+        if key is not None:
+            self.live.cache.put(key, result)
+        if parsed.invalid_count and not live:
+            self.show_invalid_report(parsed)
+        self.overlaps = report
+        self.set_saveable({"输入的网络": parsed.networks})
+        duplicates = report.count("duplicate")
+        if report.group_count:
+            message = (f"发现 {report.group_count} 组重叠的网络: {duplicates} 个重复，"
+                       f"{len(report) - duplicates} 个被其他网络包含")
+        else:
+            message = f"{len(parsed.networks)} 个网络互不重叠"
+        self.live.show(key, lambda: self.overlap_model.set_rows(report))
+        if not live:
+            self.parent.record_history(
+                "overlap", source or f"{len(parsed.networks)} 个网络: {head(parsed.networks)}", message,
+                (parsed.networks[row.index] for row in report.rows), self.overlap_lines(report))
+        if source:
+            message = f"已从 {source} 导入 {len(parsed.networks)} 个网络，{message}"
+        if parsed.invalid_count and live:
+            message += f"，跳过了 {parsed.invalid_count} 个无效网络"
+        self.parent.status.showMessage(message)
+
+    def overlap_row(self, row):
+        """冲突表格的一行"""
+        report = self.overlap_model.rows
+        group, kind, network, line, other, other_line = overlap.overlap_record(report, row)
+        return (str(group), overlap.KINDS[kind], network, str(line), other, str(other_line))
+
+    def overlap_lines(self, report):
+        """冲突列表的各行文本"""
+        for row in report.rows:
+            group, kind, network, line, other, other_line = overlap.overlap_record(report, row)
+            yield f"组 {group}: {network}（第{line}行）{overlap.KINDS[kind]} {other}（第{other_line}行）"
 
-    def show_result(self, supernets, original):
+    def export_overlaps(self):
+        """将冲突列表导出为CSV或JSONL"""
+        report = self.overlaps
+        if report is None or not len(report):
+            QMessageBox.warning(self, "提示", "没有可导出的冲突，请先进行重叠检测")
+            return
+        path, selected = QFileDialog.getSaveFileName(
+            self, "导出冲突", str(Path.home() / "overlaps.csv"), "CSV Files (*.csv);;JSON Lines (*.jsonl)")
+        if not path:
+            return
+        fmt = "jsonl" if path.lower().endswith(".jsonl") or "jsonl" in selected else "csv"
+        self.parent.run_export("导出冲突",
+                               lambda progress: overlap.export_overlaps(path, report, fmt, progress),
+                               lambda count: self.parent.status.showMessage(f"已导出 {count} 个冲突到 {path}"),
+                               lambda e: QMessageBox.critical(self, "错误", f"导出失败: {str(e)}"))
+
+    def result_lines(self):
+        """当前显示的结果的各行文本"""
+        rows = self.model.rows
+        return (f"{desc}: {val}" for desc, val in (rows[i] for i in range(len(rows))))
+
+    def record_history(self, parsed, supernets, source=None):
+        """记录到历史记录（输入和结果只列出前几个网络）"""
+        self.parent.record_history(
+            "supernet", source or f"{len(parsed.networks)} 个网络: {head(parsed.networks)}",
+            f"{len(supernets)} 个超网: {head(supernets)}", supernets, self.result_lines())
+
+    def record_set_history(self, parsed_a, parsed_b, operation, networks):
+        """集合运算记录到历史记录"""
+        sources = [Path(path).name if path else f"{len(parsed.networks)} 个网络"
+                   for path, parsed in zip(self.files, (parsed_a, parsed_b))]
+        self.parent.record_history(
+            "setop", f"{SET_OPERATION_NAMES[operation]}: A = {sources[0]}, B = {sources[1]}",
+            f"{len(networks)} 个网络: {head(networks)}", networks, self.result_lines())
+
+    def show_invalid_report(self, parsed, what="", item="网络"):
+        """显示无效网络报告（只列出前几条，完整的有上限列表放在详细信息中）"""
+        box = QMessageBox(QMessageBox.Icon.Warning, "警告",
+                          f"{what}共有 {parsed.invalid_count} 个无效{item}，已跳过:\n"
+                          + parsed.format_invalid(limit=10), parent=self)
+        if parsed.invalid_count > 10:
+            box.setDetailedText(parsed.format_invalid())
+        box.exec()
+
+    def show_result(self, supernets, original, counts):
         """显示超网计算结果"""
-        self.tree.clear()
-        QTreeWidgetItem(self.tree, ["输入的网络数量", str(len(original))])
-        QTreeWidgetItem(self.tree, ["原始网络列表", ", ".join(str(n) for n in original[:5]) + (", ..." if len(original) > 5 else "")])
-        QTreeWidgetItem(self.tree, ["", ""])
-        for idx, sn in enumerate(supernets, 1):
-            QTreeWidgetItem(self.tree, [f"超网 #{idx}", str(sn)])
-            QTreeWidgetItem(self.tree, ["网络地址", str(sn.network_address)])
-            QTreeWidgetItem(self.tree, ["广播地址", str(sn.broadcast_address)])
-            QTreeWidgetItem(self.tree, ["子网掩码 (CIDR)", f"/{sn.prefixlen}"])
-            QTreeWidgetItem(self.tree, ["子网掩码 (点分十进制)", str(sn.netmask)])
-            QTreeWidgetItem(self.tree, ["地址总数", str(sn.num_addresses)])
-            if sn.prefixlen <= 30:
-                QTreeWidgetItem(self.tree, ["可用主机范围",
-                                            f"{sn.network_address + 1} - {sn.broadcast_address - 1}"])
-            contained = [n for n in original if n.subnet_of(sn)]
-            QTreeWidgetItem(self.tree, ["包含的原始网络", f"{len(contained)}个"])
-            if idx < len(supernets):
-                QTreeWidgetItem(self.tree, ["", ""])
+        self.model.set_rows(SupernetResultRows(supernets, original, counts))
+
+    def set_saveable(self, saveable):
+        """
+        替换可保存的结果 {名称: 网络序列}
+
+        其中导入的前缀集（.smps 文件）记录下来；结果显示之后关闭不再被引用的前缀集。
+        """
+        self.saveable = saveable
+        for networks in saveable.values():
+            if isinstance(networks, prefix_set.PrefixSet) and all(networks is not ps for ps in self.prefix_sets):
+                self.prefix_sets.append(networks)
+        # 调用者在设置之后才显示新结果，等本次事件处理完再检查引用
+        QTimer.singleShot(0, self.release_prefix_sets)
+
+    def referenced_networks(self):
+        """当前结果引用的网络序列：可保存的结果、两个结果表格和重叠检测结果"""
+        networks = list(self.saveable.values())
+        rows = self.model.rows
+        if isinstance(rows, SupernetResultRows):
+            networks.append(rows.original)
+        elif isinstance(rows, NetworkListRows):
+            networks.append(rows.networks)
+        for report in (self.overlaps, self.overlap_model.rows):
+            if isinstance(report, overlap.OverlapReport):
+                networks.append(report.networks)
+        return networks
+
+    def release_prefix_sets(self):
+        """
+        关闭不再被引用的前缀集的文件映射
+
+        有导出正在进行时（可能正在读取它）等导出结束后再关闭。
+        """
+        referenced = self.referenced_networks()
+        for networks in list(self.prefix_sets):
+            if all(networks is not other for other in referenced):
+                self.prefix_sets.remove(networks)
+                self.parent.when_export_done(networks.close)
 
     def clear(self):
         """清除输入和结果"""
-        self.text_edit.clear()
-        self.tree.clear()
+        self.detach_files()
+        for edit in self.edits + [self.parent_edit, self.fit_edit]:
+            edit.clear()
+        self.set_saveable({})
+        self.overlaps = None
+        self.free = None
+        self.fit_label.clear()
+        self.show_map(None, None)
+        self.live.shown = None
+        self.model.clear()
+        self.overlap_model.clear()
+
+    def detach_files(self):
+        """集合运算的输入恢复为使用文本框"""
+        for edit, placeholder in zip(self.edits, self.placeholders):
+            edit.setReadOnly(False)
+            edit.setPlaceholderText(placeholder)
+        self.files = [None, None]
 
     def collect_text(self):
         """收集文本结果用于保存"""
+        if self.radio_overlap.isChecked():
+            return "".join(line + "\n" for line in self.overlap_lines(self.overlaps)) if self.overlaps else ""
         txt = ""
-        for i in range(self.tree.topLevelItemCount()):
-            item = self.tree.topLevelItem(i)
-            txt += f"{item.text(0)}: {item.text(1)}\n"
+        rows = self.model.rows
+        for i in range(len(rows)):
+            desc, val = rows[i]
+            txt += f"{desc}: {val}\n"
         return txt
\ No newline at end of file
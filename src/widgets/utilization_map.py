@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+利用率图视图
+
+把 core.hilbert.UtilizationMap 的利用率数组经颜色表转换为一张 QImage，整张图只绘制这一张图片，
+缩放和平移时只重绘可见部分。需要 NumPy（由导入本模块的代码处理未安装的情况）。
+"""
+
+import numpy as np
+from PyQt5.QtCore import Qt, QPointF, QRectF, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPainter
+from PyQt5.QtWidgets import QWidget
+
+
+# 利用率 0（空闲）到 255（全部已分配）的颜色
+FREE_COLOR = QColor("#d9e6d3")
+USED_COLOR = QColor("#c0392b")
+
+
+def color_table(free=FREE_COLOR, used=USED_COLOR):
+    """256 项的 RGB32 颜色表（uint32），在两种颜色之间线性插值"""
+    t = np.linspace(0.0, 1.0, 256)
+    channels = [np.rint(a + (b - a) * t).astype(np.uint32)
+                for a, b in zip(free.getRgb()[:3], used.getRgb()[:3])]
+    return 0xFF000000 | channels[0] << 16 | channels[1] << 8 | channels[2]
+
+
+def render_image(umap, table=None):
+    """把利用率图转换为 (QImage, 像素数组)；QImage 直接使用像素数组的内存，需一起保留"""
+    pixels = np.ascontiguousarray((color_table() if table is None else table)[umap.image_levels()], dtype=np.uint32)
+    size = umap.size
+    return QImage(pixels.data, size, size, size * 4, QImage.Format_RGB32), pixels
+
+
+class UtilizationMapView(QWidget):
+    """
+    利用率图：滚轮以光标为中心缩放，左键拖动平移，双击恢复显示全图
+
+    鼠标悬停在图上时发出 hovered(格子的网络 Subnet, 利用率)，离开图时发出 hovered(None, 0)。
+    """
+
+    hovered = pyqtSignal(object, float)
+
+    # 最大放大倍数（每个格子的像素数）
+    MAX_SCALE = 64
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.map = None
+        self.image = None
+        self.pixels = None
+        self.scale = 1.0
+        self.offset = QPointF()
+        self.fitted = True
+        self.drag_from = None
+        self.setMouseTracking(True)
+        self.setMinimumSize(256, 256)
+
+    def set_map(self, umap):
+        """显示新的利用率图（None 清除）"""
+        self.map = umap
+        if umap is None:
+            self.image = self.pixels = None
+        else:
+            self.image, self.pixels = render_image(umap)
+        self.fit()
+
+    def fit_scale(self):
+        """显示全图时的缩放倍数"""
+        if self.map is None:
+            return 1.0
+        return min(self.width(), self.height()) / self.map.size
+
+    def fit(self):
+        """缩放到显示全图并居中"""
+        self.fitted = True
+        self.scale = self.fit_scale()
+        if self.map is not None:
+            extent = self.map.size * self.scale
+            self.offset = QPointF((self.width() - extent) / 2, (self.height() - extent) / 2)
+        self.update()
+
+    def to_image(self, pos):
+        """窗口坐标对应的图中坐标（浮点）"""
+        return (QPointF(pos) - self.offset) / self.scale
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().window())
+        if self.image is None:
+            return
+        # 只绘制可见部分：源矩形取可见区域对应的整格，目标矩形随之对齐
+        top_left = self.to_image(QPointF(0, 0))
+        bottom_right = self.to_image(QPointF(self.width(), self.height()))
+        size = self.map.size
+        left, top = max(0, int(top_left.x())), max(0, int(top_left.y()))
+        right, bottom = min(size, int(bottom_right.x()) + 1), min(size, int(bottom_right.y()) + 1)
+        if left >= right or top >= bottom:
+            return
+        source = QRectF(left, top, right - left, bottom - top)
+        target = QRectF(self.offset.x() + left * self.scale, self.offset.y() + top * self.scale,
+                        (right - left) * self.scale, (bottom - top) * self.scale)
+        painter.drawImage(target, self.image, source)
+
+    def resizeEvent(self, event):
+        if self.fitted:
+            self.fit()
+        super().resizeEvent(event)
+
+    def wheelEvent(self, event):
+        if self.map is None:
+            return
+        pos = QPointF(event.pos())
+        anchor = self.to_image(pos)
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        self.scale = min(max(self.scale * factor, self.fit_scale()), self.MAX_SCALE)
+        self.offset = pos - anchor * self.scale
+        self.fitted = False
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.drag_from = QPointF(event.pos())
+
+    def mouseReleaseEvent(self, event):
+        self.drag_from = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.fit()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_from is not None:
+            pos = QPointF(event.pos())
+            self.offset += pos - self.drag_from
+            self.drag_from = pos
+            self.fitted = False
+            self.update()
+        if self.map is None:
+            return
+        point = self.to_image(event.pos())
+        x, y = int(point.x()), int(point.y())
+        if 0 <= point.x() < self.map.size and 0 <= point.y() < self.map.size:
+            self.hovered.emit(self.map.cell_at(x, y), self.map.utilization_at(x, y))
+        else:
+            self.hovered.emit(None, 0.0)
+
+    def leaveEvent(self, event):
+        self.hovered.emit(None, 0.0)
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令行启动脚本（不导入PyQt5）
+"""
+
+import sys
+import os
+
+# 将src目录添加到Python路径中
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())